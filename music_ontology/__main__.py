@@ -0,0 +1,266 @@
+"""Build, ingest into, reason over, validate, export and inspect the music ontology.
+
+Run `python3 -m music_ontology <command> --help` for the options of a command.
+Modules are imported by the commands which need them only, so that frequent
+runs (e.g. `stats` as a health check) start quickly.
+"""
+
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+DEFAULT_BASE_IRI = "file://ontology.owl"
+DEFAULT_INPUT = "ontology.owl"
+
+
+def _provider(args):
+    import owlready2 as owl
+    from music_ontology.ontology import MusicOntologyProvider
+    return MusicOntologyProvider(args.base_iri, quadstore=args.quadstore,
+                                 world=None if args.quadstore else owl.World())
+
+
+def _open(args):
+    """Load the ontology from the input file, or else from the quadstore."""
+
+    provider = _provider(args)
+    if args.input is None and args.quadstore:
+        return provider, provider.load()
+    return provider, provider.load(args.input or DEFAULT_INPUT)
+
+
+def _write(provider, onto, args):
+    """Save the ontology to the output file and/or commit it to the quadstore."""
+
+    if args.output:
+        provider.save(onto, args.output)
+    if args.quadstore:
+        provider.publish(onto)
+    _close(provider, args)
+
+
+def _close(provider, args):
+    # The quadstore is locked while open
+    if args.quadstore:
+        provider.world.close()
+
+
+def schema(args):
+    """Build the schema only."""
+
+    provider = _provider(args)
+    onto = provider.create(include_examples=False)
+    _write(provider, onto, args)
+
+
+def sample(args):
+    """Build the schema and the sample data."""
+
+    provider = _provider(args)
+    onto = provider.create(schema=args.schema, unique_names=args.unique_names)
+    _write(provider, onto, args)
+
+
+def ingest(args):
+    """Ingest catalog dumps."""
+
+    from music_ontology.ingest import CatalogIngestor
+
+    if args.schema:
+        provider = _provider(args)
+        onto = provider.create(include_examples=False, schema=args.schema)
+    else:
+        provider, onto = _open(args)
+
+    resolver = None
+    if args.resolve:
+        from music_ontology.resolution import EntityResolver
+        resolver = EntityResolver(onto, auto_merge=args.merge)
+    ingestor = CatalogIngestor(onto, args.batch_size, resolver)
+    count = 0
+    for dump in args.dumps:
+        format = args.format or ("csv" if dump.endswith(".csv") else "jsonl")
+        with open(dump, "r", encoding="utf8", newline="") as file:
+            count += ingestor.ingest_csv(file) if format == "csv" else ingestor.ingest_jsonl(file)
+    print(f"Ingested {count} records.")
+    if resolver is not None:
+        print(f"Resolved {resolver.resolved} names to known individuals.")
+        for duplicate in resolver.merged:
+            print(f"Merged {duplicate.duplicate!r} into {duplicate.canonical!r} ({duplicate.score:.2f}).")
+        for duplicate in resolver.duplicates:
+            print(f"Possible duplicate: {duplicate.duplicate!r} of {duplicate.canonical!r} "
+                  f"({duplicate.score:.2f}).")
+    if args.unique_names:
+        provider.declare_unique_names(onto, args.unique_names)
+    _write(provider, onto, args)
+
+
+def reason(args):
+    """Reason over the ontology and assert the inferences."""
+
+    provider, onto = _open(args)
+    if args.reasoner == "hermit":
+        from music_ontology.cache import hermit as reasoner
+    else:
+        from music_ontology.classifier import classify as reasoner
+
+    if args.cache:
+        from music_ontology.cache import ReasoningCache
+        cache = ReasoningCache(args.cache)
+        provider.reason(onto, lambda onto: cache.reason(onto, reasoner, args.reasoner))
+    else:
+        provider.reason(onto, reasoner)
+    _write(provider, onto, args)
+
+
+def export(args):
+    """Export the ontology to another file."""
+
+    provider, onto = _open(args)
+    if args.output.endswith(".npz"):
+        from music_ontology.columnar import export as columnar_export
+        columnar_export(onto).save(args.output)
+    else:
+        provider.save(onto, args.output)
+    _close(provider, args)
+
+
+def diff(args):
+    """Write the patch from an ontology file to another."""
+
+    import owlready2 as owl
+    from music_ontology.ontology import MusicOntologyProvider
+    from music_ontology.patch import diff as changes
+
+    old, new = (MusicOntologyProvider(args.base_iri, world=owl.World()).load(filename)
+                for filename in (args.old, args.new))
+    changeset = changes(old, new)
+    changeset.save(args.output)
+    removed, added = changeset.individuals()
+    print(f"{len(changeset.removed)} triples removed and {len(changeset.added)} added "
+          f"({len(removed)} individuals removed and {len(added)} added).")
+
+
+def patch(args):
+    """Apply a patch to the ontology."""
+
+    provider, onto = _open(args)
+    count = provider.apply_patch(onto, args.patch)
+    print(f"Changed {count} triples.")
+    _write(provider, onto, args)
+
+
+def validate(args):
+    """Check the constraints of the schema and print every violation."""
+
+    from music_ontology.validation import validate as violations
+
+    provider, onto = _open(args)
+    found = violations(onto)
+    _close(provider, args)
+    for violation in found:
+        print(json.dumps(violation._asdict(), default=str) if args.json else violation)
+    if found:
+        sys.exit(1)
+
+
+def stats(args):
+    """Print the number of triples and of individuals per class."""
+
+    from music_ontology.instrumentation import count_individuals, count_triples
+
+    provider, onto = _open(args)
+    result = {"triples": count_triples(onto), "individuals": count_individuals(onto)}
+    _close(provider, args)
+    if args.json:
+        print(json.dumps(result, sort_keys=True))
+        return
+    print(f"{'triples':<24} {result['triples']:>10}")
+    for name, count in sorted(result["individuals"].items()):
+        print(f"{name:<24} {count:>10}")
+
+
+def parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--base-iri", default=DEFAULT_BASE_IRI, help="the base IRI of the ontology")
+    common.add_argument("--quadstore", help="an SQLite quadstore to read from and write into")
+
+    reading = argparse.ArgumentParser(add_help=False)
+    reading.add_argument("-i", "--input", help=f"the ontology file to read (default: the quadstore, "
+                                               f"or else {DEFAULT_INPUT})")
+
+    result = argparse.ArgumentParser(prog="python3 -m music_ontology", description=__doc__.splitlines()[0])
+    commands = result.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("schema", parents=[common], help=schema.__doc__)
+    command.add_argument("-o", "--output", help="the file to write, e.g. schema.nt.gz")
+    command.set_defaults(run=schema)
+
+    command = commands.add_parser("sample", parents=[common], help=sample.__doc__)
+    command.add_argument("-o", "--output", help=f"the file to write, e.g. {DEFAULT_INPUT}")
+    command.add_argument("--schema", help="a prebuilt schema file to start from")
+    command.add_argument("--unique-names", choices=["classes", "ensembles"], default="classes",
+                         help="declare the individuals of each class distinct, or the members of each "
+                              "ensemble only")
+    command.set_defaults(run=sample)
+
+    command = commands.add_parser("ingest", parents=[common, reading], help=ingest.__doc__)
+    command.add_argument("dumps", nargs="+", help="CSV or JSON Lines catalog dumps")
+    command.add_argument("--format", choices=["csv", "jsonl"], help="the format of the dumps "
+                                                                    "(default: from their extension)")
+    command.add_argument("--schema", help="start from a prebuilt schema file instead of the input")
+    command.add_argument("--batch-size", type=int, default=10000)
+    command.add_argument("--resolve", action="store_true",
+                         help="resolve the names of artists, genres and albums to the known ones, "
+                              "and list the similar ones")
+    command.add_argument("--merge", action="store_true",
+                         help="with --resolve, resolve the similar names to the known ones too")
+    command.add_argument("--unique-names", choices=["classes", "ensembles"],
+                         help="declare the individuals distinct again after ingesting (see sample)")
+    command.add_argument("-o", "--output", help="the file to write")
+    command.set_defaults(run=ingest)
+
+    command = commands.add_parser("reason", parents=[common, reading], help=reason.__doc__)
+    command.add_argument("--reasoner", choices=["native", "hermit"], default="native")
+    command.add_argument("--cache", help="a directory caching the reasoning results")
+    command.add_argument("-o", "--output", help="the file to write (required without --quadstore)")
+    command.set_defaults(run=reason)
+
+    command = commands.add_parser("export", parents=[common, reading], help=export.__doc__)
+    command.add_argument("-o", "--output", required=True,
+                         help="the file to write: .owl, .nt, .nq (optionally .gz) or .npz (columnar)")
+    command.set_defaults(run=export)
+
+    command = commands.add_parser("diff", parents=[common], help=diff.__doc__)
+    command.add_argument("old", help="the ontology file to patch")
+    command.add_argument("new", help="the ontology file to patch into")
+    command.add_argument("-o", "--output", required=True, help="the patch to write, e.g. ontology.patch.gz")
+    command.set_defaults(run=diff)
+
+    command = commands.add_parser("patch", parents=[common, reading], help=patch.__doc__)
+    command.add_argument("patch", help="the patch to apply")
+    command.add_argument("-o", "--output", help="the file to write")
+    command.set_defaults(run=patch)
+
+    command = commands.add_parser("validate", parents=[common, reading], help=validate.__doc__)
+    command.add_argument("--json", action="store_true", help="print a JSON object per violation")
+    command.set_defaults(run=validate)
+
+    command = commands.add_parser("stats", parents=[common, reading], help=stats.__doc__)
+    command.add_argument("--json", action="store_true", help="print JSON")
+    command.set_defaults(run=stats)
+
+    return result
+
+
+def main(arguments: Optional[List[str]] = None):
+    commands = parser()
+    args = commands.parse_args(arguments)
+    if args.command == "reason" and not (args.output or args.quadstore):
+        commands.error("reason needs -o/--output or --quadstore to keep the inferences")
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,278 @@
+"""An asyncio facade over a loaded music ontology, for serving it from async web services."""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import owlready2 as owl
+
+from music_ontology.index import CatalogIndex
+from music_ontology.ingest import CatalogIngestor
+from music_ontology.lyrics import LyricsMatch, LyricsSearch
+from music_ontology.queries import QueryService, parameter_key
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_PENDING_WRITES = 1024
+
+
+class ReadWriteLock:
+    """A lock shared by any number of readers or held by a single writer.
+
+    Waiting writers have priority over new readers, so that a steady stream
+    of reads cannot starve the writes.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def reading(self) -> Iterator[None]:
+        with self._condition:
+            while self._writing or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def writing(self) -> Iterator[None]:
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+
+class AsyncCatalog:
+    """Serves lookups, index queries, SPARQL queries and searches without blocking the event loop.
+
+    Reads run on a pool of `max_workers` threads and share a `ReadWriteLock`
+    over the quadstore, and the creation of the Python objects of entities,
+    which owlready2 does not guard, is serialized. Identical reads which are
+    in flight at the same time are run once, and the entity lookups made
+    during the same iteration of the event loop are resolved together.
+
+    Writes are functions passed to `write()`: a single writer task runs them
+    one at a time and in order, holding the lock exclusively, and commits an
+    on-disk quadstore after each of them. The index, queries and search are
+    kept up to date by the writes. Entities returned by the reads should be
+    read further through `read()`.
+
+    Unless `index` is given, the index is built on the reader pool by the
+    first read which needs it, and unless `lyrics` is given, the lyrics
+    search and its full-text index are created by the writer task on the
+    first `search()`.
+    """
+
+    def __init__(self, onto: owl.Ontology, max_workers: int = DEFAULT_MAX_WORKERS,
+                 index: Optional[CatalogIndex] = None, queries: Optional[QueryService] = None,
+                 lyrics: Optional[LyricsSearch] = None,
+                 max_pending_writes: int = DEFAULT_MAX_PENDING_WRITES):
+        self.onto = onto
+        self.world = onto.world
+        self._index = index
+        self.queries = queries or QueryService(onto)
+        self.lyrics = lyrics
+        self.lock = ReadWriteLock()
+        self.coalesced = 0
+        self.batches = 0
+        self.max_pending_writes = max_pending_writes
+        self._readers = ThreadPoolExecutor(max_workers, thread_name_prefix="music_ontology_reader")
+        self._writer_thread = ThreadPoolExecutor(1, thread_name_prefix="music_ontology_writer")
+        self._writes: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._in_flight: Dict[tuple, asyncio.Future] = {}
+        self._names: Dict[str, asyncio.Future] = {}
+        self._batch: List[str] = []
+        self._materializing = threading.RLock()
+        self._building = threading.Lock()
+        self._original: Optional[Callable] = self.world._get_by_storid
+        self._wrapped_before = "_get_by_storid" in self.world.__dict__  # e.g. by a LiveEntityCache
+        self.world._get_by_storid = partial(self._get_by_storid, self._original)
+
+    @property
+    def index(self) -> CatalogIndex:
+        """The index of the catalog, built here if no read has needed it yet."""
+        return self._built_index()
+
+    async def __aenter__(self) -> "AsyncCatalog":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def entity(self, name: str) -> Optional[owl.Thing]:
+        """Return the entity of the given name in the ontology, if any."""
+
+        future = self._names.get(name)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._names[name] = loop.create_future()
+            if not self._batch:
+                loop.call_soon(self._lookup_batch)
+            self._batch.append(name)
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(future)
+
+    async def entities(self, names: Iterable[str]) -> List[Optional[owl.Thing]]:
+        return list(await asyncio.gather(*(self.entity(name) for name in names)))
+
+    async def find(self, name: str) -> List[owl.Thing]:
+        return await self._indexed("find", name)
+
+    async def tracks_by_genre(self, genre: owl.Thing) -> List[owl.Thing]:
+        return await self._indexed("tracks_by_genre", genre)
+
+    async def tracks_by_artist(self, artist: owl.Thing) -> List[owl.Thing]:
+        return await self._indexed("tracks_by_artist", artist)
+
+    async def discography(self, artist: owl.Thing) -> List[owl.Thing]:
+        return await self._indexed("discography", artist)
+
+    async def albums_in_years(self, first: Optional[int] = None, last: Optional[int] = None) -> List[owl.Thing]:
+        return await self._indexed("albums_in_years", first, last)
+
+    async def tracks_longer_than(self, milliseconds: int) -> List[owl.Thing]:
+        return await self._indexed("tracks_longer_than", milliseconds)
+
+    async def query(self, name: str, *parameters) -> list:
+        """Return all the rows of a named query of the `QueryService`."""
+        return await self._coalesced(("query", name), lambda *args: list(self.queries.run(name, *args)),
+                                     *parameters)
+
+    async def search(self, query: str, limit: int = 20) -> List[LyricsMatch]:
+        if self.lyrics is None:
+            await self.write(self._create_lyrics)
+        return await self._coalesced("search", self.lyrics.search, query, limit)
+
+    async def read(self, function: Callable, *args):
+        """Call a function reading the ontology on the thread pool, sharing the lock."""
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, self._shared, function, args)
+
+    async def write(self, function: Callable, *args):
+        """Queue a function writing into the ontology and return its result once it has run."""
+
+        if self._writer is None:
+            self._writes = asyncio.Queue(self.max_pending_writes)
+            self._writer = asyncio.get_running_loop().create_task(self._write_loop())
+        future = asyncio.get_running_loop().create_future()
+        await self._writes.put((function, args, future))
+        return await future
+
+    async def ingest(self, records: Iterable[dict]) -> int:
+        """Ingest catalog records (see `music_ontology.ingest`) through the writer task."""
+
+        return await self.write(lambda: CatalogIngestor(self.onto).ingest(records))
+
+    async def close(self):
+        """Run the queued writes, then stop serving and release the ontology."""
+
+        if self._writer is not None:
+            await self._writes.put((None, (), None))
+            await self._writer
+            self._writer = None
+        # The reads still running are waited for off the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self._readers.shutdown)
+        self._writer_thread.shutdown()  # Idle once the writer task has returned
+        if self._index is not None:
+            self._index.close()
+        self.queries.close()
+        if self._original is not None:
+            if self._wrapped_before:
+                self.world._get_by_storid = self._original
+            else:
+                self.world.__dict__.pop("_get_by_storid", None)
+            self._original = None
+
+    async def _coalesced(self, name, function: Callable, *args):
+        key = (name, *(parameter_key(arg) for arg in args))
+        future = self._in_flight.get(key)
+        if future is None:
+            future = self._in_flight[key] = asyncio.ensure_future(self.read(function, *args))
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(future)
+
+    async def _indexed(self, name: str, *args):
+        return await self._coalesced(name, self._read_index, name, *args)
+
+    def _read_index(self, name: str, *args):
+        return getattr(self._built_index(), name)(*args)
+
+    def _lookup_batch(self):
+        names, self._batch = self._batch, []
+        self.batches += 1
+        lookup = asyncio.ensure_future(self.read(lambda: [self.onto[name] for name in names]))
+        lookup.add_done_callback(partial(self._resolve_batch, names))
+
+    def _resolve_batch(self, names: List[str], lookup: asyncio.Future):
+        for i, name in enumerate(names):
+            future = self._names.pop(name)
+            if lookup.cancelled():
+                future.cancel()
+            elif lookup.exception() is not None:
+                future.set_exception(lookup.exception())
+            else:
+                future.set_result(lookup.result()[i])
+
+    async def _write_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            function, args, future = await self._writes.get()
+            if function is None:
+                return
+            done = loop.run_in_executor(self._writer_thread, self._exclusive, function, args)
+            # Waited for without raising: the error must not hold a frame of this task
+            await asyncio.wait([done])
+            if not future.cancelled():
+                if done.exception() is not None:
+                    future.set_exception(done.exception())
+                else:
+                    future.set_result(done.result())
+
+    def _built_index(self) -> CatalogIndex:
+        with self._building:
+            if self._index is None:
+                self._index = CatalogIndex(self.onto)
+            return self._index
+
+    def _create_lyrics(self):
+        if self.lyrics is None:
+            self.lyrics = LyricsSearch(self.onto)
+
+    def _get_by_storid(self, original: Callable, *args, **kwargs):
+        with self._materializing:
+            return original(*args, **kwargs)
+
+    def _shared(self, function: Callable, args: tuple):
+        with self.lock.reading():
+            return function(*args)
+
+    def _exclusive(self, function: Callable, args: tuple):
+        with self.lock.writing():
+            result = function(*args)
+            if self.world.filename != ":memory:":
+                self.world.save()
+            return result
@@ -0,0 +1,182 @@
+"""Benchmarks of the main operations on synthetic catalogs of several sizes.
+
+Run with `python3 -m music_ontology.benchmark [scale ...]`. Every measured
+step is appended as a JSON line to the results file, together with the
+revision and the time of the run, and compared with the previous run of the
+same step at the same scale.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+import owlready2 as owl
+
+from music_ontology.instrumentation import peak_rss
+
+SCALES = {
+    "tiny": dict(artists=20, ensembles=5, albums=10, tracks=100, genres=8),
+    "small": dict(artists=200, ensembles=50, albums=200, tracks=2000, genres=20),
+    "medium": dict(artists=2000, ensembles=500, albums=2000, tracks=20000, genres=50),
+    "large": dict(artists=20000, ensembles=5000, albums=20000, tracks=200000, genres=100),
+}
+"""The parameters of `music_ontology.synthetic.generate()` for each scale."""
+
+RESULTS_FILE = "benchmarks.jsonl"
+BASE_IRI = "http://benchmark.org/music.owl"
+LOOKUPS = 1000
+
+
+class Recorder:
+    """Collects the wall time and memory of the steps of a benchmark.
+
+    `process_peak_rss_kb` is the peak resident memory of the benchmark process
+    so far (`ru_maxrss`), not of the step alone: it only grows with the steps
+    of a scale.
+    """
+
+    def __init__(self, scale: str):
+        self.scale = scale
+        self.results: List[dict] = []
+
+    @contextmanager
+    def step(self, name: str, **extra) -> Iterator[dict]:
+        result = {"scale": self.scale, "step": name, **extra}
+        start = time.perf_counter()
+        yield result
+        result["seconds"] = round(time.perf_counter() - start, 6)
+        result["process_peak_rss_kb"] = peak_rss()
+        self.results.append(result)
+
+
+def run_scale(scale: str, parameters: Optional[dict] = None) -> List[dict]:
+    """Run every benchmark step over a synthetic catalog of the given scale."""
+
+    from music_ontology.index import CatalogIndex
+    from music_ontology.ontology import MusicOntologyProvider
+    from music_ontology.synthetic import generate, populate
+
+    parameters = parameters or SCALES[scale]
+    recorder = Recorder(scale)
+    step = recorder.step
+
+    with tempfile.TemporaryDirectory() as directory:
+        rdfxml = os.path.join(directory, "ontology.owl")
+        nt = os.path.join(directory, "ontology.nt.gz")
+
+        provider = MusicOntologyProvider(BASE_IRI, world=owl.World())
+        with step("create") as result:
+            onto = provider.create(include_examples=False)
+            result["records"] = populate(onto, **parameters)
+        result["triples"] = len(onto.graph)
+
+        with step("reason"):
+            provider.reason(onto)
+
+        with step("save_rdfxml"):
+            provider.save(onto, rdfxml)
+        with step("save_ntriples"):
+            provider.save(onto, nt)
+        provider.world.close()
+
+        with step("load_rdfxml"):
+            MusicOntologyProvider(BASE_IRI, world=owl.World()).load(rdfxml)
+        provider = MusicOntologyProvider(BASE_IRI, world=owl.World())
+        with step("load_ntriples"):
+            onto = provider.load(nt)
+
+        rng = random.Random(0)
+        names = [record["name"] for record in generate(**parameters) if "members" not in record]
+        names = rng.choices(names, k=LOOKUPS)
+
+        with step("lookup_by_name", lookups=LOOKUPS):
+            for name in names:
+                onto[name].length_in_milliseconds
+        with step("build_index"):
+            index = CatalogIndex(onto)
+        genre = onto.Genre.instances()[0]
+        with step("indexed_lookups", lookups=LOOKUPS):
+            for name in names:
+                index.find(name)
+            index.tracks_by_genre(genre)
+            index.tracks_longer_than(300000)
+        index.close()
+
+    return recorder.results
+
+
+def record(results: List[dict], filename: str = RESULTS_FILE):
+    """Append the results to a JSON Lines file with the details of the run."""
+
+    run = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "revision": _revision(),
+        "python": platform.python_version(),
+    }
+    with open(filename, "a", encoding="utf8") as file:
+        for result in results:
+            file.write(json.dumps({**run, **result}) + "\n")
+
+
+def previous_results(filename: str = RESULTS_FILE) -> Dict[tuple, dict]:
+    """Return the last recorded result of each (scale, step)."""
+
+    previous = {}
+    try:
+        with open(filename, "r", encoding="utf8") as file:
+            for line in file:
+                result = json.loads(line)
+                previous[result["scale"], result["step"]] = result
+    except FileNotFoundError:
+        pass
+    return previous
+
+
+def report(results: List[dict], previous: Dict[tuple, dict], write: Callable[[str], None] = print):
+    """Print the results and their change since the previous run."""
+
+    write(f"{'scale':<8} {'step':<16} {'seconds':>10} {'change':>8} {'process peak RSS (MB)':>22}")
+    for result in results:
+        before = previous.get((result["scale"], result["step"]))
+        change = ""
+        if before and before["seconds"]:
+            change = f"{(result['seconds'] / before['seconds'] - 1) * 100:+.0f}%"
+        write(f"{result['scale']:<8} {result['step']:<16} {result['seconds']:>10.3f} "
+              f"{change:>8} {result['process_peak_rss_kb'] / 1024:>22.1f}")
+
+
+def main(arguments: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scales", nargs="*", default=["small"], choices=list(SCALES))
+    parser.add_argument("--output", default=RESULTS_FILE, help="the JSON Lines file to append results to")
+    arguments = parser.parse_args(arguments)
+
+    previous = previous_results(arguments.output)
+    context = multiprocessing.get_context("spawn")
+    for scale in arguments.scales:
+        # A process per scale, so that the peak memory is that of the scale
+        with context.Pool(1) as pool:
+            results = pool.apply(run_scale, (scale,))
+        record(results, arguments.output)
+        report(results, previous)
+
+
+def _revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    main()
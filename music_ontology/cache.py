@@ -0,0 +1,267 @@
+"""A content-addressed cache of reasoning results."""
+
+import hashlib
+import json
+import os
+from itertools import groupby
+from typing import Callable, Dict, Optional
+
+import owlready2 as owl
+
+from music_ontology.classifier import INFERENCES_IRI, refresh_types
+from music_ontology.instrumentation import phase
+
+Reasoner = Callable[[owl.Ontology], None]
+
+_EMPTY = hashlib.sha256(b"").hexdigest()
+
+
+def hermit(onto: owl.Ontology):
+    """Run HermiT over the world of the ontology, inferring property values too."""
+    owl.sync_reasoner(onto.world, infer_property_values=True, debug=0)
+
+
+class ReasoningCache:
+    """Stores the inferences of a reasoner keyed by the asserted triples.
+
+    The key is a SHA-256 hash of the reasoner name and of the canonically
+    sorted triples of every ontology of the world but the inferences, since
+    the reasoners classify the whole world. Blank nodes (class
+    restrictions, lists, `AllDifferent` axioms...) are hashed by their
+    content instead of their storids, so that the same ontology has the same
+    key whether it was created or loaded, in any process. When a reasoning
+    run finds a stored entry for its key, the stored inferred class
+    memberships and property values are asserted instead of running the
+    reasoner.
+
+    Entries are JSON files in `directory`; when their total size exceeds
+    `max_size` bytes, the least recently used ones are evicted.
+    """
+
+    def __init__(self, directory: str, max_size: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def reason(self, onto: owl.Ontology, reasoner: Reasoner = hermit,
+               name: str = "hermit") -> bool:
+        """Reason over the ontology, reusing stored inferences if possible.
+
+        Returns whether the inferences came from the cache.
+        """
+
+        with phase("cache_lookup"):
+            key = self.key(onto, name)
+            entry = self._read(key)
+        if entry is not None:
+            with phase("cache_restore"):
+                _restore(onto.world, entry)
+            return True
+
+        with phase("reasoner"):
+            reasoner(onto)
+        with phase("cache_store"):
+            self._write(key, _snapshot(onto.world))
+        return False
+
+    def key(self, onto: owl.Ontology, name: str = "hermit") -> str:
+        """Return the cache key of the current asserted state for a reasoner."""
+
+        db = onto.world.graph.db
+        contexts = ",".join(str(ontology.graph.c) for ontology in onto.world.ontologies.values()
+                            if ontology.base_iri != INFERENCES_IRI)
+        blanks = _blank_hashes(db, contexts)
+        digest = hashlib.sha256(name.encode("utf8"))
+
+        def term(storid: int, iri: Optional[str]) -> str:
+            return iri if storid > 0 else "_:" + blanks.get(storid, _EMPTY)
+
+        # Sorted by subject and predicate in SQL, then by object within each group,
+        # once the blank nodes are replaced by their hashes
+        rows = db.execute(
+            f"""SELECT rs.iri, rp.iri, q.o, ro.iri, NULL, NULL
+                FROM objs q
+                JOIN resources rs ON rs.storid=q.s
+                JOIN resources rp ON rp.storid=q.p
+                LEFT JOIN resources ro ON ro.storid=q.o
+                WHERE q.c IN ({contexts}) AND q.s>0
+                UNION ALL
+                SELECT rs.iri, rp.iri, q.o, NULL, COALESCE(rd.iri, q.d), typeof(q.o)
+                FROM datas q
+                JOIN resources rs ON rs.storid=q.s
+                JOIN resources rp ON rp.storid=q.p
+                LEFT JOIN resources rd ON rd.storid=q.d
+                WHERE q.c IN ({contexts}) AND q.s>0
+                ORDER BY 1, 2""")
+        for _, group in groupby(rows, key=lambda row: row[:2]):
+            triples = sorted(
+                ((s, p, term(o, o_iri) if datatype is None else o, datatype, kind)
+                 for s, p, o, o_iri, datatype, kind in group),
+                key=_sort_key,
+            )
+            for triple in triples:
+                digest.update(repr(triple).encode("utf8"))
+                digest.update(b"\n")
+        for blank in sorted(blanks.values()):
+            digest.update(blank.encode("utf8"))
+            digest.update(b"\n")
+        return digest.hexdigest()
+
+    def invalidate(self, key: Optional[str] = None):
+        """Remove the entry of the given key, or every entry if none is given."""
+
+        keys = [key] if key else [name[:-5] for name in self._entries()]
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        """Remove every entry."""
+        self.invalidate()
+
+    def size(self) -> int:
+        """Return the total size of the stored entries in bytes."""
+        return sum(os.path.getsize(os.path.join(self.directory, name)) for name in self._entries())
+
+    def _read(self, key: str) -> Optional[dict]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf8") as file:
+                entry = json.load(file)
+        except FileNotFoundError:
+            return None
+        os.utime(path)  # Mark as recently used
+        return entry
+
+    def _write(self, key: str, entry: dict):
+        path = self._path(key)
+        with open(path + ".tmp", "w", encoding="utf8") as file:
+            json.dump(entry, file)
+        os.replace(path + ".tmp", path)
+        self._evict()
+
+    def _evict(self):
+        paths = [os.path.join(self.directory, name) for name in self._entries()]
+        paths.sort(key=os.path.getmtime)
+        size = sum(os.path.getsize(path) for path in paths)
+        while size > self.max_size and len(paths) > 1:
+            path = paths.pop(0)
+            size -= os.path.getsize(path)
+            os.remove(path)
+
+    def _entries(self):
+        return [name for name in os.listdir(self.directory) if name.endswith(".json")]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+
+def _sort_key(values: tuple) -> list:
+    """Order tuples mixing literals of several types (e.g. int and str values of a property)."""
+    return [(type(value).__name__, repr(value)) for value in values]
+
+
+def _blank_hashes(db, contexts: str) -> Dict[int, str]:
+    """Return the hash of every blank node, computed from its triples and those of the blank nodes it refers to."""
+
+    triples: Dict[int, list] = {}
+    for s, p, o, o_iri, datatype, kind in db.execute(
+            f"""SELECT q.s, rp.iri, q.o, ro.iri, NULL, NULL FROM objs q
+                JOIN resources rp ON rp.storid=q.p
+                LEFT JOIN resources ro ON ro.storid=q.o
+                WHERE q.c IN ({contexts}) AND q.s<0
+                UNION ALL
+                SELECT q.s, rp.iri, q.o, NULL, COALESCE(rd.iri, q.d), typeof(q.o) FROM datas q
+                JOIN resources rp ON rp.storid=q.p
+                LEFT JOIN resources rd ON rd.storid=q.d
+                WHERE q.c IN ({contexts}) AND q.s<0"""):
+        triples.setdefault(s, []).append((p, o, o_iri, datatype, kind))
+
+    hashes: Dict[int, str] = {}
+    for root in triples:
+        # Post-order without recursion, since rdf:rest chains are as long as the lists.
+        # A blank node referring back to one of its ancestors counts as empty.
+        stack, path = [(root, False)], set()
+        while stack:
+            blank, expanded = stack.pop()
+            if blank in hashes:
+                continue
+            if expanded:
+                content = sorted(
+                    ((p, (o_iri if o > 0 else "_:" + hashes.get(o, _EMPTY)) if datatype is None else o,
+                      datatype, kind)
+                     for p, o, o_iri, datatype, kind in triples.get(blank, ())),
+                    key=_sort_key,
+                )
+                hashes[blank] = hashlib.sha256(repr(content).encode("utf8")).hexdigest()
+                path.discard(blank)
+                continue
+            path.add(blank)
+            stack.append((blank, True))
+            stack.extend((o, False) for _, o, _, datatype, _ in triples.get(blank, ())
+                         if datatype is None and o < 0 and o not in hashes and o not in path)
+    return hashes
+
+
+def _snapshot(world: owl.World) -> dict:
+    """Return the named triples of the inferences ontology by IRI."""
+
+    inferences = world.get_ontology(INFERENCES_IRI)
+    c = inferences.graph.c
+    db = world.graph.db
+    return {
+        "objs": db.execute(
+            """SELECT rs.iri, rp.iri, ro.iri FROM objs q
+               JOIN resources rs ON rs.storid=q.s
+               JOIN resources rp ON rp.storid=q.p
+               JOIN resources ro ON ro.storid=q.o
+               WHERE q.c=? AND q.s!=?""",
+            (c, inferences.storid),
+        ).fetchall(),
+        "datas": db.execute(
+            """SELECT rs.iri, rp.iri, q.o, COALESCE(rd.iri, q.d) FROM datas q
+               JOIN resources rs ON rs.storid=q.s
+               JOIN resources rp ON rp.storid=q.p
+               LEFT JOIN resources rd ON rd.storid=q.d
+               WHERE q.c=? AND q.s!=?""",
+            (c, inferences.storid),
+        ).fetchall(),
+    }
+
+
+def _restore(world: owl.World, entry: dict):
+    """Replace the content of the inferences ontology by a snapshot."""
+
+    inferences = world.get_ontology(INFERENCES_IRI)
+    c = inferences.graph.c
+    db = world.graph.db
+    abbreviate = world._abbreviate
+
+    def datatype(d):
+        if isinstance(d, str) and not d.startswith("@"):
+            return abbreviate(d)
+        return d
+
+    objs = [(abbreviate(s), abbreviate(p), abbreviate(o)) for s, p, o in entry["objs"]]
+    datas = [(abbreviate(s), abbreviate(p), o, datatype(d)) for s, p, o, d in entry["datas"]]
+    touched = {s for s, _, _ in objs} | {o for _, _, o in objs} | {s for s, _, _, _ in datas}
+
+    with inferences:
+        stale = {s for (s,) in db.execute(
+            "SELECT s FROM objs WHERE c=? AND s!=? UNION SELECT s FROM datas WHERE c=?",
+            (c, inferences.storid, c))}
+        db.execute("DELETE FROM objs WHERE c=? AND s!=?", (c, inferences.storid))
+        db.execute("DELETE FROM datas WHERE c=? AND s!=?", (c, inferences.storid))
+        db.executemany("INSERT INTO objs VALUES (?,?,?,?)", ((c, *triple) for triple in objs))
+        db.executemany("INSERT INTO datas VALUES (?,?,?,?,?)", ((c, *triple) for triple in datas))
+
+    touched |= stale
+    refresh_types(world, touched)
+    python_names = [prop.python_name for prop in world.properties()]
+    for storid in touched:
+        entity = world._entities.get(storid)
+        if isinstance(entity, owl.Thing):
+            for name in python_names:
+                entity.__dict__.pop(name, None)
@@ -0,0 +1,128 @@
+"""Change tracking of the triples asserted in the music ontology."""
+
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+
+import owlready2 as owl
+from owlready2.base import rdf_type
+
+Change = Tuple[Optional[int], Optional[int], Optional[int]]
+"""A changed triple as `(subject, predicate, object)` storids.
+
+The object is None for data triples and unknown parts are None too.
+"""
+
+_RAW_METHODS = (
+    "_add_obj_triple_raw_spo", "_set_obj_triple_raw_spo", "_del_obj_triple_raw_spo",
+    "_add_data_triple_raw_spod", "_set_data_triple_raw_spod", "_del_data_triple_raw_spod",
+)
+
+
+class ChangeTracker:
+    """Records the individuals whose triples changed since the last `clear()`.
+
+    The raw triple methods of the ontology are wrapped, in the same way as
+    `owlready2.observe` does, so that every added, set or deleted triple marks
+    its subject (and its object, for object properties) as dirty. Writers which
+    bypass these methods, such as the bulk ingestion, report their triples
+    through `notify()`. `owl.destroy_entity()`, which deletes the triples of
+    an entity with SQL, reports them through a wrapper of the world's graph.
+
+    Listeners are called with the list of changed triples as they happen,
+    e.g. to keep indexes up to date.
+    """
+
+    def __init__(self, onto: owl.Ontology):
+        self.onto = onto
+        self.dirty: Set[int] = set()
+        self.listeners: List[Callable[[List[Change]], None]] = []
+        self._originals = {}
+
+    def start(self) -> "ChangeTracker":
+        """Start recording the changes of the ontology."""
+
+        if self._originals:
+            return self
+        for name in _RAW_METHODS:
+            self._originals[name] = method = getattr(self.onto, name)
+            setattr(self.onto, name, self._wrap(method))
+        trackers = self.onto.__dict__.setdefault("_change_trackers", [])
+        trackers.append(self)
+        _track_destructions(self.onto.world)
+        return self
+
+    def stop(self):
+        """Stop recording, restoring the original triple methods."""
+
+        for name, method in self._originals.items():
+            setattr(self.onto, name, method)
+        self._originals.clear()
+        trackers = self.onto.__dict__.get("_change_trackers", [])
+        if self in trackers:
+            trackers.remove(self)
+
+    def clear(self) -> Set[int]:
+        """Forget the recorded dirty individuals and return them."""
+
+        dirty, self.dirty = self.dirty, set()
+        return dirty
+
+    def record(self, changes: List[Change]):
+        """Record the given changed triples and tell the listeners about them."""
+
+        for s, p, o in changes:
+            if s is not None and s > 0:
+                self.dirty.add(s)
+            if o is not None and o > 0 and p != rdf_type:
+                self.dirty.add(o)
+        for listener in self.listeners:
+            listener(changes)
+
+    def _wrap(self, method: Callable) -> Callable:
+        def wrapper(s, p, o, *datatype):
+            method(s, p, o, *datatype)
+            # Data triples are reported without their literal value
+            self.record([(s, p, None if datatype else o)])
+        return wrapper
+
+    def __enter__(self) -> "ChangeTracker":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def notify(onto: owl.Ontology, changes: Iterable[Change]):
+    """Report triples written without the ontology's triple methods."""
+
+    trackers = onto.__dict__.get("_change_trackers")
+    if trackers:
+        changes = list(changes)
+        for tracker in trackers:
+            tracker.record(changes)
+
+
+
+def _track_destructions(world: owl.World):
+    """Report the triples deleted by `owl.destroy_entity()`, once per world."""
+
+    graph = world.graph
+    if "destroy_entity" in graph.__dict__:
+        return
+    destroy_entity = graph.destroy_entity
+
+    def wrapper(storid, *args, **kwargs):
+        # Read before they are deleted: the triples of the entity and those pointing at it
+        changes = {}
+        for c, s, p, o in graph.db.execute("SELECT c, s, p, o FROM objs WHERE s=? OR o=?", (storid, storid)):
+            changes.setdefault(c, []).append((s, p, o))
+        for c, s, p in graph.db.execute("SELECT c, s, p FROM datas WHERE s=?", (storid,)):
+            changes.setdefault(c, []).append((s, p, None))
+
+        destroyed = destroy_entity(storid, *args, **kwargs)
+        for c, triples in changes.items():
+            onto = graph.c_2_onto.get(c)
+            if onto is not None:
+                notify(onto, triples)
+        return destroyed
+
+    graph.destroy_entity = wrapper
@@ -0,0 +1,348 @@
+"""A native closed-world classifier for the defined music classes."""
+
+import io
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import owlready2 as owl
+from owlready2.base import owl_named_individual, rdf_type
+
+from music_ontology.changes import ChangeTracker
+from music_ontology.instrumentation import phase
+
+INFERENCES_IRI = "http://inferrences/"
+"""The ontology holding inferred facts, the same one used by owlready2's reasoners."""
+
+ENSEMBLE_SIZES = {"Duet": 2, "Trio": 3, "Quartet": 4, "Quintet": 5}
+BIG_BAND_SIZE = 10
+
+DEFINED_CLASSES = (
+    "Duet", "Trio", "Quartet", "Quintet", "BigBand",
+    "VA_Album", "InstrumentalTrack", "InstrumentalAlbum",
+)
+
+_ASSERTED_OBJS = "(SELECT s, p, o FROM objs WHERE c!=?)"
+"""A subquery over the object triples which are not inferences."""
+
+Inferences = Dict[int, Set[int]]
+"""Inferred defined classes (as storids) per individual storid."""
+
+
+class ClosedWorldClassifier:
+    """Classifies individuals into the defined classes of the music ontology.
+
+    The definitions of `Duet`, `Trio`, `Quartet`, `Quintet`, `BigBand`,
+    `VA_Album`, `InstrumentalTrack` and `InstrumentalAlbum` are evaluated
+    under the closed-world assumption with batched counts over the quadstore,
+    without running a reasoner. Inferred types are asserted in the same
+    inferences ontology owlready2's reasoners use, so classifying again
+    replaces the previous results. Like the definition under the closed-world
+    assumption, an album without tracks is an `InstrumentalAlbum`.
+    """
+
+    def __init__(self, onto: owl.Ontology):
+        self.onto = onto
+        self.world = onto.world
+        self.inferences = self.world.get_ontology(INFERENCES_IRI)
+        self._db = self.world.graph.db
+
+        self._class = {name: onto[name].storid for name in DEFINED_CLASSES}
+        self._va = onto["Various Artists"].storid
+        self._p = {
+            name: onto[name].storid
+            for name in (
+                "has_group_member", "is_member_of_group", "has_lyrics",
+                "are_of_track", "has_track", "appears_in_album",
+                "has_album_artist", "has_album_in_discography",
+            )
+        }
+
+    def classify(self, individuals: Optional[Iterable[int]] = None) -> Inferences:
+        """Infer and assert the defined classes and return the inferences.
+
+        If `individuals` (storids) are given, only they are (re)classified.
+        """
+
+        individuals = None if individuals is None else set(individuals)
+        with phase("infer"):
+            inferred = self.infer(individuals)
+        with phase("apply"):
+            self.apply(inferred, individuals)
+        return inferred
+
+    def infer(self, individuals: Optional[Set[int]] = None) -> Inferences:
+        """Return the defined classes of the individuals without asserting them."""
+
+        inferred: Inferences = defaultdict(set)
+
+        with self._scope("individuals", individuals) as scope:
+            member_counts = self._member_counts(scope)
+            album_tracks = self._album_tracks(scope)
+            va_albums = self._va_albums(scope)
+
+        # The tracks of an album decide whether the album is instrumental
+        tracks = None if individuals is None else individuals.union(*album_tracks.values())
+        with self._scope("tracks", tracks) as scope:
+            instrumental = self._instrumental_tracks(scope)
+
+        for ensemble, count in member_counts:
+            for name, size in ENSEMBLE_SIZES.items():
+                if count == size:
+                    inferred[ensemble].add(self._class[name])
+            if count >= BIG_BAND_SIZE:
+                inferred[ensemble].add(self._class["BigBand"])
+
+        for track in instrumental:
+            if individuals is None or track in individuals:
+                inferred[track].add(self._class["InstrumentalTrack"])
+
+        for album, tracks in album_tracks.items():
+            if tracks <= instrumental:  # Even without tracks, as `has_track.only()` holds
+                inferred[album].add(self._class["InstrumentalAlbum"])
+            if album in va_albums:
+                inferred[album].add(self._class["VA_Album"])
+
+        return dict(inferred)
+
+    def apply(self, inferred: Inferences, individuals: Optional[Set[int]] = None):
+        """Replace the asserted inferences of the individuals (default: all)."""
+
+        c = self.inferences.graph.c
+        classes = list(self._class.values())
+        marks = ",".join("?" * len(classes))
+
+        with self.inferences:
+            if individuals is None:
+                retracted = {s for (s,) in self._db.execute(
+                    f"SELECT s FROM objs WHERE c=? AND p=? AND o IN ({marks})",
+                    (c, rdf_type, *classes))}
+                self._db.execute(
+                    f"DELETE FROM objs WHERE c=? AND p=? AND o IN ({marks})",
+                    (c, rdf_type, *classes))
+            else:
+                retracted = set(individuals)
+                self._db.executemany(
+                    f"DELETE FROM objs WHERE c=? AND s=? AND p=? AND o IN ({marks})",
+                    ((c, s, rdf_type, *classes) for s in individuals))
+
+            self._db.executemany(
+                "INSERT OR IGNORE INTO objs VALUES (?,?,?,?)",
+                ((c, s, rdf_type, o) for s, types in inferred.items() for o in types))
+
+        refresh_types(self.world, retracted | set(inferred))
+
+    def dirty_closure(self, dirty: Set[int]) -> Set[int]:
+        """Return the individuals whose classification may depend on `dirty`."""
+
+        closure = set(dirty)
+        with self._scope("dirty", closure) as scope:
+            closure.update(s for (s,) in self._db.execute(
+                f"""SELECT o FROM {_ASSERTED_OBJS} WHERE p=? AND s IN (SELECT storid FROM {scope})
+                    UNION SELECT s FROM {_ASSERTED_OBJS} WHERE p=? AND o IN (SELECT storid FROM {scope})""",
+                (self._c, self._p["are_of_track"], self._c, self._p["has_lyrics"]),
+            ))
+        with self._scope("dirty", closure) as scope:
+            closure.update(s for (s,) in self._db.execute(
+                f"""SELECT s FROM {_ASSERTED_OBJS} WHERE p=? AND o IN (SELECT storid FROM {scope})
+                    UNION SELECT o FROM {_ASSERTED_OBJS} WHERE p=? AND s IN (SELECT storid FROM {scope})""",
+                (self._c, self._p["has_track"], self._c, self._p["appears_in_album"]),
+            ))
+        return closure
+
+    def cross_check(self) -> List[Tuple[str, str, str]]:
+        """Compare the native classification with HermiT's and return the differences.
+
+        HermiT runs on a copy of the asserted ontology in a separate world,
+        closed with `owl.close_world()` so that it follows the same
+        closed-world reading. Each difference is a tuple of the individual
+        IRI, the class IRI and either `"native"` or `"hermit"`, naming the
+        side which inferred the membership alone.
+        """
+
+        native = self.infer()
+
+        copy = io.BytesIO()
+        self.onto.save(copy, format="rdfxml")
+        copy.seek(0)
+        world = owl.World()
+        onto = world.get_ontology(self.onto.base_iri).load(fileobj=copy)
+        owl.close_world(onto)
+        owl.sync_reasoner(world, debug=0)
+
+        differences = []
+        for name in DEFINED_CLASSES:
+            native_iris = {
+                self.world._unabbreviate(s)
+                for s, types in native.items() if self._class[name] in types
+            }
+            hermit_iris = {individual.iri for individual in onto[name].instances()}
+            class_iri = onto[name].iri
+            differences.extend((iri, class_iri, "native") for iri in native_iris - hermit_iris)
+            differences.extend((iri, class_iri, "hermit") for iri in hermit_iris - native_iris)
+        return sorted(differences)
+
+    def _member_counts(self, scope: Optional[str]) -> List[Tuple[int, int]]:
+        return self._db.execute(
+            f"""SELECT ensemble, COUNT(DISTINCT member) FROM ({_restrict(
+                    f"SELECT s AS ensemble, o AS member FROM {_ASSERTED_OBJS} WHERE p=? "
+                    f"UNION SELECT o, s FROM {_ASSERTED_OBJS} WHERE p=?",
+                    "ensemble", scope)}
+                ) GROUP BY ensemble""",
+            (self._c, self._p["has_group_member"], self._c, self._p["is_member_of_group"]),
+        ).fetchall()
+
+    def _instrumental_tracks(self, scope: Optional[str]) -> Set[int]:
+        tracks = {s for (s,) in self._db.execute(
+            _restrict(
+                f"SELECT s AS track FROM {_ASSERTED_OBJS} "
+                f"WHERE p=? AND o IN ({self._subclasses_of('Track')}) "
+                f"UNION SELECT o FROM {_ASSERTED_OBJS} WHERE p=? "
+                f"UNION SELECT s FROM {_ASSERTED_OBJS} WHERE p=?",
+                "track", scope),
+            (self._c, rdf_type, self._c, self._p["has_track"],
+             self._c, self._p["appears_in_album"]),
+        )}
+        with_lyrics = {s for (s,) in self._db.execute(
+            _restrict(
+                f"SELECT s AS track FROM {_ASSERTED_OBJS} WHERE p=? "
+                f"UNION SELECT o FROM {_ASSERTED_OBJS} WHERE p=?",
+                "track", scope),
+            (self._c, self._p["has_lyrics"], self._c, self._p["are_of_track"]),
+        )}
+        return tracks - with_lyrics
+
+    def _album_tracks(self, scope: Optional[str]) -> Dict[int, Set[int]]:
+        album_tracks: Dict[int, Set[int]] = {
+            s: set() for (s,) in self._db.execute(
+                _restrict(
+                    f"SELECT s AS album FROM {_ASSERTED_OBJS} "
+                    f"WHERE p=? AND o IN ({self._subclasses_of('Album')})",
+                    "album", scope),
+                (self._c, rdf_type),
+            )
+        }
+        for album, track in self._db.execute(
+            _restrict(
+                f"SELECT s AS album, o AS track FROM {_ASSERTED_OBJS} WHERE p=? "
+                f"UNION SELECT o, s FROM {_ASSERTED_OBJS} WHERE p=?",
+                "album", scope),
+            (self._c, self._p["has_track"], self._c, self._p["appears_in_album"]),
+        ):
+            album_tracks.setdefault(album, set()).add(track)
+        return album_tracks
+
+    def _va_albums(self, scope: Optional[str]) -> Set[int]:
+        return {s for (s,) in self._db.execute(
+            _restrict(
+                f"SELECT s AS album FROM {_ASSERTED_OBJS} WHERE p=? AND o=? "
+                f"UNION SELECT o FROM {_ASSERTED_OBJS} WHERE p=? AND s=?",
+                "album", scope),
+            (self._c, self._p["has_album_artist"], self._va,
+             self._c, self._p["has_album_in_discography"], self._va),
+        )}
+
+    @contextmanager
+    def _scope(self, name: str, storids: Optional[Set[int]]) -> Iterator[Optional[str]]:
+        """Fill a temporary table with the storids to restrict the queries to."""
+
+        if storids is None:
+            yield None
+            return
+
+        table = f"temp.classifier_{name}"
+        self._db.execute(f"CREATE TEMP TABLE IF NOT EXISTS classifier_{name} (storid INTEGER PRIMARY KEY)")
+        self._db.executemany(f"INSERT OR IGNORE INTO {table} VALUES (?)", ((s,) for s in storids))
+        try:
+            yield table
+        finally:
+            self._db.execute(f"DELETE FROM {table}")
+
+    @property
+    def _c(self) -> int:
+        """The context of the inferences ontology."""
+        return self.inferences.graph.c
+
+    def _subclasses_of(self, name: str) -> str:
+        return ",".join(str(Class.storid) for Class in self.onto[name].descendants())
+
+
+class IncrementalClassifier(ClosedWorldClassifier):
+    """A classifier which only re-classifies what changed since its last run.
+
+    The first `classify()` call classifies the whole ontology. Later calls
+    re-derive the inferences of the individuals changed in the meantime and of
+    their neighbourhood only (e.g. the albums of a changed track or the track
+    of changed lyrics), retracting the inferences which no longer hold.
+    """
+
+    def __init__(self, onto: owl.Ontology):
+        super().__init__(onto)
+        self.tracker = ChangeTracker(onto).start()
+        self._classified = False
+
+    def classify(self, individuals: Optional[Iterable[int]] = None) -> Inferences:
+        dirty = self.tracker.clear()
+        if individuals is None and self._classified:
+            individuals = self.dirty_closure(dirty)
+        self._classified = True
+        return super().classify(individuals)
+
+
+def classify(onto: owl.Ontology):
+    """The one-shot reasoning path: classify the ontology in this process."""
+    ClosedWorldClassifier(onto).classify()
+
+
+def _restrict(sql: str, column: str, scope: Optional[str]) -> str:
+    """Restrict the rows of a query to those whose `column` is in `scope`."""
+
+    if scope is None:
+        return sql
+    return f"SELECT * FROM ({sql}) WHERE {column} IN (SELECT storid FROM {scope})"
+
+
+def refresh_types(world: owl.World, storids: Iterable[int]):
+    """Reload the types of the already loaded individuals from the quadstore."""
+
+    entities = world._entities
+    for storid in storids:
+        entity = entities.get(storid)
+        if not isinstance(entity, owl.Thing):
+            continue
+        types = [world._get_by_storid(o) for o in world._get_obj_triples_sp_o(storid, rdf_type)]
+        types = [Class for Class in types if isinstance(Class, owl.ThingClass)]
+        with owl.LOADING:
+            entity.is_a.reinit(types or [owl.Thing])
+
+
+def refresh_entities(onto: owl.Ontology, changes: Iterable[Tuple[int, int, Optional[int]]]):
+    """Make the already loaded entities forget the values and types changed straight in the quadstore.
+
+    `changes` are `(subject, predicate, object)` storids, with a None object
+    for data values. The individuals which are no longer declared are
+    forgotten, so that they are not found anymore.
+    """
+
+    world = onto.world
+    entities = world._entities
+    python_names = [prop.python_name for prop in onto.properties()]
+    typed, touched = set(), set()
+    for s, p, o in changes:
+        if p == rdf_type:
+            typed.add(s)
+        else:
+            touched.add(s)
+            if o is not None:
+                touched.add(o)
+
+    for storid in touched:
+        entity = entities.get(storid)
+        if entity is not None:
+            for name in python_names:
+                entity.__dict__.pop(name, None)
+    refresh_types(world, typed)
+    for storid in typed:
+        if isinstance(entities.get(storid), owl.Thing) and not world._has_obj_triple_spo(
+                storid, rdf_type, owl_named_individual):
+            entities.pop(storid, None)
@@ -0,0 +1,167 @@
+"""Sparse-matrix analytics of the collaborations between artists."""
+
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import owlready2 as owl
+from owlready2.base import rdf_type
+from scipy import sparse
+from scipy.sparse import csgraph
+
+Artist = Union[str, int, owl.Thing]
+"""An artist given by IRI, by id or as an entity."""
+
+UNREACHABLE = -1
+"""The distance to artists without any collaboration path."""
+
+
+class CollaborationGraph:
+    """The artists (solo artists and ensembles) and their collaborations as sparse matrices.
+
+    Artists are numbered from 0 in the order of their IRIs, like the
+    columns of `music_ontology.columnar`. Two artists collaborate if one is a
+    member of the other, or if both are artists or lyrics writers of the same
+    track (or writers of the same lyrics). `membership[e, m]` is 1 if `m` is
+    a member of ensemble `e`, `works[w, a]` is 1 if artist `a` performed or
+    wrote work `w`, and the symmetric `adjacency[a, b]` counts the memberships
+    and works shared by `a` and `b`.
+    """
+
+    def __init__(self, iris: List[str], membership: sparse.csr_matrix, works: sparse.csr_matrix):
+        self.iris = iris
+        self.membership = membership
+        self.works = works
+        shared_works = _off_diagonal(works.T @ works)
+        self.adjacency: sparse.csr_matrix = (shared_works + membership + membership.T).tocsr()
+        self._ids = {iri: i for i, iri in enumerate(iris)}
+
+    def id_of(self, artist: Artist) -> int:
+        if isinstance(artist, owl.Thing):
+            artist = artist.iri
+        return artist if isinstance(artist, (int, np.integer)) else self._ids[artist]
+
+    def iri_of(self, id: int) -> str:
+        return self.iris[id]
+
+    def degree(self) -> np.ndarray:
+        """Return the number of collaborators of every artist."""
+        return np.diff(self.adjacency.indptr)
+
+    def weighted_degree(self) -> np.ndarray:
+        """Return the number of memberships and works shared with others of every artist."""
+        return np.asarray(self.adjacency.sum(axis=1)).ravel()
+
+    def shared_members(self) -> sparse.csr_matrix:
+        """Return the number of members shared by every two different ensembles."""
+
+        return _off_diagonal(self.membership @ self.membership.T)
+
+    def ensembles_sharing_members(self, ensemble: Artist) -> List[Tuple[str, int]]:
+        """Return the ensembles sharing members with an ensemble and how many, most shared first."""
+
+        row = self.shared_members()[self.id_of(ensemble)]
+        order = np.lexsort((row.indices, -row.data))
+        return [(self.iris[row.indices[i]], int(row.data[i])) for i in order]
+
+    def neighbourhood(self, artist: Artist, hops: int = 1) -> np.ndarray:
+        """Return the ids of the artists at most `hops` collaborations away, the artist excluded."""
+
+        start = self.id_of(artist)
+        reached = np.zeros(len(self.iris), dtype=bool)
+        reached[start] = True
+        frontier = np.array([start])
+        for _ in range(hops):
+            neighbours = self.adjacency[frontier].indices
+            frontier = np.unique(neighbours[~reached[neighbours]])
+            if not len(frontier):
+                break
+            reached[frontier] = True
+        reached[start] = False
+        return np.flatnonzero(reached)
+
+    def distances(self, artist: Artist) -> np.ndarray:
+        """Return the number of collaborations from the artist to every artist, or `UNREACHABLE`."""
+
+        distances = csgraph.shortest_path(self.adjacency, unweighted=True, directed=False,
+                                          indices=self.id_of(artist))
+        distances[np.isinf(distances)] = UNREACHABLE
+        return distances.astype(np.int64)
+
+    def shortest_path(self, source: Artist, target: Artist) -> Optional[List[str]]:
+        """Return the IRIs of a shortest collaboration path between two artists, or None."""
+
+        source, target = self.id_of(source), self.id_of(target)
+        _, predecessors = csgraph.breadth_first_order(self.adjacency, source, directed=False,
+                                                      return_predecessors=True)
+        if source != target and predecessors[target] < 0:
+            return None
+        path = [target]
+        while path[-1] != source:
+            path.append(predecessors[path[-1]])
+        return [self.iris[i] for i in reversed(path)]
+
+    def components(self) -> np.ndarray:
+        """Return the label of the group of artists connected by collaborations of every artist."""
+        return csgraph.connected_components(self.adjacency, directed=False)[1]
+
+
+def build(onto: owl.Ontology) -> CollaborationGraph:
+    """Build the collaboration graph of the ontology's world in one pass over its relations."""
+
+    db = onto.world.graph.db
+    p = {name: onto[name].storid for name in (
+        "has_group_member", "is_member_of_group", "has_track_artist", "written_by",
+        "has_written_lyrics", "has_lyrics", "are_of_track",
+    )}
+
+    classes = ",".join(str(Class.storid) for Class in onto.Artist.descendants())
+    rows = db.execute(
+        f"""SELECT DISTINCT q.s, r.iri FROM objs q JOIN resources r ON r.storid=q.s
+            WHERE q.p=? AND q.o IN ({classes}) ORDER BY r.iri""", (rdf_type,)).fetchall()
+    ids = {s: i for i, (s, _) in enumerate(rows)}
+    iris = [iri for _, iri in rows]
+
+    members, performers, writers = set(), set(), set()
+    lyrics_track: Dict[int, int] = {}
+    for s, prop, o in db.execute(
+            f"SELECT s, p, o FROM objs WHERE p IN ({','.join('?' * len(p))})", tuple(p.values())):
+        if prop == p["has_group_member"]:
+            members.add((s, o))
+        elif prop == p["is_member_of_group"]:
+            members.add((o, s))
+        elif prop == p["has_track_artist"]:
+            performers.add((s, o))
+        elif prop == p["written_by"]:
+            writers.add((s, o))
+        elif prop == p["has_written_lyrics"]:
+            writers.add((o, s))
+        elif prop == p["has_lyrics"]:
+            lyrics_track[o] = s
+        else:
+            lyrics_track[s] = o
+
+    # A track and its lyrics are one work
+    works = performers | {(lyrics_track.get(lyrics, lyrics), artist) for lyrics, artist in writers}
+    work_ids: Dict[int, int] = {}
+    work_pairs = [(work_ids.setdefault(work, len(work_ids)), ids[artist])
+                  for work, artist in sorted(works) if artist in ids]
+    member_pairs = [(ids[ensemble], ids[member]) for ensemble, member in members
+                    if ensemble in ids and member in ids]
+
+    size = len(iris)
+    return CollaborationGraph(
+        iris,
+        _matrix(member_pairs, (size, size)),
+        _matrix(work_pairs, (len(work_ids), size)),
+    )
+
+
+def _matrix(pairs: List[Tuple[int, int]], shape: Tuple[int, int]) -> sparse.csr_matrix:
+    pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+    return sparse.csr_matrix((np.ones(len(pairs), dtype=np.int64), (pairs[:, 0], pairs[:, 1])), shape=shape)
+
+
+def _off_diagonal(matrix: sparse.spmatrix) -> sparse.csr_matrix:
+    matrix = matrix.tocoo()
+    keep = (matrix.row != matrix.col) & (matrix.data != 0)
+    return sparse.csr_matrix((matrix.data[keep], (matrix.row[keep], matrix.col[keep])), shape=matrix.shape)
@@ -0,0 +1,172 @@
+"""Columnar NumPy export of the catalog for analytics."""
+
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import owlready2 as owl
+from owlready2.base import rdf_type
+
+MISSING = -1
+"""The value of missing lengths and years."""
+
+KINDS = ("track", "album", "genre", "artist")
+
+_CLASSES = {"track": "Track", "album": "Album", "genre": "Genre", "artist": "Artist"}
+
+
+class CatalogColumns:
+    """The tracks and albums of a catalog as NumPy arrays.
+
+    Tracks, albums, genres and artists are numbered from 0 in the order of
+    their IRIs, so ids are stable for the same catalog; `iris[kind]` maps ids
+    back to IRIs. Lengths and years are `MISSING` when unknown.
+
+    Album tracks, track genres and track artists are stored CSR-style: the
+    ids related to row `i` are `ids[offsets[i]:offsets[i + 1]]`.
+    """
+
+    def __init__(self, iris: Dict[str, List[str]], track_length: np.ndarray, album_year: np.ndarray,
+                 album_track_offsets: np.ndarray, album_track_ids: np.ndarray,
+                 track_genre_offsets: np.ndarray, track_genre_ids: np.ndarray,
+                 track_artist_offsets: np.ndarray, track_artist_ids: np.ndarray):
+        self.iris = iris
+        self.track_length = track_length
+        self.album_year = album_year
+        self.album_track_offsets = album_track_offsets
+        self.album_track_ids = album_track_ids
+        self.track_genre_offsets = track_genre_offsets
+        self.track_genre_ids = track_genre_ids
+        self.track_artist_offsets = track_artist_offsets
+        self.track_artist_ids = track_artist_ids
+        self._ids = {kind: {iri: i for i, iri in enumerate(iris[kind])} for kind in KINDS}
+
+    def id_of(self, kind: str, iri: str) -> int:
+        """Return the id of the IRI among the individuals of a kind (e.g. "track")."""
+        return self._ids[kind][iri]
+
+    def iri_of(self, kind: str, id: int) -> str:
+        return self.iris[kind][id]
+
+    # Aggregates
+
+    def album_durations(self) -> np.ndarray:
+        """Return the total length of the tracks of every album, ignoring missing lengths."""
+
+        lengths = np.maximum(self.track_length[self.album_track_ids], 0)
+        return np.bincount(
+            _rows(self.album_track_offsets), weights=lengths, minlength=len(self.iris["album"])
+        ).astype(np.int64)
+
+    def mean_length_by_genre(self) -> np.ndarray:
+        """Return the average track length of every genre, NaN for genres without lengths."""
+
+        tracks = _rows(self.track_genre_offsets)
+        lengths = self.track_length[tracks]
+        known = lengths != MISSING
+        genres = self.track_genre_ids[known]
+        size = len(self.iris["genre"])
+        totals = np.bincount(genres, weights=lengths[known], minlength=size)
+        counts = np.bincount(genres, minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return totals / counts
+
+    def albums_per_year(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the known years and the number of albums released in each."""
+        return np.unique(self.album_year[self.album_year != MISSING], return_counts=True)
+
+    def tracks_per_year(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the known years and the number of album tracks released in each."""
+
+        years = self.album_year[_rows(self.album_track_offsets)]
+        return np.unique(years[years != MISSING], return_counts=True)
+
+    def tracks_per_artist(self) -> np.ndarray:
+        return np.bincount(self.track_artist_ids, minlength=len(self.iris["artist"]))
+
+    # Persistence
+
+    def save(self, file):
+        """Save the arrays in NumPy's `.npz` format."""
+
+        np.savez_compressed(
+            file,
+            **{f"{kind}_iris": np.array(self.iris[kind], dtype=str) for kind in KINDS},
+            **{name: getattr(self, name) for name in _ARRAYS},
+        )
+
+    @classmethod
+    def load(cls, file) -> "CatalogColumns":
+        with np.load(file) as arrays:
+            return cls(
+                {kind: arrays[f"{kind}_iris"].tolist() for kind in KINDS},
+                *(arrays[name] for name in _ARRAYS),
+            )
+
+
+_ARRAYS = (
+    "track_length", "album_year",
+    "album_track_offsets", "album_track_ids",
+    "track_genre_offsets", "track_genre_ids",
+    "track_artist_offsets", "track_artist_ids",
+)
+
+
+def export(onto: owl.Ontology) -> CatalogColumns:
+    """Export the tracks and albums of the ontology's world with a few queries."""
+
+    world = onto.world
+    db = world.graph.db
+    p = {name: onto[name].storid for name in (
+        "has_length_in_milliseconds", "has_year", "has_track", "appears_in_album",
+        "has_genre", "has_track_artist",
+    )}
+
+    storids: Dict[str, List[int]] = {}
+    iris: Dict[str, List[str]] = {}
+    for kind, name in _CLASSES.items():
+        classes = ",".join(str(Class.storid) for Class in onto[name].descendants())
+        rows = db.execute(
+            f"""SELECT DISTINCT q.s, r.iri FROM objs q JOIN resources r ON r.storid=q.s
+                WHERE q.p=? AND q.o IN ({classes}) ORDER BY r.iri""", (rdf_type,)).fetchall()
+        storids[kind] = [s for s, _ in rows]
+        iris[kind] = [iri for _, iri in rows]
+    ids = {kind: {s: i for i, s in enumerate(storids[kind])} for kind in KINDS}
+
+    def values(name: str, kind: str) -> np.ndarray:
+        column = np.full(len(storids[kind]), MISSING, dtype=np.int64)
+        for s, o in db.execute("SELECT s, o FROM datas WHERE p=?", (p[name],)):
+            i = ids[kind].get(s)
+            if i is not None:
+                column[i] = o
+        return column
+
+    def pairs(sql: str, parameters: tuple, rows: str, columns: str) -> Tuple[np.ndarray, np.ndarray]:
+        related = {
+            (ids[rows][s], ids[columns][o]) for s, o in db.execute(sql, parameters)
+            if s in ids[rows] and o in ids[columns]
+        }
+        return _csr(related, len(storids[rows]))
+
+    return CatalogColumns(
+        iris,
+        values("has_length_in_milliseconds", "track"),
+        values("has_year", "album"),
+        *pairs("SELECT s, o FROM objs WHERE p=? UNION SELECT o, s FROM objs WHERE p=?",
+               (p["has_track"], p["appears_in_album"]), "album", "track"),
+        *pairs("SELECT s, o FROM objs WHERE p=?", (p["has_genre"],), "track", "genre"),
+        *pairs("SELECT s, o FROM objs WHERE p=?", (p["has_track_artist"],), "track", "artist"),
+    )
+
+
+def _csr(pairs: Iterable[Tuple[int, int]], size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the offsets and ids of (row, id) pairs sorted by row then id."""
+
+    pairs = np.array(sorted(pairs), dtype=np.int64).reshape(-1, 2)
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(pairs[:, 0], minlength=size), out=offsets[1:])
+    return offsets, pairs[:, 1].copy()
+
+
+def _rows(offsets: np.ndarray) -> np.ndarray:
+    """Return the row of every id of a CSR-style relation."""
+    return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
@@ -0,0 +1,24 @@
+"""Convert an existing RDF/XML ontology file into an on-disk quadstore."""
+
+import argparse
+
+from music_ontology.ontology import MusicOntologyProvider
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("source", nargs="?", default="ontology.owl",
+                        help="the RDF/XML ontology file to convert")
+    parser.add_argument("quadstore", nargs="?", default="ontology.sqlite3",
+                        help="the SQLite quadstore to write")
+    parser.add_argument("--base-iri", default="file://ontology.owl",
+                        help="the base IRI of the ontology")
+    args = parser.parse_args()
+
+    provider = MusicOntologyProvider(args.base_iri, quadstore=args.quadstore)
+    provider.convert(args.source)
+    provider.world.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Secondary indexes over the music catalog and a query API using them."""
+
+import bisect
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import owlready2 as owl
+from owlready2.base import rdf_type, owl_named_individual
+
+from music_ontology.changes import Change, ChangeTracker
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a name for keyed lookups: no accents, case, punctuation or extra spaces."""
+
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(char for char in name if not unicodedata.combining(char))
+    name = re.sub(r"[^\w\s]", " ", name.casefold())
+    return " ".join(name.split())
+
+
+class _Multimap:
+    """A key to storids map which remembers the keys of every storid."""
+
+    def __init__(self):
+        self.by_key: Dict[object, Set[int]] = {}
+        self.by_storid: Dict[int, Set[object]] = {}
+
+    def set(self, storid: int, keys: Iterable[object]):
+        for key in self.by_storid.pop(storid, ()):
+            storids = self.by_key[key]
+            storids.discard(storid)
+            if not storids:
+                del self.by_key[key]
+        keys = set(keys)
+        if keys:
+            self.by_storid[storid] = keys
+            for key in keys:
+                self.by_key.setdefault(key, set()).add(storid)
+
+    def get(self, key: object) -> Set[int]:
+        return self.by_key.get(key, set())
+
+
+class _SortedIndex:
+    """A storid to number map sorted by number for range lookups."""
+
+    def __init__(self):
+        self.entries: List[Tuple[int, int]] = []
+        self.values: Dict[int, int] = {}
+
+    def set(self, storid: int, value: Optional[int]):
+        old = self.values.pop(storid, None)
+        if old is not None:
+            del self.entries[bisect.bisect_left(self.entries, (old, storid))]
+        if value is not None:
+            self.values[storid] = value
+            bisect.insort(self.entries, (value, storid))
+
+    def range(self, low: Optional[int] = None, high: Optional[int] = None) -> List[int]:
+        """Return the storids whose value is within `[low, high]`, sorted by value."""
+
+        start = 0 if low is None else bisect.bisect_left(self.entries, (low, -1))
+        end = len(self.entries) if high is None else bisect.bisect_right(self.entries, (high, float("inf")))
+        return [storid for _, storid in self.entries[start:end]]
+
+
+class CatalogIndex:
+    """Maintained indexes for the common catalog lookups.
+
+    Tracks are indexed by `genres`, `artists` and `length_in_milliseconds`,
+    albums by `year` and `artist`, and every individual by its normalized
+    name. The indexes are built with one query per property and then kept up
+    to date through a `ChangeTracker` on the ontology, re-reading the changed
+    property values of the changed individuals only.
+    """
+
+    def __init__(self, onto: owl.Ontology):
+        self.onto = onto
+        self.world = onto.world
+        self._db = self.world.graph.db
+
+        self._p = {
+            name: onto[name].storid
+            for name in (
+                "has_genre", "has_track_artist", "has_length_in_milliseconds",
+                "has_year", "has_album_artist", "has_album_in_discography",
+            )
+        }
+        self._genres = _Multimap()
+        self._artists = _Multimap()
+        self._album_artists = _Multimap()
+        self._names = _Multimap()
+        self._lengths = _SortedIndex()
+        self._years = _SortedIndex()
+
+        self._multimaps = {
+            self._p["has_genre"]: self._genres,
+            self._p["has_track_artist"]: self._artists,
+            self._p["has_album_artist"]: self._album_artists,
+        }
+        self._sorted = {
+            self._p["has_length_in_milliseconds"]: self._lengths,
+            self._p["has_year"]: self._years,
+        }
+
+        self.rebuild()
+        self.tracker = ChangeTracker(onto).start()
+        self.tracker.listeners.append(self._on_changes)
+
+    def rebuild(self):
+        """Build all the indexes from scratch."""
+
+        for p, multimap in self._multimaps.items():
+            values: Dict[int, Set[int]] = {}
+            for s, o in self._db.execute("SELECT s, o FROM objs WHERE p=?", (p,)):
+                values.setdefault(s, set()).add(o)
+            if p == self._p["has_album_artist"]:
+                for artist, album in self._db.execute(
+                        "SELECT s, o FROM objs WHERE p=?", (self._p["has_album_in_discography"],)):
+                    values.setdefault(album, set()).add(artist)
+            for s, keys in values.items():
+                multimap.set(s, keys)
+
+        for p, index in self._sorted.items():
+            for s, o in self._db.execute("SELECT s, o FROM datas WHERE p=?", (p,)):
+                index.set(s, o)
+
+        for (s,) in self._db.execute(
+                "SELECT DISTINCT s FROM objs WHERE p=? AND o=?", (rdf_type, owl_named_individual)):
+            self._index_name(s)
+
+    def close(self):
+        """Stop maintaining the indexes."""
+        self.tracker.stop()
+
+    # Lookups
+
+    def find(self, name: str) -> List[owl.Thing]:
+        """Return the individuals whose name matches `name` once normalized."""
+        return self._entities(self._names.get(normalize_name(name)))
+
+    def tracks_by_genre(self, genre: owl.Thing) -> List[owl.Thing]:
+        return self._entities(self._genres.get(genre.storid))
+
+    def tracks_by_artist(self, artist: owl.Thing) -> List[owl.Thing]:
+        return self._entities(self._artists.get(artist.storid))
+
+    def discography(self, artist: owl.Thing) -> List[owl.Thing]:
+        """Return the albums of an album artist, sorted by year."""
+
+        albums = self._entities(self._album_artists.get(artist.storid))
+        return sorted(albums, key=lambda album: (self._years.values.get(album.storid, 0), album.name))
+
+    def albums_in_years(self, first: Optional[int] = None, last: Optional[int] = None) -> List[owl.Thing]:
+        """Return the albums released from year `first` to year `last`, sorted by year."""
+        return self._entities(self._years.range(first, last), sort=False)
+
+    def tracks_longer_than(self, milliseconds: int) -> List[owl.Thing]:
+        """Return the tracks longer than the given length, shortest first."""
+        return self._entities(self._lengths.range(milliseconds + 1), sort=False)
+
+    def tracks_in_length_range(self, shortest: Optional[int] = None,
+                               longest: Optional[int] = None) -> List[owl.Thing]:
+        return self._entities(self._lengths.range(shortest, longest), sort=False)
+
+    # Maintenance
+
+    def _on_changes(self, changes: List[Change]):
+        reindexed = set()
+        for s, p, o in changes:
+            # Inverse triples reindex their object, the album
+            key = (s, p, o) if p == self._p["has_album_in_discography"] else (s, p)
+            if s is None or key in reindexed:
+                continue
+            reindexed.add(key)
+            if p == self._p["has_album_in_discography"]:
+                if o is not None:
+                    self._reindex_album_artist(o)
+                else:
+                    self._reindex_discography(s)
+            elif p == self._p["has_album_artist"]:
+                self._reindex_album_artist(s)
+            elif p in self._multimaps:
+                self._multimaps[p].set(s, (o for (o,) in self._db.execute(
+                    "SELECT o FROM objs WHERE s=? AND p=?", (s, p))))
+            elif p in self._sorted:
+                row = self._db.execute(
+                    "SELECT o FROM datas WHERE s=? AND p=? LIMIT 1", (s, p)).fetchone()
+                self._sorted[p].set(s, row and row[0])
+            elif p == rdf_type or p is None:
+                self._index_name(s)
+
+    def _reindex_album_artist(self, album: int):
+        self._album_artists.set(album, (a for (a,) in self._db.execute(
+            """SELECT o FROM objs WHERE s=? AND p=?
+               UNION SELECT s FROM objs WHERE o=? AND p=?""",
+            (album, self._p["has_album_artist"], album, self._p["has_album_in_discography"]))))
+
+    def _reindex_discography(self, artist: int):
+        albums = {album for album, artists in self._album_artists.by_storid.items() if artist in artists}
+        albums.update(album for (album,) in self._db.execute(
+            "SELECT o FROM objs WHERE s=? AND p=?", (artist, self._p["has_album_in_discography"])))
+        for album in albums:
+            self._reindex_album_artist(album)
+
+    def _index_name(self, storid: int):
+        row = self._db.execute("SELECT iri FROM resources WHERE storid=?", (storid,)).fetchone()
+        if row is None or not self._db.execute(
+                "SELECT 1 FROM objs WHERE s=? AND p=? LIMIT 1", (storid, rdf_type)).fetchone():
+            self._names.set(storid, ())
+            return
+        iri = row[0]
+        name = iri[len(self.onto.base_iri):] if iri.startswith(self.onto.base_iri) else iri.rsplit("#", 1)[-1]
+        self._names.set(storid, [normalize_name(name)])
+
+    def _entities(self, storids: Iterable[int], sort: bool = True) -> List[owl.Thing]:
+        entities = [self.world._get_by_storid(storid) for storid in storids]
+        entities = [entity for entity in entities if entity is not None]
+        if sort:
+            entities.sort(key=lambda entity: entity.name)
+        return entities
@@ -0,0 +1,262 @@
+"""Streaming bulk ingestion of catalog dumps into the music ontology."""
+
+import csv
+import json
+import warnings
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+import owlready2 as owl
+from owlready2.base import rdf_type, owl_named_individual, to_literal
+
+from music_ontology.changes import notify
+from music_ontology.resolution import EntityResolver
+
+LIST_SEPARATOR = "|"
+"""Separator of multi-valued fields (e.g. `artists`, `genres`) in CSV dumps."""
+
+INTEGER_FIELDS = ("length_in_milliseconds", "year")
+LIST_FIELDS = ("artists", "genres", "lyrics_written_by", "members")
+TRACK_FIELDS = (
+    "type", "name", "artists", "genres", "length_in_milliseconds", "album", "album_type", "album_artist",
+    "year", "lyrics", "lyrics_written_by",
+)
+ENSEMBLE_FIELDS = ("type", "name", "members")
+SOLO_ARTIST_FIELDS = ("type", "name")
+ALBUM_TYPES = {"album": "Album", "ep": "EP", "single": "Single", "compilation": "Compilation"}
+"""The classes of albums by `album_type` value."""
+
+
+class CatalogIngestor:
+    """Writes catalog records into the music ontology in batched transactions.
+
+    A record is a dict describing a track (the default) or, when its `type`
+    is `"ensemble"`, a musical ensemble and its `members`, or, when it is
+    `"solo_artist"`, a solo artist. Track records are keyed by `name` and may
+    carry `artists`, `genres`, `length_in_milliseconds`, `album`,
+    `album_type` (a key of `ALBUM_TYPES`, `"album"` by default),
+    `album_artist`, `year`, `lyrics` (the lyrics text) and
+    `lyrics_written_by`. Other fields are ignored with a warning.
+
+    Records are turned into raw triples and written to the quadstore with one
+    `executemany` per batch instead of going through the per-attribute
+    owlready2 setters.
+
+    If a `resolver` is given, the names of the artists, genres and albums are
+    resolved to the matching individuals already known (see
+    `music_ontology.resolution.EntityResolver`), so that e.g. "rush" is not
+    ingested as a new ensemble, and similar names are listed for review or,
+    with `auto_merge`, resolved too.
+    """
+
+    def __init__(self, onto: owl.Ontology, batch_size: int = 10000,
+                 resolver: Optional[EntityResolver] = None):
+        self.onto = onto
+        self.batch_size = batch_size
+        self.resolver = resolver
+        self._world = onto.world
+        self._db = onto.world.graph.db
+        self._c = onto.graph.c
+        self._typed: Set[int] = set()
+
+        self._class = {
+            name: onto[name].storid
+            for name in (
+                "Track", "Artist", "SoloArtist", "MusicalEnsemble",
+                "Album", "EP", "Single", "Compilation", "Genre", "Lyrics",
+            )
+        }
+        self._property = {
+            prop.python_name: prop.storid
+            for prop in onto.properties()
+        }
+        self._python_names = list(self._property)
+
+    def ingest_csv(self, file: TextIO) -> int:
+        """Ingest a CSV dump with a header row and return the record count."""
+        return self.ingest(iter_records(file, "csv"))
+
+    def ingest_jsonl(self, file: TextIO) -> int:
+        """Ingest a JSON Lines dump and return the record count."""
+        return self.ingest(iter_records(file, "jsonl"))
+
+    def ingest(self, records: Iterable[dict]) -> int:
+        """Ingest the given records batch by batch and return their count."""
+
+        count = 0
+        records = iter(records)
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                return count
+            self._write_batch(batch)
+            count += len(batch)
+
+    def _write_batch(self, batch: List[dict]):
+        triples = _BatchTriples(self)
+        for record in batch:
+            if record.get("type") == "ensemble":
+                triples.add_ensemble(record)
+            elif record.get("type") == "solo_artist":
+                triples.add_solo_artist(record)
+            else:
+                triples.add_track(record)
+
+        c = self._c
+        with self.onto:
+            self._db.executemany(
+                "DELETE FROM objs WHERE c=? AND s=? AND p=?",
+                ((c, s, p) for s, p in triples.functional_objs),
+            )
+            self._db.executemany(
+                "DELETE FROM datas WHERE c=? AND s=? AND p=?",
+                ((c, s, p) for s, p in triples.datas),
+            )
+            self._db.executemany(
+                "INSERT INTO objs SELECT ?,?,?,? WHERE NOT EXISTS "
+                "(SELECT 1 FROM objs WHERE s=? AND p=? AND o=?)",
+                ((c, s, p, o, s, p, o) for s, p, o in triples.objs),
+            )
+            self._db.executemany(
+                "INSERT INTO objs VALUES (?,?,?,?)",
+                ((c, s, p, o) for (s, p), o in triples.functional_objs.items()),
+            )
+            self._db.executemany(
+                "INSERT INTO datas VALUES (?,?,?,?,?)",
+                ((c, s, p, o, d) for (s, p), (o, d) in triples.datas.items()),
+            )
+        self._world.graph.commit()
+        self._refresh_live_entities(triples.touched)
+        notify(self.onto, chain(
+            triples.objs,
+            ((s, p, o) for (s, p), o in triples.functional_objs.items()),
+            ((s, p, None) for s, p in triples.datas),
+        ))
+
+    def _refresh_live_entities(self, storids: Set[int]):
+        """Drop the cached property values of already loaded entities."""
+
+        entities = self._world._entities
+        for storid in storids:
+            entity = entities.get(storid)
+            if entity is None:
+                continue
+            for name in self._python_names:
+                entity.__dict__.pop(name, None)
+
+
+class _BatchTriples:
+    """The raw triples produced by a single batch of records."""
+
+    def __init__(self, ingestor: CatalogIngestor):
+        self._ingestor = ingestor
+        self._property = ingestor._property
+        self.objs: Dict[Tuple[int, int, int], None] = {}
+        self.datas: Dict[Tuple[int, int], Tuple[object, int]] = {}
+        self.functional_objs: Dict[Tuple[int, int], int] = {}
+        self.touched: Set[int] = set()
+
+    def add_track(self, record: dict):
+        _check_fields(record, TRACK_FIELDS)
+        name = record["name"]
+        track = self._individual(name, "Track", True)
+
+        for artist in record.get("artists") or ():
+            self._obj(track, "artists", self._individual(artist, "Artist"))
+        for genre in record.get("genres") or ():
+            self._obj(track, "genres", self._individual(genre, "Genre", True))
+        if record.get("length_in_milliseconds") is not None:
+            self._data(track, "length_in_milliseconds", record["length_in_milliseconds"])
+
+        if record.get("album"):
+            album_type = record.get("album_type") or "album"
+            if album_type not in ALBUM_TYPES:
+                raise ValueError(f"Unsupported album type: {album_type}")
+            album = self._individual(record["album"], ALBUM_TYPES[album_type], True)
+            self._obj(album, "tracks", track)
+            if record.get("album_artist"):
+                artist = self._individual(record["album_artist"], "Artist")
+                self._obj(album, "artist", artist, functional=True)
+            if record.get("year") is not None:
+                self._data(album, "year", record["year"])
+
+        if record.get("lyrics"):
+            lyrics = self._individual(f"'{name}' Lyrics", "Lyrics", True)
+            self._obj(track, "lyrics", lyrics, functional=True)
+            self._data(lyrics, "text", record["lyrics"])
+            for writer in record.get("lyrics_written_by") or ():
+                self._obj(lyrics, "written_by", self._individual(writer, "Artist"))
+
+    def add_ensemble(self, record: dict):
+        _check_fields(record, ENSEMBLE_FIELDS)
+        ensemble = self._individual(record["name"], "MusicalEnsemble", True)
+        for member in record.get("members") or ():
+            self._obj(ensemble, "members", self._individual(member, "Artist"))
+
+    def add_solo_artist(self, record: dict):
+        _check_fields(record, SOLO_ARTIST_FIELDS)
+        self._individual(record["name"], "SoloArtist", True)
+
+    def _individual(self, name: str, class_name: str, always_typed: bool = False) -> int:
+        """Return the storid of the named individual, typing it if needed.
+
+        Individuals which are only referenced (e.g. the artists of a track)
+        are typed only if they have no type yet, so that a `MusicalEnsemble`
+        does not get an extra `Artist` type assertion.
+        """
+
+        ingestor = self._ingestor
+        if ingestor.resolver is not None:
+            name = ingestor.resolver.resolve(name, class_name)
+        storid = ingestor._world._abbreviate(ingestor.onto.base_iri + name)
+        self.touched.add(storid)
+
+        if always_typed or storid not in ingestor._typed:
+            if always_typed or not ingestor._world._has_obj_triple_spo(storid, rdf_type):
+                self.objs[storid, rdf_type, owl_named_individual] = None
+                self.objs[storid, rdf_type, ingestor._class[class_name]] = None
+            ingestor._typed.add(storid)
+
+        return storid
+
+    def _obj(self, s: int, python_name: str, o: int, functional: bool = False):
+        p = self._property[python_name]
+        if functional:
+            self.functional_objs[s, p] = o
+        else:
+            self.objs[s, p, o] = None
+
+    def _data(self, s: int, python_name: str, value):
+        self.datas[s, self._property[python_name]] = to_literal(value)
+
+
+def _check_fields(record: dict, fields: Tuple[str, ...]):
+    unknown = sorted(set(record) - set(fields))
+    if unknown:
+        warnings.warn(f"Ignoring unknown catalog record fields: {', '.join(unknown)}")
+
+
+def _parse_csv_row(row: Dict[str, str]) -> dict:
+    """Convert a CSV row of strings to a catalog record."""
+
+    record = {}
+    for key, value in row.items():
+        if value is None or value == "":
+            continue
+        if key in LIST_FIELDS:
+            record[key] = [v.strip() for v in value.split(LIST_SEPARATOR) if v.strip()]
+        elif key in INTEGER_FIELDS:
+            record[key] = int(value)
+        else:
+            record[key] = value
+    return record
+
+
+def iter_records(file: TextIO, format: str) -> Iterator[dict]:
+    """Iterate over the records of a `csv` or `jsonl` catalog dump."""
+
+    if format == "csv":
+        return (_parse_csv_row(row) for row in csv.DictReader(file))
+    if format == "jsonl":
+        return (json.loads(line) for line in file if line.strip())
+    raise ValueError(f"Unsupported catalog format: {format}")
@@ -0,0 +1,228 @@
+"""Timing and size instrumentation of the ontology operations."""
+
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+import owlready2 as owl
+from owlready2.base import rdf_type, owl_named_individual
+
+Event = dict
+"""A measured operation or phase.
+
+Every event has `event` ("operation" or "phase"), `operation`, `phase` (None
+for operations), `seconds` and `peak_rss_kb`. Operation events also have the
+`triples` of the ontology and its `individuals` per class name.
+"""
+
+Sink = Callable[[Event], None]
+
+_current: "contextvars.ContextVar[Optional[Tuple[Instrumentation, str]]]" = \
+    contextvars.ContextVar("music_ontology_instrumentation", default=None)
+
+
+def peak_rss() -> int:
+    """Return the peak resident set size of this process in kilobytes, or 0 where unknown (Windows)."""
+
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Measure a phase of the current instrumented operation, if any.
+
+    Lower layers (the classifier, the reasoner workers...) mark their phases
+    with this, at no cost when no operation is instrumented.
+    """
+
+    current = _current.get()
+    if current is None:
+        yield
+        return
+    instrumentation, operation = current
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        instrumentation.emit({
+            "event": "phase", "operation": operation, "phase": name,
+            "seconds": time.perf_counter() - start, "peak_rss_kb": peak_rss(),
+        })
+
+
+class Instrumentation:
+    """Measures operations on an ontology and their phases and sends them to sinks.
+
+    A sink is any callable taking an event dict, called as each phase and
+    operation ends; `JsonLogSink`, `MetricsRegistry` and `PrometheusSink` are
+    provided. Without sinks nothing is measured.
+    """
+
+    def __init__(self, sinks: Optional[List[Sink]] = None):
+        self.sinks: List[Sink] = list(sinks or [])
+
+    @contextmanager
+    def operation(self, name: str, onto: Optional[owl.Ontology] = None) -> Iterator[None]:
+        """Measure an operation, and the sizes of `onto` once it is done."""
+
+        if not self.sinks:
+            yield
+            return
+        token = _current.set((self, name))
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            _current.reset(token)
+            event = {
+                "event": "operation", "operation": name, "phase": None,
+                "seconds": time.perf_counter() - start, "peak_rss_kb": peak_rss(),
+            }
+            if onto is not None:
+                event["triples"] = count_triples(onto)
+                event["individuals"] = count_individuals(onto)
+            self.emit(event)
+
+    def emit(self, event: Event):
+        for sink in self.sinks:
+            sink(event)
+
+
+def count_triples(onto: owl.Ontology) -> int:
+    """Return the number of object and data triples of the ontology."""
+
+    db = onto.world.graph.db
+    c = onto.graph.c
+    return (db.execute("SELECT COUNT(*) FROM objs WHERE c=?", (c,)).fetchone()[0]
+            + db.execute("SELECT COUNT(*) FROM datas WHERE c=?", (c,)).fetchone()[0])
+
+
+def count_individuals(onto: owl.Ontology) -> Dict[str, int]:
+    """Return the number of individuals of each class of the ontology, asserted or inferred."""
+
+    counts = onto.world.graph.db.execute(
+        """SELECT r.iri, COUNT(DISTINCT q.s) FROM objs q JOIN resources r ON r.storid=q.o
+           WHERE q.p=? AND q.o!=? AND substr(r.iri, 1, length(?))=?
+             AND q.s IN (SELECT s FROM objs WHERE c=? AND p=? AND o=?)
+           GROUP BY r.iri""",
+        (rdf_type, owl_named_individual, onto.base_iri, onto.base_iri,
+         onto.graph.c, rdf_type, owl_named_individual))
+    return {iri[len(onto.base_iri):]: count for iri, count in counts}
+
+
+class JsonLogSink:
+    """Writes every event as a line of JSON to a stream, or to a logger at INFO level."""
+
+    def __init__(self, stream: Optional[TextIO] = None, logger: Optional[logging.Logger] = None):
+        self.stream = stream
+        self.logger = logger or (None if stream else logging.getLogger("music_ontology"))
+
+    def __call__(self, event: Event):
+        line = json.dumps({"time": time.time(), **event})
+        if self.stream is not None:
+            self.stream.write(line + "\n")
+        if self.logger is not None:
+            self.logger.info(line)
+
+
+class MetricsRegistry:
+    """Aggregates the events in-process: durations per operation and phase, and the last sizes."""
+
+    def __init__(self):
+        self.durations: Dict[Tuple[str, Optional[str]], List[float]] = {}
+        self.peak_rss_kb = 0
+        self.triples: Dict[str, int] = {}
+        self.individuals: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Event):
+        with self._lock:
+            key = (event["operation"], event["phase"])
+            count, total, maximum = self.durations.get(key, (0, 0.0, 0.0))
+            self.durations[key] = [count + 1, total + event["seconds"], max(maximum, event["seconds"])]
+            self.peak_rss_kb = max(self.peak_rss_kb, event["peak_rss_kb"])
+            if "triples" in event:
+                self.triples[event["operation"]] = event["triples"]
+                self.individuals = dict(event["individuals"])
+
+    def count(self, operation: str, phase: Optional[str] = None) -> int:
+        return self.durations.get((operation, phase), (0, 0.0, 0.0))[0]
+
+    def total_seconds(self, operation: str, phase: Optional[str] = None) -> float:
+        return self.durations.get((operation, phase), (0, 0.0, 0.0))[1]
+
+    def prometheus(self) -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+
+        lines = [
+            "# HELP music_ontology_seconds Wall time of the ontology operations and their phases.",
+            "# TYPE music_ontology_seconds summary",
+        ]
+        with self._lock:
+            for (operation, phase_name), (count, total, _) in sorted(
+                    self.durations.items(), key=lambda item: (item[0][0], item[0][1] or "")):
+                labels = _labels(operation=operation, phase=phase_name or "")
+                lines.append(f"music_ontology_seconds_sum{labels} {total:.6f}")
+                lines.append(f"music_ontology_seconds_count{labels} {count}")
+            lines += [
+                "# HELP music_ontology_seconds_max Longest wall time of the operations and their phases.",
+                "# TYPE music_ontology_seconds_max gauge",
+            ]
+            for (operation, phase_name), (_, _, maximum) in sorted(
+                    self.durations.items(), key=lambda item: (item[0][0], item[0][1] or "")):
+                lines.append(f"music_ontology_seconds_max{_labels(operation=operation, phase=phase_name or '')} "
+                             f"{maximum:.6f}")
+            lines += [
+                "# HELP music_ontology_peak_rss_bytes Peak resident set size of the process.",
+                "# TYPE music_ontology_peak_rss_bytes gauge",
+                f"music_ontology_peak_rss_bytes {self.peak_rss_kb * 1024}",
+                "# HELP music_ontology_triples Triples of the ontology after the last operation.",
+                "# TYPE music_ontology_triples gauge",
+            ]
+            lines += [f"music_ontology_triples{_labels(operation=operation)} {count}"
+                      for operation, count in sorted(self.triples.items())]
+            lines += [
+                "# HELP music_ontology_individuals Individuals per class after the last operation.",
+                "# TYPE music_ontology_individuals gauge",
+            ]
+            lines += [f"music_ontology_individuals{_labels(**{'class': name})} {count}"
+                      for name, count in sorted(self.individuals.items())]
+        return "\n".join(lines) + "\n"
+
+
+class PrometheusSink:
+    """Dumps a registry in the Prometheus text format to a file after every operation.
+
+    The file can be exposed with the node exporter's textfile collector. A
+    given `registry` is expected to be a sink of its own and is only dumped.
+    """
+
+    def __init__(self, filename: str, registry: Optional[MetricsRegistry] = None):
+        self.filename = filename
+        self.registry = registry or MetricsRegistry()
+        self._owns_registry = registry is None
+
+    def __call__(self, event: Event):
+        if self._owns_registry:
+            self.registry(event)
+        if event["event"] == "operation":
+            with open(self.filename + ".tmp", "w", encoding="utf8") as file:
+                file.write(self.registry.prometheus())
+            os.replace(self.filename + ".tmp", self.filename)
+
+
+def _labels(**labels: str) -> str:
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels.items()) + "}"
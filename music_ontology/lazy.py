@@ -0,0 +1,110 @@
+"""Lazy loading of individuals with a bounded number of live entity objects."""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+import owlready2 as owl
+import owlready2.namespace as owl_namespace
+
+DEFAULT_MAX_LIVE_INDIVIDUALS = 1024
+
+_buffer_lock = threading.Lock()
+_buffer_bounds: List[int] = []
+"""The `max_size` of every open cache, bounding owlready2's process-global buffer together."""
+_buffer_size = 0
+"""The size of owlready2's buffer before the first open cache bounded it."""
+
+
+class LiveEntityCache:
+    """Keeps the most recently used individuals of a world alive, and only them.
+
+    owlready2 already creates the Python object of an individual the first
+    time it is accessed (by IRI, by label search, through a property value or
+    by storid, as `music_ontology.index` does), but keeps every created entity
+    alive in a global ring buffer of 65536 entries. This cache bounds that
+    buffer and instead keeps strong references to the `max_size` most
+    recently accessed individuals of the world, so that the others can be
+    garbage collected and are reloaded from the quadstore on their next access.
+
+    The schema (classes and properties) is pinned with `pin_schema()`. Since
+    owlready2's buffer is shared by the whole process, it is bounded by the
+    smallest `max_size` of the open caches, and restored when the last one is
+    closed, in whatever order they are.
+    """
+
+    def __init__(self, world: owl.World, max_size: int = DEFAULT_MAX_LIVE_INDIVIDUALS):
+        self.world = world
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.schema: List[owl.EntityClass] = []
+        self._live: "OrderedDict[int, owl.Thing]" = OrderedDict()
+        self._original: Optional[Callable] = world._get_by_storid
+        _bound_creation_buffer(max_size)
+        world._get_by_storid = self._get_by_storid
+
+    def pin_schema(self, onto: owl.Ontology):
+        """Materialize the classes and properties of the ontology and keep them alive."""
+
+        self.schema.extend(onto.classes())
+        self.schema.extend(onto.properties())
+        for Class in list(self.schema):
+            Class.is_a  # Loads the restrictions and equivalent classes
+        return self
+
+    def close(self):
+        """Stop bounding the live individuals."""
+
+        if self._original is not None:
+            self.world.__dict__.pop("_get_by_storid", None)
+            self._original = None
+            _unbound_creation_buffer(self.max_size)
+        self._live.clear()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def __contains__(self, storid: int) -> bool:
+        return storid in self._live
+
+    def _get_by_storid(self, storid, *args, **kwargs):
+        live = self._live.get(storid)
+        if live is not None and self.world._entities.get(storid) is live:  # Not destroyed
+            self.hits += 1
+            self._live.move_to_end(storid)
+            return live
+
+        entity = self._original(storid, *args, **kwargs)
+        if isinstance(entity, owl.Thing):
+            self.misses += 1
+            self._live.pop(storid, None)
+            self._live[storid] = entity
+            if len(self._live) > self.max_size:
+                self._live.popitem(last=False)
+        return entity
+
+
+def _bound_creation_buffer(max_size: int):
+    global _buffer_size
+
+    with _buffer_lock:
+        if not _buffer_bounds:
+            _buffer_size = len(owl_namespace._cache)
+        _buffer_bounds.append(max_size)
+        _resize_creation_buffer(min(min(_buffer_bounds), _buffer_size))
+
+
+def _unbound_creation_buffer(max_size: int):
+    with _buffer_lock:
+        _buffer_bounds.remove(max_size)
+        _resize_creation_buffer(min(_buffer_bounds, default=_buffer_size))
+
+
+def _resize_creation_buffer(size: int):
+    """Resize owlready2's buffer of recently created entities in place."""
+
+    size = max(size, 1)
+    if len(owl_namespace._cache) != size:
+        owl_namespace._cache.__init__([None] * size)
+        owl_namespace._cache_index = 0
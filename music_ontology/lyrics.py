@@ -0,0 +1,107 @@
+"""Ranked full-text search over the text of the lyrics."""
+
+import re
+from typing import List, NamedTuple, Optional
+
+import owlready2 as owl
+
+_TERM = re.compile(r'"([^"]*)"|(\S+)')
+_TOKEN = re.compile(r"\w+")
+
+
+class LyricsMatch(NamedTuple):
+    """A search result: the lyrics, their track, and the relevance and excerpt of the match."""
+
+    lyrics: owl.Thing
+    track: Optional[owl.Thing]
+    score: float
+    snippet: str
+
+
+class LyricsSearch:
+    """A full-text index of `Lyrics.text` with ranked search.
+
+    The index is the SQLite FTS5 table which owlready2 maintains for
+    full-text searchable properties, in the quadstore itself: triggers
+    update it on every written, changed or deleted text, including those of
+    the bulk ingestion, so it never needs rebuilding. Results are ranked by
+    BM25.
+    """
+
+    def __init__(self, onto: owl.Ontology):
+        self.onto = onto
+        self.world = onto.world
+        self._db = self.world.graph.db
+        text = onto.text
+        if text not in self.world.full_text_search_properties:
+            self.world.full_text_search_properties.append(text)
+        self._table = f"fts_{text.storid}"
+        self._has_lyrics = onto.has_lyrics.storid
+        self._are_of_track = onto.are_of_track.storid
+
+    def search(self, query: str, limit: int = 20) -> List[LyricsMatch]:
+        """Return the lyrics matching all the terms of the query, best first.
+
+        A term is a word, a prefix ending with `*` (e.g. `warr*`) or a
+        phrase between double quotes (e.g. `"mean stride"`). Punctuation is
+        ignored and matching is case-insensitive.
+        """
+
+        expression = fts_expression(query)
+        if not expression:
+            return []
+        rows = self._db.execute(
+            f"""SELECT s, -rank, snippet({self._table}, 1, '[', ']', '...', 12) FROM {self._table}
+                WHERE {self._table} MATCH ? ORDER BY rank LIMIT ?""",
+            (expression, limit)).fetchall()
+
+        matches = []
+        for s, score, snippet in rows:
+            lyrics = self.world._get_by_storid(s)
+            matches.append(LyricsMatch(lyrics, self._track(s), score, snippet))
+        return matches
+
+    def phrase(self, text: str, limit: int = 20) -> List[LyricsMatch]:
+        """Return the lyrics containing the words of `text` in this order."""
+        return self.search(f'"{text}"', limit)
+
+    def prefix(self, prefix: str, limit: int = 20) -> List[LyricsMatch]:
+        """Return the lyrics containing a word starting with `prefix`."""
+        return self.search(f"{prefix}*", limit)
+
+    def count(self, query: str) -> int:
+        """Return the number of lyrics matching the query."""
+
+        expression = fts_expression(query)
+        if not expression:
+            return 0
+        return self._db.execute(
+            f"SELECT COUNT(*) FROM {self._table} WHERE {self._table} MATCH ?", (expression,)
+        ).fetchone()[0]
+
+    def _track(self, lyrics: int) -> Optional[owl.Thing]:
+        row = self._db.execute(
+            "SELECT s FROM objs WHERE p=? AND o=? UNION SELECT o FROM objs WHERE s=? AND p=? LIMIT 1",
+            (self._has_lyrics, lyrics, lyrics, self._are_of_track)).fetchone()
+        return None if row is None else self.world._get_by_storid(row[0])
+
+
+def fts_expression(query: str) -> str:
+    """Translate a search query into an FTS5 expression, escaping its syntax."""
+
+    terms = []
+    for phrase, word in _TERM.findall(query):
+        if phrase:
+            tokens = _TOKEN.findall(phrase)
+            if tokens:
+                terms.append('"' + " ".join(tokens) + '"')
+            continue
+        tokens = _TOKEN.findall(word)
+        if not tokens:
+            continue
+        # Words joined by punctuation (e.g. "don't") are a phrase for the tokenizer
+        term = '"' + " ".join(tokens) + '"'
+        if word.endswith("*"):
+            term += " *"
+        terms.append(term)
+    return " ".join(terms)
@@ -0,0 +1,253 @@
+"""Streaming N-Triples and N-Quads serialization of the quadstore."""
+
+import gzip
+import re
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+import owlready2 as owl
+
+CHUNK_SIZE = 10000
+"""The number of triples read from the quadstore or the file at once."""
+
+_XSD = "http://www.w3.org/2001/XMLSchema#"
+_INTEGER_TYPES = {_XSD + name for name in (
+    "integer", "int", "long", "short", "byte", "nonNegativeInteger", "positiveInteger",
+    "nonPositiveInteger", "negativeInteger", "unsignedLong", "unsignedInt", "unsignedShort",
+    "unsignedByte",
+)}
+_REAL_TYPES = {_XSD + name for name in ("decimal", "double", "float")}
+
+_ESCAPES = {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t"}
+_UNESCAPES = {"t": "\t", "n": "\n", "r": "\r", "b": "\b", "f": "\f", '"': '"', "'": "'", "\\": "\\"}
+
+_IRI_UNSAFE = re.compile(r'[\x00-\x20<>"{}|^`\\]')
+_LITERAL_UNSAFE = re.compile(r'[\\"\n\r\t]')
+_ESCAPE = re.compile(r"\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))")
+
+_NUMBERED_BLANK = re.compile(r"_:b([0-9]+)$")
+"""The labels `write()` gives to blank nodes."""
+
+_IRI = r"<[^>]*>"
+_BLANK = r"_:[A-Za-z0-9_.-]+"
+_LITERAL = r'"(?:[^"\\]|\\.)*"(?:\^\^<[^>]*>|@[A-Za-z0-9-]+)?'
+LINE = re.compile(
+    rf"\s*({_IRI}|{_BLANK})\s+({_IRI})\s+({_IRI}|{_BLANK}|{_LITERAL})(?:\s+({_IRI}|{_BLANK}))?\s*\.\s*$")
+"""An N-Triples or N-Quads statement, with its subject, predicate, object and graph terms as groups."""
+
+
+class ParseError(ValueError):
+    """Raised on a malformed N-Triples or N-Quads line."""
+
+    def __init__(self, line_number: int, line: str):
+        super().__init__(f"Line {line_number}: cannot parse {line.strip()!r}")
+        self.line_number = line_number
+
+
+def open_text(filename: str, mode: str, compress: Optional[bool] = None) -> TextIO:
+    """Open a text file, gzipped if `compress` is true or if it ends with ".gz"."""
+
+    if compress is None:
+        compress = filename.endswith(".gz")
+    if compress:
+        return gzip.open(filename, mode + "t", encoding="utf8")
+    return open(filename, mode, encoding="utf8")
+
+
+def write(world: owl.World, file: TextIO, ontologies: Optional[List[owl.Ontology]] = None,
+          quads: bool = False, chunk_size: int = CHUNK_SIZE) -> int:
+    """Write the triples of the given ontologies (all of them by default) to a text file.
+
+    Triples are streamed from the quadstore `chunk_size` at a time, so that
+    memory use does not depend on the size of the ontologies. With `quads`,
+    every triple is followed by the IRI of its ontology (N-Quads). Returns the
+    number of written triples.
+    """
+
+    db = world.graph.db
+    if ontologies is None:
+        contexts = [c for (c,) in db.execute("SELECT c FROM ontologies WHERE iri!='http://anonymous/'")]
+    else:
+        contexts = [onto.graph.c for onto in ontologies]
+
+    count = 0
+    for c in contexts:
+        graph = " " + format_iri(_graph_iri(db, c)) if quads else ""
+        cursor = db.execute(
+            """SELECT q.s, rs.iri, rp.iri, q.o, ro.iri FROM objs q
+               LEFT JOIN resources rs ON rs.storid=q.s
+               JOIN resources rp ON rp.storid=q.p
+               LEFT JOIN resources ro ON ro.storid=q.o
+               WHERE q.c=?""", (c,))
+        for rows in _chunks(cursor, chunk_size):
+            file.write("".join(
+                f"{_node(s, s_iri)} {format_iri(p_iri)} {_node(o, o_iri)}{graph} .\n"
+                for s, s_iri, p_iri, o, o_iri in rows))
+            count += len(rows)
+
+        cursor = db.execute(
+            """SELECT q.s, rs.iri, rp.iri, q.o, q.d, rd.iri FROM datas q
+               LEFT JOIN resources rs ON rs.storid=q.s
+               JOIN resources rp ON rp.storid=q.p
+               LEFT JOIN resources rd ON rd.storid=q.d
+               WHERE q.c=?""", (c,))
+        for rows in _chunks(cursor, chunk_size):
+            file.write("".join(
+                f"{_node(s, s_iri)} {format_iri(p_iri)} {format_literal(o, d, d_iri)}{graph} .\n"
+                for s, s_iri, p_iri, o, d, d_iri in rows))
+            count += len(rows)
+    return count
+
+
+def read(onto: owl.Ontology, file: TextIO, batch_size: int = CHUNK_SIZE) -> int:
+    """Insert the triples of an N-Triples or N-Quads text file, `batch_size` at a time.
+
+    Triples without a graph, or all of them if the file is N-Triples, go into
+    `onto`; the others go into the ontology named by their graph IRI. Returns
+    the number of read triples.
+
+    Blank nodes labelled `_:b<number>`, as `write()` labels them, get a
+    storid computed from their number, so that reading them takes no memory
+    whatever the order of their triples. Other labels are remembered until
+    the end of the file: one entry per blank node.
+    """
+
+    world = onto.world
+    db = world.graph.db
+    blanks: Dict[str, int] = {}
+    contexts = {None: onto.graph.c}
+    count = 0
+
+    # Numbered blank nodes take the even numbers above the current blank node count,
+    # the others the odd ones, so that they never collide
+    (first,) = db.execute("SELECT current_blank FROM store").fetchone()
+    last = first
+
+    for batch in _chunks(_parse(file), batch_size):
+        storids: Dict[str, int] = {}  # Bounded to one batch
+
+        def abbreviate(iri: str) -> int:
+            storid = storids.get(iri)
+            if storid is None:
+                storid = storids[iri] = world._abbreviate(iri)
+            return storid
+
+        def node(term: str) -> int:
+            nonlocal last
+            if term.startswith("_:"):
+                match = _NUMBERED_BLANK.match(term)
+                if match is not None:
+                    blank = first + 2 * int(match.group(1))
+                else:
+                    storid = blanks.get(term)
+                    if storid is not None:
+                        return storid
+                    blank = first + 2 * len(blanks) + 1
+                    blanks[term] = -blank
+                last = max(last, blank)
+                return -blank
+            return abbreviate(term)
+
+        objs, datas = [], []
+        for s, p, o, graph in batch:
+            c = contexts.get(graph)
+            if c is None:
+                c = contexts[graph] = world.get_ontology(graph).graph.c
+            if isinstance(o, tuple):
+                value, datatype = o
+                if datatype is not None and not datatype.startswith("@"):
+                    datatype = abbreviate(datatype)
+                datas.append((c, node(s), abbreviate(p), value, datatype or 0))
+            else:
+                objs.append((c, node(s), abbreviate(p), node(o)))
+
+        db.executemany("INSERT OR IGNORE INTO objs VALUES (?,?,?,?)", objs)
+        db.executemany("INSERT OR IGNORE INTO datas VALUES (?,?,?,?,?)", datas)
+        db.execute("UPDATE store SET current_blank=?", (last,))
+        count += len(batch)
+
+    # As at the end of `Ontology.load()`, so that property names resolve
+    for c in contexts.values():
+        world.graph.context_2_user_context(c)._load_properties()
+    return count
+
+
+def _chunks(rows, size: int) -> Iterator[list]:
+    rows = iter(rows)
+    while True:
+        chunk = [row for _, row in zip(range(size), rows)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def _graph_iri(db, c: int) -> str:
+    iri = db.execute("SELECT iri FROM ontologies WHERE c=?", (c,)).fetchone()[0]
+    return iri[:-1] if iri.endswith("#") else iri
+
+
+def format_iri(iri: str) -> str:
+    """Return an IRI as an N-Triples term, escaping its unsafe characters."""
+    return "<" + _IRI_UNSAFE.sub(lambda match: "\\u%04X" % ord(match.group()), iri) + ">"
+
+
+def _node(storid: int, iri: Optional[str]) -> str:
+    if storid < 0:
+        return f"_:b{-storid}"
+    return format_iri(iri)
+
+
+def format_literal(value, datatype, datatype_iri: Optional[str]) -> str:
+    """Return a literal as an N-Triples term, with its "@language" tag or the IRI of its datatype."""
+
+    if isinstance(value, bool):
+        value = "true" if value else "false"
+    text = '"' + _LITERAL_UNSAFE.sub(lambda match: _ESCAPES[match.group()], str(value)) + '"'
+    if isinstance(datatype, str) and datatype.startswith("@"):
+        return text + datatype
+    if datatype_iri:
+        return text + "^^" + format_iri(datatype_iri)
+    return text
+
+
+def _unescape(text: str) -> str:
+    def replace(match):
+        code = match.group(1) or match.group(2)
+        if code:
+            return chr(int(code, 16))
+        return _UNESCAPES.get(match.group(3), match.group(3))
+    return _ESCAPE.sub(replace, text) if "\\" in text else text
+
+
+def parse_term(term: str):
+    """Return the IRI or blank node label of a term, or `(value, datatype)` for a literal."""
+
+    if term.startswith("<"):
+        return _unescape(term[1:-1])
+    if term.startswith("_:"):
+        return term
+    end = term.rindex('"')
+    lexical = _unescape(term[1:end])
+    suffix = term[end + 1:]
+    if suffix.startswith("@"):
+        return lexical, suffix
+    if not suffix:
+        return lexical, None
+    datatype = _unescape(suffix[3:-1])
+    if datatype in _INTEGER_TYPES:
+        return int(lexical), datatype
+    if datatype in _REAL_TYPES:
+        return float(lexical), datatype
+    return lexical, datatype
+
+
+def _parse(file: TextIO) -> Iterator[Tuple[str, str, object, Optional[str]]]:
+    for line_number, line in enumerate(file, 1):
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        match = LINE.match(line)
+        if match is None:
+            raise ParseError(line_number, line)
+        s, p, o, graph = match.groups()
+        if graph is not None:
+            graph = parse_term(graph)
+        yield parse_term(s), parse_term(p), parse_term(o), graph
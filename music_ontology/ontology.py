@@ -1,17 +1,116 @@
 """A music onthology."""
 
+import sys
+import time
+from typing import TYPE_CHECKING, Callable, Optional
+
 import owlready2 as owl
 
+if TYPE_CHECKING:
+    from music_ontology.instrumentation import Instrumentation
+    from music_ontology.lazy import LiveEntityCache
+    from music_ontology.worker import ReasonerSession
+
+STREAMED_FORMATS = {".nt": False, ".nq": True}
+"""The streamed file extensions (optionally followed by ".gz") and whether they hold quads."""
+
+UNIQUE_NAME_MODES = ("classes", "ensembles")
+"""How the individuals are declared distinct: per class, or per ensemble (see `declare_unique_names()`)."""
+
+DEFAULT_UNIQUE_NAMES = "classes"
+"""The mode of `declare_unique_names()` by default: "classes" declares the individuals of each class
+distinct, "ensembles" only the members of each ensemble."""
+
+
 class MusicOntologyProvider:
-    """Provides methods for creating, loading and saving the music ontology."""
+    """Provides methods for creating, loading and saving the music ontology.
+
+    If `quadstore` is given, the ontology is kept in an on-disk SQLite
+    quadstore at that path instead of the in-memory default world: `create()`
+    writes into it once and `load()` opens it without parsing any RDF/XML.
+    Otherwise the ontology lives in `world`, the default world if not given.
+
+    A quadstore is locked by the process which opens it, unless `shared` is
+    true: other processes can then open it with `read_only` (see
+    `music_ontology.replica.ReadReplica`), and see what `publish()` commits.
+
+    If `max_live_individuals` is given, `load()` only materializes the schema
+    right away. Individuals are materialized on their first access and only
+    the `max_live_individuals` most recently used ones are kept alive (see
+    `music_ontology.lazy.LiveEntityCache`), which bounds the memory of
+    processes touching a small part of a large catalog.
+
+    If `reasoner_workers` is given, `reason()` classifies with a pool of that
+    many warm worker processes (see `music_ontology.worker.ReasonerSession`),
+    which are only sent the changes since the previous call, until `close()`.
+
+    The wall time, peak memory and sizes of `create()`, `load()`, `save()`
+    and `reason()`, and of their phases, are sent to the sinks of
+    `instrumentation` (see `music_ontology.instrumentation`).
+
+    The modules of these features are imported by the methods using them, so
+    that importing the provider stays cheap.
+    """
+
+    def __init__(self, base_iri: str = "file://ontology.owl", quadstore: Optional[str] = None,
+                 world: Optional[owl.World] = None, max_live_individuals: Optional[int] = None,
+                 instrumentation: Optional["Instrumentation"] = None, shared: bool = False,
+                 read_only: bool = False, reasoner_workers: int = 0):
+        from music_ontology.instrumentation import Instrumentation
 
-    def __init__(self, base_iri: str = "file://ontology.owl"):
         self.base_iri = base_iri
+        self.quadstore = quadstore
+        self.max_live_individuals = max_live_individuals
+        self.instrumentation = instrumentation or Instrumentation()
+        self.live: Optional["LiveEntityCache"] = None
+        self.reasoner_workers = reasoner_workers
+        self.session: Optional["ReasonerSession"] = None
+        if quadstore:
+            self.world = owl.World(filename=quadstore, exclusive=not (shared or read_only), read_only=read_only)
+            if read_only:
+                # The file is opened read-only anyway, and SPARQL needs temporary tables, which must
+                # not start transactions either: these would keep the writer from committing
+                self.world.graph.db.execute("PRAGMA query_only = 0")
+                self.world.graph.db.isolation_level = None
+        else:
+            self.world = world or owl.default_world
+
+    def create(self, include_examples: bool = True, schema: Optional[str] = None,
+               unique_names: str = DEFAULT_UNIQUE_NAMES) -> owl.Ontology:
+        """Create the ontology from scratch and return it.
+
+        If `include_examples` is false, only the schema (classes, properties,
+        defined classes and disjointness axioms) is created. If `schema` is
+        given, the schema is read from that file, as saved by `save()`,
+        instead of being declared class by class. The examples are declared
+        distinct according to `unique_names` (see `declare_unique_names()`).
+        """
+
+        from music_ontology.instrumentation import phase
+
+        onto =  self.world.get_ontology(self.base_iri)
+        with self.instrumentation.operation("create", onto):
+            if schema is None:
+                with phase("schema"):
+                    self._create_schema(onto)
+            else:
+                with phase("parse"):
+                    self._read(onto, schema)
+
+            if include_examples:
+                with phase("examples"):
+                    self._create_examples(onto)
+                with phase("all_different"):
+                    self.declare_unique_names(onto, unique_names)
+
+            if self.quadstore:
+                with phase("persist"):
+                    self._persist(onto)
 
-    def create(self) -> owl.Ontology:
-        """Create the ontology from scratch and return it."""
+        return onto
 
-        onto =  owl.get_ontology(self.base_iri)
+    def _create_schema(self, onto: owl.Ontology):
+        """Declare the classes, properties and axioms of the ontology."""
 
         with onto:
             # Atomic Classes
@@ -116,8 +215,23 @@ class MusicOntologyProvider:
             class InstrumentalAlbum(Album):
                 equivalent_to = [Album & has_track.only(InstrumentalTrack)]
 
-            # Some individuals examples
+            # Disjoints
 
+            owl.AllDisjoint([EP, Single, Compilation])
+            owl.AllDisjoint([SoloArtist, MusicalEnsemble])
+
+    def _create_examples(self, onto: owl.Ontology):
+        """Create some example individuals."""
+
+        Track = onto.Track
+        Artist = onto.Artist
+        SoloArtist = onto.SoloArtist
+        MusicalEnsemble = onto.MusicalEnsemble
+        Album = onto.Album
+        Genre = onto.Genre
+        Lyrics = onto.Lyrics
+
+        with onto:
             rock = Genre("Rock")
             hard_rock = Genre("Hard Rock")
             prog_rock = Genre("Progressive Rock")
@@ -502,32 +616,203 @@ class MusicOntologyProvider:
                 ]
             )
 
-            # Disjoints
+    def declare_unique_names(self, onto: owl.Ontology, mode: str = DEFAULT_UNIQUE_NAMES):
+        """Declare the individuals distinct for reasoners without the unique name assumption.
 
-            owl.AllDisjoint([EP, Single, Compilation])
-            owl.AllDisjoint([SoloArtist, MusicalEnsemble])
+        The previous `AllDifferent` axioms are replaced, so this can be run
+        again after ingesting. With "classes", the individuals of each class
+        are declared distinct, in axioms as large as the catalog which list
+        most individuals several times. With "ensembles", only the members of
+        each ensemble are, which is all that the number restrictions of
+        `Duet`, `Trio`... `BigBand` need, in axioms bounded by the size of the
+        ensembles; two individuals of different ensembles may then be the
+        same for HermiT. The native classifier assumes unique names anyway.
+        """
 
-            # Distinct individuals
+        if mode not in UNIQUE_NAME_MODES:
+            raise ValueError(f"Unknown unique name mode {mode!r}, expected one of {UNIQUE_NAME_MODES}")
 
-            owl.AllDifferent(Artist.instances())
-            owl.AllDifferent(SoloArtist.instances())
-            owl.AllDifferent(MusicalEnsemble.instances())
-            owl.AllDifferent(Album.instances())
-            owl.AllDifferent(EP.instances())
-            owl.AllDifferent(Single.instances())
-            owl.AllDifferent(Compilation.instances())
-            owl.AllDifferent(Track.instances())
-            owl.AllDifferent(Lyrics.instances())
-            owl.AllDifferent(Genre.instances())
+        with onto:
+            for axiom in list(onto.different_individuals()):
+                axiom.destroy()
+
+            if mode == "classes":
+                for Class in (onto.Artist, onto.SoloArtist, onto.MusicalEnsemble, onto.Album, onto.EP,
+                              onto.Single, onto.Compilation, onto.Track, onto.Lyrics, onto.Genre):
+                    owl.AllDifferent(Class.instances())
+                return
+
+            members = {}
+            for ensemble, member in onto.world.graph.db.execute(
+                    """SELECT s, o FROM objs WHERE c=? AND p=? UNION SELECT o, s FROM objs WHERE c=? AND p=?""",
+                    (onto.graph.c, onto.has_group_member.storid, onto.graph.c, onto.is_member_of_group.storid)):
+                members.setdefault(ensemble, []).append(member)
+            get = onto.world._get_by_storid
+            for ensemble in sorted(members):
+                if len(members[ensemble]) > 1:
+                    owl.AllDifferent([get(member) for member in sorted(members[ensemble])])
+
+    def load(self, filename: Optional[str] = None, batch_size: Optional[int] = None) -> owl.Ontology:
+        """Load the ontology.
+
+        N-Triples and N-Quads files (`.nt`, `.nq`, optionally gzipped) are
+        streamed into the world `batch_size` triples at a time
+        (`music_ontology.ntriples.CHUNK_SIZE` by default).
+        """
+
+        from music_ontology.instrumentation import phase
+
+        onto = self.world.get_ontology(self.base_iri)
+        with self.instrumentation.operation("load", onto):
+            if filename is None:
+                if self.quadstore and onto.graph.get_last_update_time():
+                    onto.loaded = True
+                else:
+                    with phase("parse"):
+                        onto.load()
+            else:
+                with phase("parse"):
+                    self._read(onto, filename, batch_size)
+                if self.quadstore and _streamed_format(filename) is not None:
+                    with phase("persist"):
+                        self._persist(onto)
+
+            if self.max_live_individuals is not None:
+                if self.live is not None:
+                    self.live.close()
+                from music_ontology.lazy import LiveEntityCache
+
+                with phase("schema_entities"):
+                    self.live = LiveEntityCache(self.world, self.max_live_individuals).pin_schema(onto)
+        return onto
 
+    def _read(self, onto: owl.Ontology, filename: str, batch_size: Optional[int] = None):
+        """Read an RDF/XML, N-Triples or N-Quads file into the ontology."""
+
+        if _streamed_format(filename) is None:
+            with open(filename, "rb") as file:
+                onto.load(fileobj=file, reload=True)
+        else:
+            from music_ontology import ntriples
+
+            with ntriples.open_text(filename, "r") as file:
+                ntriples.read(onto, file, batch_size or ntriples.CHUNK_SIZE)
+            onto.loaded = True
+
+    def save(self, onto: owl.Ontology, filename: str, chunk_size: Optional[int] = None):
+        """Save the ontology to a file, in a format chosen by its extension.
+
+        `.nt` and `.nq` files, optionally gzipped with a `.gz` suffix, are
+        written `chunk_size` triples at a time
+        (`music_ontology.ntriples.CHUNK_SIZE` by default); N-Quads files hold
+        every ontology of the world (e.g. the inferences too). Any other file
+        is RDF/XML.
+        """
+
+        from music_ontology import ntriples
+        from music_ontology.instrumentation import phase
+
+        quads = _streamed_format(filename)
+        with self.instrumentation.operation("save", onto), phase("serialize"):
+            if quads is None:
+                onto.save(file=filename, format="rdfxml")
+            else:
+                with ntriples.open_text(filename, "w") as file:
+                    ntriples.write(self.world, file, None if quads else [onto], quads,
+                                   chunk_size or ntriples.CHUNK_SIZE)
+
+    def reason(self, onto: owl.Ontology, reasoner: Optional[Callable[[owl.Ontology], None]] = None):
+        """Reason over the ontology, by default with the native closed-world classifier."""
+
+        with self.instrumentation.operation("reason", onto):
+            if reasoner is not None:
+                reasoner(onto)
+            elif self.reasoner_workers:
+                if self.session is None or self.session.onto is not onto:
+                    from music_ontology.worker import ReasonerSession
+
+                    self.close()
+                    self.session = ReasonerSession(onto, self.reasoner_workers)
+                self.session.reason()
+            else:
+                from music_ontology.classifier import classify
+
+                classify(onto)
+
+    def close(self):
+        """Stop the reasoner workers, if any."""
+
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+    def apply_patch(self, onto: owl.Ontology, filename: str,
+                    unique_names: Optional[str] = DEFAULT_UNIQUE_NAMES) -> int:
+        """Apply a patch (see `music_ontology.patch`) to the ontology and return the changed triple count.
+
+        Patches do not cover the `AllDifferent` axioms, so if the ontology has
+        some and the patch changes types or ensemble members, they are
+        declared again in the `unique_names` mode (see
+        `declare_unique_names()`), unless it is None. In a quadstore, the
+        patched ontology is published too.
+        """
+
+        from music_ontology import patch
+        from music_ontology.instrumentation import phase
+
+        with self.instrumentation.operation("patch", onto):
+            with phase("parse"):
+                changeset = patch.Changeset.load(filename)
+            with phase("apply"):
+                count = patch.apply(onto, changeset)
+            distinctness = {onto.world._unabbreviate(owl.rdf_type), onto.has_group_member.iri,
+                            onto.is_member_of_group.iri}
+            if unique_names is not None and distinctness & changeset.predicates() and \
+                    any(True for _ in onto.different_individuals()):
+                with phase("all_different"):
+                    self.declare_unique_names(onto, unique_names)
+            if self.quadstore:
+                with phase("persist"):
+                    self._persist(onto)
+        return count
+
+    def convert(self, filename: str) -> owl.Ontology:
+        """Parse an ontology file (see `load()`) once into the quadstore."""
+
+        if not self.quadstore:
+            raise ValueError("Converting requires a quadstore to convert into.")
+
+        onto = self.world.get_ontology(self.base_iri)
+        self._read(onto, filename)
+        self._persist(onto)
         return onto
 
-    def load(self) -> owl.Ontology:
-        """Load the ontology."""
-        return owl.get_ontology(self.base_iri).load()
+    def publish(self, onto: owl.Ontology):
+        """Commit the changes of the ontology to the quadstore, for the read replicas."""
+        self._persist(onto)
+
+    def _persist(self, onto: owl.Ontology):
+        """Commit the ontology to the quadstore and mark it as loaded."""
+
+        onto.graph.set_last_update_time(time.time())
+        self.world.save()
+
+
+def _streamed_format(filename: str) -> Optional[bool]:
+    """Return whether a streamed file holds quads, or None if it is not streamed."""
+
+    if filename.endswith(".gz"):
+        filename = filename[:-3]
+    for extension, quads in STREAMED_FORMATS.items():
+        if filename.endswith(extension):
+            return quads
+    return None
 
 
 if __name__ == "__main__":
     provider = MusicOntologyProvider()
     onto = provider.create()
-    onto.save()
+    if len(sys.argv) > 1:
+        provider.save(onto, sys.argv[1])
+    else:
+        onto.save()
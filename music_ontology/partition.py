@@ -0,0 +1,219 @@
+"""Sharded parallel reasoning over independent partitions of the catalog."""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import owlready2 as owl
+from owlready2.base import rdf_type, owl_named_individual
+
+from music_ontology.classifier import INFERENCES_IRI, ClosedWorldClassifier, Inferences, classify
+
+SHARED_CLASSES = ("Genre",)
+"""Classes whose individuals are copied to every shard instead of linking them."""
+
+
+class ShardMismatchError(Exception):
+    """Raised when the sharded inferences differ from a single-process run."""
+
+    def __init__(self, differences: List[Tuple[str, str, str]]):
+        super().__init__(f"{len(differences)} inferences differ from the single-process run.")
+        self.differences = differences
+
+
+def components(onto: owl.Ontology, shared_classes: Iterable[str] = SHARED_CLASSES) -> List[Set[int]]:
+    """Split the individuals of the ontology into connected components.
+
+    Two individuals are connected when an object property relates them.
+    Individuals of `shared_classes` (e.g. genres, which link most tracks)
+    do not connect anything; they are copied to the shards which use them.
+    """
+
+    db = onto.world.graph.db
+    c = onto.graph.c
+    shared = _shared(onto, shared_classes)
+    individuals = [s for (s,) in db.execute(
+        "SELECT s FROM objs WHERE c=? AND p=? AND o=?", (c, rdf_type, owl_named_individual))]
+    parent = {s: s for s in individuals if s not in shared}
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for s, o in db.execute("SELECT s, o FROM objs WHERE c=? AND p!=?", (c, rdf_type)):
+        if s in parent and o in parent:
+            root_s, root_o = find(s), find(o)
+            if root_s != root_o:
+                parent[root_s] = root_o
+
+    groups: Dict[int, Set[int]] = {}
+    for s in parent:
+        groups.setdefault(find(s), set()).add(s)
+    return sorted(groups.values(), key=min)
+
+
+def shards(onto: owl.Ontology, max_shard_size: Optional[int] = None,
+           shared_classes: Iterable[str] = SHARED_CLASSES) -> List[Set[int]]:
+    """Pack the connected components into shards of at most `max_shard_size` individuals.
+
+    Components are never split, so a component larger than the bound gets a
+    shard of its own. Without a bound each component is a shard.
+    """
+
+    groups = components(onto, shared_classes)
+    if max_shard_size is None:
+        return groups
+
+    packed: List[Set[int]] = []
+    for group in sorted(groups, key=len, reverse=True):
+        for shard in packed:
+            if len(shard) + len(group) <= max_shard_size:
+                shard.update(group)
+                break
+        else:
+            packed.append(set(group))
+    return packed
+
+
+class ShardedReasoner:
+    """Reasons over the shards of an ontology in a process pool.
+
+    Every shard is rebuilt in a fresh world of its worker process with the
+    whole schema (TBox), the individuals of the shard and the shared
+    individuals they reference. The inferred types of all shards are then
+    merged back into the inferences ontology of the main world.
+    """
+
+    def __init__(self, onto: owl.Ontology, processes: Optional[int] = None,
+                 max_shard_size: Optional[int] = None,
+                 reasoner: Callable[[owl.Ontology], None] = classify,
+                 shared_classes: Iterable[str] = SHARED_CLASSES):
+        self.onto = onto
+        self.processes = processes
+        self.max_shard_size = max_shard_size
+        self.reasoner = reasoner
+        self.shared_classes = tuple(shared_classes)
+
+    def reason(self, verify: bool = False) -> Inferences:
+        """Reason over all shards in parallel and merge the inferred types.
+
+        If `verify` is true, the whole ontology is also reasoned over in a
+        single process and `ShardMismatchError` is raised on any difference.
+        """
+
+        shared = _shared(self.onto, self.shared_classes)
+        payloads = [
+            self._payload(shard, shared)
+            for shard in shards(self.onto, self.max_shard_size, self.shared_classes)
+        ]
+
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(self.processes, mp_context=context) as executor:
+            results = list(executor.map(_reason_shard, payloads))
+
+        merged: Dict[str, Set[str]] = {}
+        for result in results:
+            for s, types in result.items():
+                merged.setdefault(s, set()).update(types)
+
+        if verify:
+            everything = self._payload(set(_individuals(self.onto)), set())
+            single = {s: set(types) for s, types in _reason_shard(everything).items()}
+            differences = sorted(
+                [(s, o, "sharded") for s, types in merged.items() for o in types - single.get(s, set())]
+                + [(s, o, "single") for s, types in single.items() for o in types - merged.get(s, set())]
+            )
+            if differences:
+                raise ShardMismatchError(differences)
+
+        abbreviate = self.onto.world._abbreviate
+        inferred = {abbreviate(s): {abbreviate(o) for o in types} for s, types in merged.items()}
+        ClosedWorldClassifier(self.onto).apply(inferred)
+        return inferred
+
+    def _payload(self, shard: Set[int], shared: Set[int]) -> tuple:
+        """The triples of the shard's individuals and of the shared ones they use."""
+
+        db = self.onto.world.graph.db
+        c = self.onto.graph.c
+        subjects = set(shard)
+        objs = []
+        for s in shard:
+            objs.extend(db.execute(
+                """SELECT rs.iri, rp.iri, ro.iri, q.o FROM objs q
+                   JOIN resources rs ON rs.storid=q.s
+                   JOIN resources rp ON rp.storid=q.p
+                   JOIN resources ro ON ro.storid=q.o
+                   WHERE q.c=? AND q.s=?""", (c, s)))
+        subjects.update(o for *_, o in objs if o in shared)
+        for s in subjects - shard:
+            objs.extend(db.execute(
+                """SELECT rs.iri, rp.iri, ro.iri, q.o FROM objs q
+                   JOIN resources rs ON rs.storid=q.s
+                   JOIN resources rp ON rp.storid=q.p
+                   JOIN resources ro ON ro.storid=q.o
+                   WHERE q.c=? AND q.s=?""", (c, s)))
+
+        datas = []
+        for s in subjects:
+            datas.extend(db.execute(
+                """SELECT rs.iri, rp.iri, q.o, COALESCE(rd.iri, q.d) FROM datas q
+                   JOIN resources rs ON rs.storid=q.s
+                   JOIN resources rp ON rp.storid=q.p
+                   LEFT JOIN resources rd ON rd.storid=q.d
+                   WHERE q.c=? AND q.s=?""", (c, s)))
+
+        return self.onto.base_iri, [triple[:3] for triple in objs], datas, self.reasoner
+
+
+def _individuals(onto: owl.Ontology) -> List[int]:
+    return [s for (s,) in onto.world.graph.db.execute(
+        "SELECT s FROM objs WHERE c=? AND p=? AND o=?",
+        (onto.graph.c, rdf_type, owl_named_individual))]
+
+
+def _shared(onto: owl.Ontology, shared_classes: Iterable[str]) -> Set[int]:
+    shared = set()
+    for name in shared_classes:
+        shared.update(individual.storid for individual in onto[name].instances())
+    # Individuals of the schema itself, such as "Various Artists"
+    shared.add(onto["Various Artists"].storid)
+    return shared
+
+
+def _reason_shard(payload: tuple) -> Dict[str, List[str]]:
+    """Rebuild a shard in a fresh world, reason over it and return the inferred types."""
+
+    from music_ontology.ontology import MusicOntologyProvider
+
+    base_iri, objs, datas, reasoner = payload
+    world = owl.World()
+    onto = MusicOntologyProvider(base_iri, world=world).create(include_examples=False)
+    abbreviate = world._abbreviate
+
+    def datatype(d):
+        if isinstance(d, str) and not d.startswith("@"):
+            return abbreviate(d)
+        return d
+
+    c = onto.graph.c
+    with onto:
+        world.graph.db.executemany(
+            "INSERT OR IGNORE INTO objs VALUES (?,?,?,?)",
+            ((c, abbreviate(s), abbreviate(p), abbreviate(o)) for s, p, o in objs))
+        world.graph.db.executemany(
+            "INSERT OR IGNORE INTO datas VALUES (?,?,?,?,?)",
+            ((c, abbreviate(s), abbreviate(p), o, datatype(d)) for s, p, o, d in datas))
+
+    reasoner(onto)
+
+    inferences = world.get_ontology(INFERENCES_IRI)
+    result: Dict[str, List[str]] = {}
+    for s, o in world.graph.db.execute(
+            "SELECT s, o FROM objs WHERE c=? AND p=? AND s>0 AND s!=?",
+            (inferences.graph.c, rdf_type, inferences.storid)):
+        result.setdefault(world._unabbreviate(s), []).append(world._unabbreviate(o))
+    world.close()
+    return result
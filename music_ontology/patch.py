@@ -0,0 +1,181 @@
+"""Changesets between versions of the music ontology, as patches applied incrementally."""
+
+from typing import Dict, Iterable, List, Optional, Set, TextIO, Tuple
+
+import owlready2 as owl
+
+from music_ontology.changes import notify
+from music_ontology.classifier import refresh_entities
+from music_ontology.ntriples import LINE, ParseError, format_iri, format_literal, open_text, parse_term
+
+Triple = Tuple[str, str, object, Optional[str]]
+"""A triple as `(subject, predicate, object, datatype)`.
+
+The subject and predicate are IRIs. The object is an IRI too, with a None
+datatype, or a literal value, with as datatype the IRI of its datatype, its
+"@language" tag or "" if it has neither.
+"""
+
+_RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+_NAMED_INDIVIDUAL = "http://www.w3.org/2002/07/owl#NamedIndividual"
+
+
+class Changeset:
+    """The triples removed from and added to an ontology between two of its versions.
+
+    Changesets cover the individuals, their property values and their types,
+    and any other triple between named resources and literals. Axioms built
+    from blank nodes (class restrictions, AllDifferent...) are not compared:
+    `MusicOntologyProvider.apply_patch()` declares the individuals distinct
+    again.
+
+    Patches are written in the RDF Patch format: a transaction of `D`
+    (delete) then `A` (add) lines, each followed by a triple in N-Triples.
+    """
+
+    def __init__(self, removed: Iterable[Triple] = (), added: Iterable[Triple] = ()):
+        self.removed: List[Triple] = sorted(removed, key=_sort_key)
+        self.added: List[Triple] = sorted(added, key=_sort_key)
+
+    def __len__(self) -> int:
+        return len(self.removed) + len(self.added)
+
+    def predicates(self) -> Set[str]:
+        """Return the IRIs of the predicates of the removed and added triples."""
+        return {p for _, p, _, _ in self.removed} | {p for _, p, _, _ in self.added}
+
+    def individuals(self) -> Tuple[Set[str], Set[str]]:
+        """Return the IRIs of the removed and of the added individuals."""
+
+        def declared(triples: List[Triple]) -> Set[str]:
+            return {s for s, p, o, _ in triples if p == _RDF_TYPE and o == _NAMED_INDIVIDUAL}
+        return declared(self.removed), declared(self.added)
+
+    def write(self, file: TextIO):
+        """Write the changeset as a patch to a text file."""
+
+        file.write("TX .\n")
+        for operation, triples in (("D", self.removed), ("A", self.added)):
+            file.write("".join(f"{operation} {_statement(triple)} .\n" for triple in triples))
+        file.write("TC .\n")
+
+    @classmethod
+    def read(cls, file: TextIO) -> "Changeset":
+        """Read a patch from a text file."""
+
+        triples: Dict[str, List[Triple]] = {"D": [], "A": []}
+        for line_number, line in enumerate(file, 1):
+            operation, _, statement = line.strip().partition(" ")
+            if not operation or operation.startswith("#") or operation in ("H", "TX", "TC", "TA"):
+                continue
+            match = LINE.match(statement)
+            if operation not in triples or match is None or match.group(4) is not None:
+                raise ParseError(line_number, line)
+            s, p, o = (parse_term(term) for term in match.groups()[:3])
+            if isinstance(o, tuple):
+                value, datatype = o
+                triples[operation].append((s, p, value, datatype or ""))
+            else:
+                triples[operation].append((s, p, o, None))
+        return cls(triples["D"], triples["A"])
+
+    def save(self, filename: str):
+        """Save the patch to a file, gzipped if its name ends with ".gz"."""
+
+        with open_text(filename, "w") as file:
+            self.write(file)
+
+    @classmethod
+    def load(cls, filename: str) -> "Changeset":
+        with open_text(filename, "r") as file:
+            return cls.read(file)
+
+
+def diff(old: owl.Ontology, new: owl.Ontology) -> Changeset:
+    """Return the changes from one version of an ontology to another, in any worlds."""
+
+    old_triples = _triples(old)
+    new_triples = _triples(new)
+    return Changeset(old_triples - new_triples, new_triples - old_triples)
+
+
+def apply(onto: owl.Ontology, changeset: Changeset) -> int:
+    """Apply a changeset to a loaded or persisted ontology and return the number of changed triples.
+
+    The triples are deleted and inserted straight in the quadstore, then the
+    already loaded entities forget their changed property values and types,
+    and the change trackers (indexes, query caches...) are notified. The
+    changes are not committed.
+    """
+
+    world = onto.world
+    db = world.graph.db
+    c = onto.graph.c
+    storids: Dict[str, Optional[int]] = {}
+
+    def storid(iri: str, create: bool) -> Optional[int]:
+        if iri not in storids or (storids[iri] is None and create):
+            storids[iri] = world._abbreviate(iri, create)
+        return storids[iri]
+
+    def datatype(value: str, create: bool):
+        if not value or value.startswith("@"):
+            return value or 0
+        return storid(value, create)
+
+    rows = {"objs": ([], []), "datas": ([], [])}
+    changes = []
+    for index, triples in enumerate((changeset.removed, changeset.added)):
+        create = index == 1
+        for s, p, o, d in triples:
+            s, p = storid(s, create), storid(p, create)
+            if d is None:
+                o = storid(o, create)
+                table, row = "objs", (c, s, p, o)
+            else:
+                table, row = "datas", (c, s, p, o, datatype(d, create))
+                o = None
+            if None in row:  # Removed, but unknown here
+                continue
+            rows[table][index].append(row)
+            changes.append((s, p, o))
+
+    with onto:
+        db.executemany("DELETE FROM objs WHERE c=? AND s=? AND p=? AND o=?", rows["objs"][0])
+        db.executemany("DELETE FROM datas WHERE c=? AND s=? AND p=? AND o=? AND d=?", rows["datas"][0])
+        db.executemany("INSERT OR IGNORE INTO objs VALUES (?,?,?,?)", rows["objs"][1])
+        db.executemany("INSERT OR IGNORE INTO datas VALUES (?,?,?,?,?)", rows["datas"][1])
+
+    refresh_entities(onto, changes)
+    notify(onto, changes)
+    return len(changes)
+
+
+def _triples(onto: owl.Ontology) -> Set[Triple]:
+    db = onto.world.graph.db
+    c = onto.graph.c
+    triples = set(db.execute(
+        """SELECT rs.iri, rp.iri, ro.iri, NULL FROM objs q
+           JOIN resources rs ON rs.storid=q.s
+           JOIN resources rp ON rp.storid=q.p
+           JOIN resources ro ON ro.storid=q.o
+           WHERE q.c=? AND q.s>0 AND q.o>0""", (c,)))
+    triples.update(db.execute(
+        """SELECT rs.iri, rp.iri, q.o, COALESCE(rd.iri, NULLIF(q.d, 0), '') FROM datas q
+           JOIN resources rs ON rs.storid=q.s
+           JOIN resources rp ON rp.storid=q.p
+           LEFT JOIN resources rd ON rd.storid=q.d
+           WHERE q.c=? AND q.s>0""", (c,)))
+    return triples
+
+
+def _statement(triple: Triple) -> str:
+    s, p, o, d = triple
+    if d is None:
+        return f"{format_iri(s)} {format_iri(p)} {format_iri(o)}"
+    return f"{format_iri(s)} {format_iri(p)} {format_literal(o, d, None if d.startswith('@') else d)}"
+
+
+def _sort_key(triple: Triple) -> tuple:
+    s, p, o, d = triple
+    return s, p, str(o), d or ""
@@ -0,0 +1,148 @@
+"""Named, prepared SPARQL queries over the music ontology with a result cache."""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import owlready2 as owl
+
+from music_ontology.changes import Change, ChangeTracker
+
+QUERIES = {
+    "tracks_by_artist": """
+        SELECT ?track WHERE { ?track :has_track_artist ?? . }""",
+    # There are no track numbers: tracks are in the order they were first created.
+    # owlready2 cannot translate a UNION first in a group which is ordered or has an
+    # OPTIONAL, hence the types.
+    "album_tracklist": """
+        SELECT DISTINCT ?track WHERE {
+            ?track a/rdfs:subClassOf* :Track .
+            { ??1 :has_track ?track . } UNION { ?track :appears_in_album ??1 . }
+        } ORDER BY STORID(?track)""",
+    "albums_by_artist": """
+        SELECT DISTINCT ?album ?year WHERE {
+            ?album a/rdfs:subClassOf* :Album .
+            { ?album :has_album_artist ??1 . } UNION { ??1 :has_album_in_discography ?album . }
+            OPTIONAL { ?album :has_year ?year . }
+        } ORDER BY ?year""",
+    "lyrics_co_writers": """
+        SELECT DISTINCT ?writer WHERE {
+            { ?lyrics :written_by ??1 . } UNION { ??1 :has_written_lyrics ?lyrics . }
+            { ?lyrics :written_by ?writer . } UNION { ?writer :has_written_lyrics ?lyrics . }
+            FILTER(?writer != ??1)
+        }""",
+    "ensembles_sharing_member": """
+        SELECT DISTINCT ?ensemble ?member WHERE {
+            { ??1 :has_group_member ?member . } UNION { ?member :is_member_of_group ??1 . }
+            { ?ensemble :has_group_member ?member . } UNION { ?member :is_member_of_group ?ensemble . }
+            FILTER(?ensemble != ??1)
+        }""",
+    "tracks_by_genre": """
+        SELECT ?track WHERE { ?track :has_genre ?? . }""",
+    "tracks_longer_than": """
+        SELECT ?track ?length WHERE {
+            ?track :has_length_in_milliseconds ?length .
+            FILTER(?length > ??)
+        } ORDER BY ?length""",
+}
+"""The named queries, with `:` as the prefix of the ontology and `??` parameters.
+
+Relations with an inverse property are matched through both, since owlready2
+asserts a relation through the side it was set on only.
+"""
+
+
+class QueryService:
+    """Runs the named queries, each compiled once, and caches their results.
+
+    Results are generators reading the rows from the quadstore as they are
+    consumed; rows with a single column are yielded as a single value. A
+    result set which is consumed entirely and has at most `max_cached_rows`
+    rows is kept in an LRU cache of `cache_size` results, which is cleared by
+    any write to the ontology (including bulk ingestion).
+    """
+
+    def __init__(self, onto: owl.Ontology, cache_size: int = 256, max_cached_rows: int = 10000):
+        self.onto = onto
+        self.cache_size = cache_size
+        self.max_cached_rows = max_cached_rows
+        self.queries: Dict[str, str] = dict(QUERIES)
+        self.hits = 0
+        self.misses = 0
+        self._prepared = {}
+        self._cache: "OrderedDict[tuple, list]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.tracker = ChangeTracker(onto).start()
+        self.tracker.listeners.append(self._on_changes)
+
+    def register(self, name: str, sparql: str):
+        """Add or replace a named query."""
+
+        self.queries[name] = sparql
+        self._prepared.pop(name, None)
+        self.invalidate()
+
+    def prepare(self, name: str):
+        """Return the compiled query of the given name, compiling it once."""
+
+        prepared = self._prepared.get(name)
+        if prepared is None:
+            sparql = f"PREFIX : <{self.onto.base_iri}>\n{self.queries[name]}"
+            prepared = self._prepared[name] = self.onto.world.prepare_sparql(sparql)
+        return prepared
+
+    def run(self, name: str, *parameters) -> Iterator:
+        """Run a named query with the given parameters and yield its rows."""
+
+        key = (name, *(parameter_key(parameter) for parameter in parameters))
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            generation = self._generation
+        if cached is not None:
+            return (value for value in cached)
+        return self._stream(key, generation, self.prepare(name).execute(parameters))
+
+    def invalidate(self):
+        """Forget every cached result."""
+
+        with self._lock:
+            self._cache.clear()
+            self._generation += 1
+
+    def close(self):
+        """Stop watching the writes to the ontology."""
+        self.tracker.stop()
+
+    def _stream(self, key: tuple, generation: int, rows: Iterator[list]) -> Iterator:
+        collected: Optional[list] = []
+        for row in rows:
+            value = row[0] if len(row) == 1 else tuple(row)
+            if collected is not None:
+                collected.append(value)
+                if len(collected) > self.max_cached_rows:
+                    collected = None
+            yield value
+
+        with self._lock:
+            # Results read across a write are stale
+            if collected is not None and generation == self._generation:
+                self._cache[key] = collected
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+    def _on_changes(self, changes: List[Change]):
+        self.invalidate()
+
+
+def parameter_key(parameter) -> Tuple[str, object]:
+    """Return a hashable key of a query parameter, identifying entities by storid."""
+
+    if isinstance(parameter, (owl.EntityClass, owl.Thing)):
+        return ("entity", parameter.storid)
+    return (type(parameter).__name__, parameter)
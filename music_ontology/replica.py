@@ -0,0 +1,104 @@
+"""Read-only replicas of a quadstore shared by many worker processes."""
+
+import threading
+import time
+from typing import Callable, List, Optional
+
+import owlready2 as owl
+
+from music_ontology.ontology import MusicOntologyProvider
+
+DEFAULT_REFRESH_INTERVAL = 1.0
+DEFAULT_PAGE_CACHE_KB = 8192
+
+
+class ReadReplica:
+    """A read-only view of an on-disk quadstore, refreshed when its writer commits.
+
+    Each replica has its own SQLite connection to the quadstore, which
+    owlready2 memory-maps, so that the pages read by all the worker processes
+    of a host are the same pages of the OS page cache instead of a copy of the
+    whole catalog per process; the private page cache of the connection is
+    bounded to `page_cache_kb` too. Nothing is parsed: entities are
+    materialized on their first access, and `max_live_individuals` bounds how
+    many of them are kept alive (see `music_ontology.lazy`).
+
+    The writer opens the quadstore with `MusicOntologyProvider(...,
+    shared=True)` and commits with `publish()`. Reading `onto` checks, at most
+    every `refresh_interval` seconds, whether a commit happened since, and then
+    opens the new version in a new world: the entities of a version stay
+    readable until the next refresh, so requests should read `onto` once and
+    use it throughout. The `listeners` are called with every new version
+    (e.g. to rebuild a `CatalogIndex`).
+    """
+
+    def __init__(self, quadstore: str, base_iri: str = "file://ontology.owl",
+                 refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+                 max_live_individuals: Optional[int] = None,
+                 page_cache_kb: int = DEFAULT_PAGE_CACHE_KB):
+        self.quadstore = quadstore
+        self.base_iri = base_iri
+        self.refresh_interval = refresh_interval
+        self.max_live_individuals = max_live_individuals
+        self.page_cache_kb = page_cache_kb
+        self.listeners: List[Callable[[owl.Ontology], None]] = []
+        self.refreshes = 0
+        self._lock = threading.Lock()
+        self._previous: Optional[MusicOntologyProvider] = None
+        self._provider, self._onto, self._data_version = self._open()
+        self._checked = time.monotonic()
+
+    @property
+    def onto(self) -> owl.Ontology:
+        """The latest version of the ontology, at most `refresh_interval` seconds old."""
+
+        if time.monotonic() - self._checked >= self.refresh_interval:
+            self.refresh()
+        return self._onto
+
+    @property
+    def world(self) -> owl.World:
+        return self._onto.world
+
+    def refresh(self) -> bool:
+        """Open the latest version of the quadstore if it changed, and return whether it did."""
+
+        with self._lock:
+            self._checked = time.monotonic()
+            if _data_version(self._provider.world) == self._data_version:
+                return False
+
+            self._close(self._previous)
+            self._previous = self._provider
+            self._provider, self._onto, self._data_version = self._open()
+            self.refreshes += 1
+            onto = self._onto
+        for listener in self.listeners:
+            listener(onto)
+        return True
+
+    def close(self):
+        with self._lock:
+            self._close(self._previous)
+            self._close(self._provider)
+            self._previous = None
+
+    def _open(self):
+        provider = MusicOntologyProvider(self.base_iri, quadstore=self.quadstore, read_only=True,
+                                         max_live_individuals=self.max_live_individuals)
+        provider.world.graph.db.execute(f"PRAGMA cache_size = -{self.page_cache_kb}")
+        # Read before the ontology, so that a commit in between is seen by the next refresh
+        data_version = _data_version(provider.world)
+        return provider, provider.load(), data_version
+
+    @staticmethod
+    def _close(provider: Optional[MusicOntologyProvider]):
+        if provider is not None:
+            if provider.live is not None:
+                provider.live.close()
+            provider.world.close()
+
+
+def _data_version(world: owl.World) -> int:
+    # Changes whenever another connection commits to the database
+    return world.graph.db.execute("PRAGMA data_version").fetchone()[0]
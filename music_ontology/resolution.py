@@ -0,0 +1,253 @@
+"""Entity resolution: the artists, genres and albums known under slightly different names."""
+
+import re
+from difflib import SequenceMatcher
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import owlready2 as owl
+from owlready2.base import rdf_first, rdf_rest, rdf_type
+
+from music_ontology.changes import notify
+from music_ontology.index import normalize_name
+from music_ontology.classifier import refresh_entities
+
+RESOLVED_CLASSES = ("Artist", "Genre", "Album")
+"""The classes whose individuals are resolved, each with its subclasses."""
+
+DEFAULT_THRESHOLD = 0.8
+"""The minimum similarity of two names of the same individual."""
+
+SHORT_NAME_LENGTH = 13
+"""Normalized names shorter than this only match names with the same words (e.g. not "Jon Anderson")."""
+
+STOPWORDS = frozenset(("the", "a", "an", "and"))
+
+_SOUNDEX_DIGITS = {
+    letter: str(digit)
+    for digit, letters in enumerate(("aeiouyhw", "bfpv", "cgjkqsxz", "dt", "l", "mn", "r"))
+    for letter in letters
+}
+_ROMAN_NUMERAL = re.compile(r"m*(cm|cd|d?c{0,3})(xc|xl|l?x{0,3})(ix|iv|v?i{0,3})")
+
+
+class Duplicate(NamedTuple):
+    """An individual found to be another one, and the similarity of their names."""
+
+    duplicate: str
+    canonical: str
+    score: float
+
+
+class _Entry(NamedTuple):
+    name: str
+    words: str
+
+
+class EntityResolver:
+    """Matches names to the artists, genres and albums of the ontology.
+
+    Names are normalized with `music_ontology.index.normalize_name()`, and
+    blocked by the Soundex codes of their words, in any order and without
+    stopwords: only the individuals of the same block are compared, with the
+    similarity (`difflib` ratio) of their sorted normalized words, so that a
+    lookup costs the size of a block instead of the size of the catalog.
+    Numbers and roman numerals are kept as they are, so that
+    "Liquid Tension Experiment 2" is not "Liquid Tension Experiment".
+
+    Short names only match names with the same words: a letter makes more
+    of a difference there, as between "Jon Anderson" and "John Anderson".
+
+    The individuals of the ontology are indexed when the resolver is created,
+    and the ones which match an earlier one are listed in `duplicates`, to be
+    reviewed and merged with `merge_duplicates()`. `CatalogIngestor(onto,
+    resolver=EntityResolver(onto))` then resolves the names of every
+    ingested record with `resolve()`: names with the same words as a known
+    one are resolved to it, and the other matches are ingested under their
+    own name and listed in `duplicates` too. With `auto_merge`, they are
+    resolved to the known individual right away instead, and listed in
+    `merged`.
+    """
+
+    def __init__(self, onto: owl.Ontology, threshold: float = DEFAULT_THRESHOLD,
+                 classes: Sequence[str] = RESOLVED_CLASSES, auto_merge: bool = False):
+        self.onto = onto
+        self.threshold = threshold
+        self.auto_merge = auto_merge
+        self.resolved = 0
+        self.duplicates: List[Duplicate] = []
+        self.merged: List[Duplicate] = []
+        self._prefix = onto.base_iri
+        self._group = {Class.name: group for group in classes for Class in onto[group].descendants()}
+        self._exact: Dict[Tuple[str, str], str] = {}
+        self._blocks: Dict[Tuple[str, str], List[_Entry]] = {}
+        self._index_existing()
+
+    def resolve(self, name: str, class_name: str) -> str:
+        """Return the name of the known individual that `name` refers to, or register `name`."""
+
+        group = self._group.get(class_name)
+        if group is None:
+            return name
+        match = self._match(group, name)
+        if match is None:
+            self._add(group, name)
+            return name
+        if match[1] < 1.0:
+            if not self.auto_merge:
+                self._add(group, name)
+                self.duplicates.append(Duplicate(name, *match))
+                return name
+            self.merged.append(Duplicate(name, *match))
+        if match[0] != name:
+            self.resolved += 1
+        return match[0]
+
+    def match(self, name: str, class_name: str) -> Optional[Tuple[str, float]]:
+        """Return the name of the known individual that `name` refers to and their similarity, if any."""
+
+        group = self._group.get(class_name)
+        return None if group is None else self._match(group, name)
+
+    def merge_duplicates(self) -> int:
+        """Merge every duplicate into its canonical individual and return their count."""
+
+        world = self.onto.world
+        duplicates, self.duplicates = self.duplicates, []
+        for duplicate in duplicates:
+            merge(self.onto, world._abbreviate(self._prefix + duplicate.duplicate, False),
+                  world._abbreviate(self._prefix + duplicate.canonical, False))
+        return len(duplicates)
+
+    def _index_existing(self):
+        world = self.onto.world
+        classes = {self.onto[name].storid: group for name, group in self._group.items()}
+        rows = world.graph.db.execute(
+            f"""SELECT DISTINCT q.s, r.iri, q.o FROM objs q JOIN resources r ON r.storid=q.s
+                WHERE q.p=? AND q.o IN ({",".join(map(str, classes))}) ORDER BY q.s""", (rdf_type,))
+        seen = set()
+        for storid, iri, Class in rows:
+            group = classes[Class]
+            if (storid, group) in seen or not iri.startswith(self._prefix):
+                continue
+            seen.add((storid, group))
+            name = iri[len(self._prefix):]
+            match = self._match(group, name)
+            if match is None:
+                self._add(group, name)
+            elif match[0] != name:
+                self.duplicates.append(Duplicate(name, *match))
+
+    def _match(self, group: str, name: str) -> Optional[Tuple[str, float]]:
+        normalized = normalize_name(name)
+        canonical = self._exact.get((group, normalized))
+        if canonical is not None:
+            return canonical, 1.0
+
+        words = _sorted_words(normalized)
+        matcher = SequenceMatcher(None, b=words)
+        best = None
+        for entry in self._blocks.get((group, phonetic_key(normalized)), ()):
+            if min(len(words), len(entry.words)) < SHORT_NAME_LENGTH and words != entry.words:
+                continue
+            matcher.set_seq1(entry.words)
+            score = matcher.ratio()
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = entry.name, score
+        return best
+
+    def _add(self, group: str, name: str):
+        normalized = normalize_name(name)
+        self._exact[group, normalized] = name
+        self._blocks.setdefault((group, phonetic_key(normalized)), []).append(
+            _Entry(name, _sorted_words(normalized)))
+
+
+def merge(onto: owl.Ontology, duplicate: int, canonical: int) -> int:
+    """Merge an individual into another one and return the number of its triples.
+
+    The individuals are given by storid. The types and relations of the
+    duplicate are moved to the canonical individual, the duplicate is removed
+    and the change trackers are notified. In the RDF lists of axioms (e.g.
+    `AllDifferent`), the duplicate is replaced by the canonical individual,
+    or removed if the list has it already.
+    """
+
+    db = onto.world.graph.db
+    changes = []
+    for s, p, o in db.execute("SELECT s, p, o FROM objs WHERE (s=? OR o=?) AND NOT (s<0 AND p=?)",
+                              (duplicate, duplicate, rdf_first)).fetchall():
+        changes.append((s, p, o))
+        changes.append((canonical if s == duplicate else s, p, canonical if o == duplicate else o))
+    for (p,) in db.execute("SELECT p FROM datas WHERE s=?", (duplicate,)).fetchall():
+        changes.append((duplicate, p, None))
+        changes.append((canonical, p, None))
+
+    with onto:
+        cells = [s for (s,) in db.execute(
+            "SELECT s FROM objs WHERE s<0 AND p=? AND o=?", (rdf_first, duplicate)).fetchall()]
+        for cell in cells:
+            _merge_list_cell(db, cell, duplicate, canonical)
+        # Triples which the canonical individual already has are not moved, but removed below
+        db.execute("UPDATE OR IGNORE objs SET s=? WHERE s=?", (canonical, duplicate))
+        db.execute("UPDATE OR IGNORE objs SET o=? WHERE o=?", (canonical, duplicate))
+        db.execute("UPDATE OR IGNORE datas SET s=? WHERE s=?", (canonical, duplicate))
+        db.execute("DELETE FROM objs WHERE s=? OR o=?", (duplicate, duplicate))
+        db.execute("DELETE FROM datas WHERE s=?", (duplicate,))
+
+    refresh_entities(onto, changes)
+    notify(onto, changes)
+    return len(changes) // 2
+
+
+def _merge_list_cell(db, cell: int, duplicate: int, canonical: int):
+    """Replace the duplicate in a cell of an RDF list, or unlink the cell if the list has the canonical one."""
+
+    head = cell
+    while True:
+        previous = db.execute("SELECT s FROM objs WHERE p=? AND o=?", (rdf_rest, head)).fetchone()
+        if previous is None:
+            break
+        head = previous[0]
+
+    members, node = set(), head
+    while node is not None:
+        members.update(o for (o,) in db.execute("SELECT o FROM objs WHERE s=? AND p=?", (node, rdf_first)))
+        rest = db.execute("SELECT o FROM objs WHERE s=? AND p=?", (node, rdf_rest)).fetchone()
+        node = rest[0] if rest is not None and rest[0] < 0 else None
+
+    if canonical not in members:
+        db.execute("UPDATE objs SET o=? WHERE s=? AND p=? AND o=?", (canonical, cell, rdf_first, duplicate))
+        return
+
+    (rest,) = db.execute("SELECT o FROM objs WHERE s=? AND p=?", (cell, rdf_rest)).fetchone()
+    # The previous cell, or the axiom if the cell is the head of the list
+    db.execute("UPDATE objs SET o=? WHERE o=? AND p!=?", (rest, cell, rdf_first))
+    db.execute("DELETE FROM objs WHERE s=?", (cell,))
+
+
+def phonetic_key(normalized: str) -> str:
+    """Return the blocking key of a normalized name: the sorted Soundex codes of its words."""
+
+    words = normalized.split()
+    words = [word for word in words if word not in STOPWORDS] or words
+    return " ".join(sorted(soundex(word) for word in words))
+
+
+def soundex(word: str) -> str:
+    """Return the Soundex code of a word, or the word itself if it is a number or a roman numeral."""
+
+    letters = [letter for letter in word if letter in _SOUNDEX_DIGITS]
+    if len(letters) != len(word) or _ROMAN_NUMERAL.fullmatch(word):
+        return word
+    code, previous = letters[0], _SOUNDEX_DIGITS[letters[0]]
+    for letter in letters[1:]:
+        digit = _SOUNDEX_DIGITS[letter]
+        if digit != "0" and digit != previous:
+            code += digit
+        if letter not in "hw":
+            previous = digit
+    return (code + "000")[:4]
+
+
+def _sorted_words(normalized: str) -> str:
+    return " ".join(sorted(normalized.split()))
@@ -0,0 +1,138 @@
+"""Read-only records of the catalog read straight from the quadstore, without entity objects."""
+
+import sys
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+import owlready2 as owl
+from owlready2.base import rdf_type
+
+DEFAULT_CHUNK_SIZE = 500
+"""The number of individuals read per batch of queries."""
+
+
+class TrackRecord(NamedTuple):
+    iri: str
+    length_in_milliseconds: Optional[int]
+    artists: Tuple[str, ...]
+    genres: Tuple[str, ...]
+    albums: Tuple[str, ...]
+    lyrics: Optional[str]
+
+
+class AlbumRecord(NamedTuple):
+    iri: str
+    year: Optional[int]
+    artist: Optional[str]
+    tracks: Tuple[str, ...]
+
+
+class ArtistRecord(NamedTuple):
+    iri: str
+    members: Tuple[str, ...]
+    groups: Tuple[str, ...]
+    discography: Tuple[str, ...]
+
+
+class LyricsRecord(NamedTuple):
+    iri: str
+    track: Optional[str]
+    written_by: Tuple[str, ...]
+    text: Optional[str]
+
+
+_CLASSES = {TrackRecord: "Track", AlbumRecord: "Album", ArtistRecord: "Artist", LyricsRecord: "Lyrics"}
+
+
+class CatalogSnapshot:
+    """Iterates over the tracks, albums, artists and lyrics of the ontology's world as plain records.
+
+    Records are named tuples of the values of the properties of an
+    individual, named after their `python_name`: related individuals are
+    given by IRI, sorted, and functional properties by a single value or
+    None. Inverse properties are followed both ways, like owlready2 does.
+
+    The individuals are streamed from a single query and their values are
+    read `chunk_size` individuals at a time, with three queries per chunk, so
+    that iterating over the catalog holds one chunk in memory and never
+    creates owlready2 entities nor fills their caches. The IRIs are
+    interned, so that an individual related to many others (e.g. a genre) is
+    the same string in all of their records. Each record reflects its
+    individual when it was read.
+    """
+
+    def __init__(self, onto: owl.Ontology, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.onto = onto
+        self.chunk_size = chunk_size
+        self._db = onto.world.graph.db
+        self._properties = {prop.python_name: prop for prop in onto.properties()}
+        self._classes = {
+            record: ",".join(str(Class.storid) for Class in onto[name].descendants())
+            for record, name in _CLASSES.items()
+        }
+
+    def tracks(self) -> Iterator[TrackRecord]:
+        return self._records(TrackRecord)
+
+    def albums(self) -> Iterator[AlbumRecord]:
+        return self._records(AlbumRecord)
+
+    def artists(self) -> Iterator[ArtistRecord]:
+        """Iterate over the artists, solo artists and ensembles."""
+        return self._records(ArtistRecord)
+
+    def lyrics(self) -> Iterator[LyricsRecord]:
+        return self._records(LyricsRecord)
+
+    def _records(self, record: type) -> Iterator[tuple]:
+        props = [self._properties[field] for field in record._fields[1:]]
+        functional = [owl.FunctionalProperty in prop.is_a for prop in props]
+        classes = self._classes[record]
+        # One cursor over all the individuals, so that the whole iteration is a single scan
+        cursor = self._db.execute(
+            f"""SELECT DISTINCT q.s, r.iri FROM objs q JOIN resources r ON r.storid=q.s
+                WHERE q.p=? AND q.o IN ({classes}) AND q.s>0 ORDER BY q.s""", (rdf_type,))
+        while True:
+            chunk = cursor.fetchmany(self.chunk_size)
+            if not chunk:
+                return
+
+            values = self._values([s for s, _ in chunk], props)
+            for s, iri in chunk:
+                fields = []
+                for i, is_functional in enumerate(functional):
+                    found = values.get((s, i), ())
+                    if is_functional:
+                        fields.append(min(found) if found else None)
+                    else:
+                        fields.append(tuple(sorted(found)))
+                yield record(sys.intern(iri), *fields)
+
+    def _values(self, storids: List[int], props: list) -> Dict[Tuple[int, int], Set[object]]:
+        """Return the values of the properties of the individuals, by individual and property index."""
+
+        ids = ",".join(map(str, storids))
+        objs, inverses, datas = {}, {}, {}
+        for i, prop in enumerate(props):
+            if issubclass(prop, owl.DataProperty):
+                datas[prop.storid] = i
+            else:
+                objs[prop.storid] = i
+                if prop.inverse_property is not None:
+                    inverses[prop.inverse_property.storid] = i
+
+        values: Dict[Tuple[int, int], Set[object]] = {}
+        queries = (
+            (objs, "SELECT q.s, q.p, r.iri FROM objs q JOIN resources r ON r.storid=q.o "
+                   "WHERE q.s IN ({ids}) AND q.p IN ({ps})"),
+            (inverses, "SELECT q.o, q.p, r.iri FROM objs q JOIN resources r ON r.storid=q.s "
+                       "WHERE q.o IN ({ids}) AND q.p IN ({ps})"),
+        )
+        for fields, sql in queries:
+            if fields:
+                for s, p, iri in self._db.execute(sql.format(ids=ids, ps=",".join(map(str, fields)))):
+                    values.setdefault((s, fields[p]), set()).add(sys.intern(iri))
+        if datas:
+            for s, p, o in self._db.execute(
+                    f"SELECT s, p, o FROM datas WHERE s IN ({ids}) AND p IN ({','.join(map(str, datas))})"):
+                values.setdefault((s, datas[p]), set()).add(o)
+        return values
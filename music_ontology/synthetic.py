@@ -0,0 +1,153 @@
+"""A generator of synthetic catalogs with realistic distributions."""
+
+import math
+import random
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import owlready2 as owl
+
+from music_ontology.ingest import CatalogIngestor
+
+GENRE_NAMES = (
+    "Rock", "Pop", "Jazz", "Blues", "Metal", "Folk", "Soul", "Funk", "Punk", "Reggae",
+    "Country", "Classical", "Electronic", "Hip Hop", "Ambient", "Fusion",
+)
+ENSEMBLE_SIZE_WEIGHTS = {2: 12, 3: 18, 4: 30, 5: 20, 6: 8, 7: 4, 8: 3, 9: 2, 10: 1, 11: 1, 12: 1}
+"""The relative frequencies of ensemble sizes, from duets to big bands."""
+ALBUM_TYPE_WEIGHTS = {"album": 70, "ep": 12, "single": 12, "compilation": 6}
+"""The relative frequencies of the album types (see `music_ontology.ingest.ALBUM_TYPES`)."""
+ALBUM_TYPE_TRACKS = {"album": 1.0, "ep": 0.4, "single": 0.1, "compilation": 1.0}
+"""The relative numbers of tracks of the album types."""
+
+FIRST_YEAR = 1955
+LAST_YEAR = 2024
+MEDIAN_TRACK_LENGTH = 240000
+LYRICS_WORDS = (
+    "love", "night", "road", "fire", "heart", "time", "dream", "light", "rain", "city",
+    "river", "stone", "world", "shadow", "morning", "wild", "home", "gold", "sky", "sea",
+)
+
+
+def generate(artists: int = 100, ensembles: int = 20, albums: int = 50, tracks: int = 500,
+             lyrics_ratio: float = 0.7, genres: int = 20, seed: int = 0,
+             album_types: Optional[Dict[str, float]] = None, va_ratio: float = 0.5) -> Iterator[dict]:
+    """Yield the ingestion records of a synthetic catalog.
+
+    The catalog has `artists` solo artists and `ensembles` ensembles of 2 to
+    12 of them, `albums` albums and `tracks` tracks, a `lyrics_ratio` share
+    of which have lyrics, in `genres` genres. The albums are albums, EPs,
+    singles and compilations in the relative proportions of `album_types`
+    (`ALBUM_TYPE_WEIGHTS` by default), EPs and singles with fewer tracks, and
+    a `va_ratio` share of the compilations are by "Various Artists".
+    Popularity follows a Zipf distribution: a few artists and genres get most
+    of the albums and tracks. Track lengths are log-normal around four
+    minutes. The same arguments always yield the same catalog.
+    """
+
+    rng = random.Random(seed)
+    solo_artists = [f"Artist {i}" for i in range(artists)]
+    for name in solo_artists:
+        yield {"type": "solo_artist", "name": name}
+    genre_names = [_genre_name(i) for i in range(genres)]
+    bands: List[str] = []
+    members = {}
+
+    sizes, weights = zip(*ENSEMBLE_SIZE_WEIGHTS.items())
+    for i in range(ensembles if solo_artists else 0):
+        name = f"Ensemble {i}"
+        size = min(rng.choices(sizes, weights)[0], len(solo_artists))
+        members[name] = rng.sample(solo_artists, size)
+        bands.append(name)
+        yield {"type": "ensemble", "name": name, "members": members[name]}
+
+    performers = bands + solo_artists
+    if not performers:
+        performers = ["Various Artists"]
+    performer_weights = _zipf_weights(len(performers))
+    genre_weights = _zipf_weights(len(genre_names))
+
+    album_names = [f"Album {i}" for i in range(albums)]
+    type_names, type_weights = zip(*(album_types or ALBUM_TYPE_WEIGHTS).items())
+    album_kinds = rng.choices(type_names, type_weights, k=albums)
+    album_artists = rng.choices(performers, performer_weights, k=albums)
+    for a, kind in enumerate(album_kinds):
+        if kind == "compilation" and rng.random() < va_ratio:
+            album_artists[a] = "Various Artists"
+    # Cumulative, so that drawing an album for each track is a bisection
+    album_track_weights = list(accumulate(ALBUM_TYPE_TRACKS[kind] for kind in album_kinds))
+    album_years = [_year(rng) for _ in range(albums)]
+    album_genres = [_sample(rng, genre_names, genre_weights, rng.randint(1, 3)) for _ in range(albums)]
+
+    for i in range(tracks):
+        record = {"name": f"Track {i}", "length_in_milliseconds": _length(rng)}
+        if i < albums:  # No empty album
+            a = i
+        elif album_names and rng.random() < 0.9:
+            a = rng.choices(range(albums), cum_weights=album_track_weights)[0]
+        else:
+            a = None
+        if a is not None:
+            artist = album_artists[a]
+            record.update(album=album_names[a], album_type=album_kinds[a], album_artist=artist,
+                          year=album_years[a])
+            if artist == "Various Artists":
+                artist = rng.choices(performers, performer_weights)[0]
+            track_genres = album_genres[a]
+        else:
+            artist = rng.choices(performers, performer_weights)[0]
+            track_genres = _sample(rng, genre_names, genre_weights, rng.randint(1, 2))
+
+        record["artists"] = [artist]
+        if rng.random() < 0.1:  # A featured artist
+            record["artists"].append(rng.choices(performers, performer_weights)[0])
+        record["artists"] = list(dict.fromkeys(record["artists"]))
+        record["genres"] = track_genres
+
+        if rng.random() < lyrics_ratio:
+            record["lyrics"] = _lyrics(rng)
+            writers = members.get(artist) or [artist]
+            record["lyrics_written_by"] = rng.sample(writers, rng.randint(1, min(2, len(writers))))
+        yield record
+
+
+def populate(onto: owl.Ontology, batch_size: int = 10000, **parameters) -> int:
+    """Ingest a synthetic catalog into the ontology and return the record count.
+
+    The keyword arguments are those of `generate()`.
+    """
+    return CatalogIngestor(onto, batch_size).ingest(generate(**parameters))
+
+
+def _genre_name(i: int) -> str:
+    name = GENRE_NAMES[i % len(GENRE_NAMES)]
+    return name if i < len(GENRE_NAMES) else f"{name} {i // len(GENRE_NAMES) + 1}"
+
+
+def _zipf_weights(count: int, exponent: float = 1.0) -> List[float]:
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+def _sample(rng: random.Random, population: Sequence[str], weights: Sequence[float], k: int) -> List[str]:
+    """Sample up to `k` distinct weighted elements."""
+
+    if not population:
+        return []
+    return list(dict.fromkeys(rng.choices(population, weights, k=k)))
+
+
+def _year(rng: random.Random) -> int:
+    # Skewed towards recent years, as catalogs are
+    return LAST_YEAR - min(int(rng.expovariate(1 / 15)), LAST_YEAR - FIRST_YEAR)
+
+
+def _length(rng: random.Random) -> int:
+    length = rng.lognormvariate(math.log(MEDIAN_TRACK_LENGTH), 0.35)
+    return int(min(max(length, 30000), 1800000))
+
+
+def _lyrics(rng: random.Random) -> str:
+    return "\n".join(
+        " ".join(rng.choices(LYRICS_WORDS, k=rng.randint(3, 7))).capitalize()
+        for _ in range(rng.randint(4, 16))
+    )
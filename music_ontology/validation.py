@@ -0,0 +1,212 @@
+"""A closed-world validator of the constraints declared by the music ontology's schema."""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import owlready2 as owl
+from owlready2.base import _universal_datatype_2_abbrev, owl_named_individual, rdf_type
+
+CONSTRAINTS = ("functional", "inverse", "disjoint", "domain", "range")
+
+_DIRECT, _INVERSE = 1, 2
+"""The sides of an inverse pair a fact was asserted through."""
+
+
+class Violation(NamedTuple):
+    """An individual breaking a constraint of the schema.
+
+    `values` are the conflicting values of a functional property, the
+    disjoint classes of the individual, or the classes the domain or range of
+    `property` requires (as IRIs or literals).
+    """
+
+    constraint: str
+    individual: str
+    property: Optional[str]
+    values: Tuple[object, ...]
+
+    def __str__(self) -> str:
+        values = ", ".join(map(str, self.values))
+        if self.constraint == "disjoint":
+            return f"{self.individual} is an instance of disjoint classes: {values}"
+        if self.constraint in ("domain", "range"):
+            return f"{self.individual} is not typed as the {self.constraint} of {self.property}: {values}"
+        if self.constraint == "inverse":
+            return f"{self.individual} has {self.property} values which its inverse contradicts: {values}"
+        return f"{self.individual} has several values of the functional {self.property}: {values}"
+
+
+class ConstraintValidator:
+    """Checks the individuals against the constraints of the schema and reports every violation.
+
+    The constraints are read from the schema: functional properties, disjoint
+    classes (`AllDisjoint`), domains and ranges (datatypes for data
+    properties), and inverse pairs, whose facts count for both properties,
+    whichever side they were asserted through. A functional property with
+    values asserted through both sides which disagree (e.g. `has_lyrics` and
+    `are_of_track`) is reported as an "inverse" violation.
+
+    Everything is checked under the closed-world assumption in one pass
+    over the types, one over the relations and one over the data values of
+    the quadstore, without a reasoner. An individual whose types are all more
+    general than a domain or range (e.g. an `Artist` member of an ensemble,
+    which a reasoner would infer to be a `SoloArtist`) is not reported; one
+    with unrelated types or none is.
+    """
+
+    def __init__(self, onto: owl.Ontology):
+        self.onto = onto
+        self.world = onto.world
+        self._db = self.world.graph.db
+        properties = list(onto.properties())
+        self._objects = [prop for prop in properties if issubclass(prop, owl.ObjectProperty)]
+        self._datas = [prop for prop in properties if issubclass(prop, owl.DataProperty)]
+        self._compatible: Dict[int, Set[int]] = {}
+
+    def validate(self) -> List[Violation]:
+        """Return all the violations, sorted by individual."""
+
+        types = self._types()
+        found: Dict[Tuple[str, int, Optional[int]], Set[object]] = {}
+
+        def report(constraint: str, individual: int, prop: Optional[owl.Property], values: Iterable[object]):
+            key = constraint, individual, prop.storid if prop is not None else None
+            found.setdefault(key, set()).update(values)
+
+        for classes in self._disjoint_classes():
+            descendants = [(Class, self._descendants(Class)) for Class in classes]
+            for individual, individual_types in types.items():
+                members = [Class for Class, storids in descendants if individual_types & storids]
+                if len(members) > 1:
+                    report("disjoint", individual, None, (Class.iri for Class in members))
+
+        self._validate_objects(types, report)
+        self._validate_datas(types, report)
+
+        unabbreviate = self.world._unabbreviate
+        violations = [
+            Violation(constraint, unabbreviate(individual), None if p is None else unabbreviate(p),
+                      tuple(sorted(values, key=str)))
+            for (constraint, individual, p), values in found.items()
+        ]
+        violations.sort(key=lambda violation: (violation.individual, CONSTRAINTS.index(violation.constraint),
+                                               violation.property or ""))
+        return violations
+
+    def _validate_objects(self, types: Dict[int, Set[int]], report):
+        pairs: Dict[int, Tuple[owl.Property, int]] = {}
+        relations = []
+        for prop in self._objects:
+            if prop.storid in pairs:
+                continue
+            inverse = prop.inverse_property
+            relations.append((prop, inverse))
+            pairs[prop.storid] = prop, _DIRECT
+            if inverse is not None:
+                pairs[inverse.storid] = prop, _INVERSE
+
+        facts: Dict[int, Dict[Tuple[int, int], int]] = {prop.storid: {} for prop, _ in relations}
+        for s, p, o in self._db.execute(
+                f"SELECT s, p, o FROM objs WHERE p IN ({','.join(map(str, pairs))}) AND s>0 AND o>0"):
+            prop, side = pairs[p]
+            if side == _INVERSE:
+                s, o = o, s
+            relation = facts[prop.storid]
+            relation[s, o] = relation.get((s, o), 0) | side
+
+        for prop, inverse in relations:
+            relation = facts[prop.storid]
+            domain, range = list(prop.domain), list(prop.range)
+            if inverse is not None:
+                domain += inverse.range
+                range += inverse.domain
+            for (s, o) in relation:
+                self._check_types(types, s, domain, "domain", prop, report)
+                self._check_types(types, o, range, "range", prop, report)
+
+            if owl.FunctionalProperty in prop.is_a:
+                self._check_functional(
+                    ((s, o, sides) for (s, o), sides in relation.items()), prop, report)
+            if inverse is not None and owl.FunctionalProperty in inverse.is_a:
+                self._check_functional(
+                    ((o, s, _swap(sides)) for (s, o), sides in relation.items()), inverse, report)
+
+    def _validate_datas(self, types: Dict[int, Set[int]], report):
+        props = {prop.storid: prop for prop in self._datas}
+        values: Dict[Tuple[int, int], Set[object]] = {}
+        for s, p, o, d in self._db.execute(
+                f"SELECT s, p, o, d FROM datas WHERE p IN ({','.join(map(str, props))}) AND s>0"):
+            prop = props[p]
+            self._check_types(types, s, prop.domain, "domain", prop, report)
+            if not _has_datatype(d, prop.range):
+                report("range", s, prop, (getattr(datatype, "__name__", datatype) for datatype in prop.range))
+            if owl.FunctionalProperty in prop.is_a:
+                values.setdefault((s, p), set()).add(o)
+
+        for (s, p), found in values.items():
+            if len(found) > 1:
+                report("functional", s, props[p], found)
+
+    def _check_functional(self, facts: Iterable[Tuple[int, int, int]], prop: owl.Property, report):
+        values: Dict[int, Dict[int, int]] = {}
+        for s, o, sides in facts:
+            values.setdefault(s, {})[o] = sides
+        unabbreviate = self.world._unabbreviate
+        for s, found in values.items():
+            if len(found) > 1:
+                direct = sum(bool(sides & _DIRECT) for sides in found.values())
+                inverse = sum(bool(sides & _INVERSE) for sides in found.values())
+                constraint = "functional" if direct > 1 or inverse > 1 else "inverse"
+                report(constraint, s, prop, (unabbreviate(o) for o in found))
+
+    def _check_types(self, types: Dict[int, Set[int]], individual: int, required: list, constraint: str,
+                     prop: owl.Property, report):
+        individual_types = types.get(individual, set())
+        for Class in required:
+            if isinstance(Class, owl.ThingClass) and not individual_types & self._compatible_with(Class):
+                report(constraint, individual, prop, (Class.iri,))
+
+    def _types(self) -> Dict[int, Set[int]]:
+        """Return the types of every named individual, in all the ontologies of the world."""
+
+        types: Dict[int, Set[int]] = {}
+        for s, o in self._db.execute("SELECT s, o FROM objs WHERE p=? AND s>0", (rdf_type,)):
+            types.setdefault(s, set())
+            if o != owl_named_individual:
+                types[s].add(o)
+        return types
+
+    def _disjoint_classes(self) -> List[List[owl.ThingClass]]:
+        return [
+            [Class for Class in axiom.entities if isinstance(Class, owl.ThingClass)]
+            for ontology in (self.onto, *self.onto.imported_ontologies)
+            for axiom in ontology.disjoint_classes()
+        ]
+
+    def _descendants(self, Class: owl.ThingClass) -> Set[int]:
+        return {descendant.storid for descendant in Class.descendants()}
+
+    def _compatible_with(self, Class: owl.ThingClass) -> Set[int]:
+        """Return the classes of the individuals which are or may be inferred to be instances of the class."""
+
+        compatible = self._compatible.get(Class.storid)
+        if compatible is None:
+            compatible = self._compatible[Class.storid] = self._descendants(Class) | {
+                ancestor.storid for ancestor in Class.ancestors()}
+        return compatible
+
+
+def validate(onto: owl.Ontology) -> List[Violation]:
+    """Return all the violations of the constraints of the schema by the individuals of the ontology."""
+    return ConstraintValidator(onto).validate()
+
+
+def _swap(sides: int) -> int:
+    return ((sides & _DIRECT) and _INVERSE) | ((sides & _INVERSE) and _DIRECT)
+
+
+def _has_datatype(datatype, required: list) -> bool:
+    if not required:
+        return True
+    if str in required and (isinstance(datatype, str) or datatype == 0):  # Language tags, plain literals
+        return True
+    return any(_universal_datatype_2_abbrev.get(python_type) == datatype for python_type in required)
@@ -0,0 +1,292 @@
+"""Long-lived reasoner worker processes."""
+
+import io
+import multiprocessing
+import queue
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import owlready2 as owl
+
+from music_ontology.changes import ChangeTracker
+from music_ontology.classifier import ClosedWorldClassifier, classify
+from music_ontology.instrumentation import phase
+
+Snapshot = Tuple[List[str], List[Tuple[str, str, str]], List[Tuple[str, str, object, object]]]
+"""The subjects of a delta and their current object and data triples, by IRI."""
+
+
+class WorkerError(Exception):
+    """Raised when a reasoner worker fails."""
+
+
+class ReasonerWorker:
+    """A local process keeping a mirror of the ontology warm between calls.
+
+    The worker is started and loaded with the whole asserted ontology once.
+    Each later call only streams the triples of the changed individuals to it;
+    the worker patches its mirror, re-classifies the changed neighbourhood and
+    sends back the inferences.
+    """
+
+    def __init__(self, timeout: float = 60):
+        self.timeout = timeout
+        context = multiprocessing.get_context("spawn")
+        self._connection, child = context.Pipe()
+        self._process = context.Process(target=_serve, args=(child,), daemon=True)
+        self._process.start()
+        child.close()
+        self.loaded = False
+
+    def load(self, onto: owl.Ontology) -> Tuple[Optional[List[str]], Dict[str, List[str]]]:
+        """Send the whole asserted ontology and classify it."""
+
+        # RDF/XML since owlready2's N-Triples parser rejects IRIs with spaces
+        rdfxml = io.BytesIO()
+        onto.save(rdfxml, format="rdfxml")
+        result = self._call(("load", onto.base_iri, rdfxml.getvalue()))
+        self.loaded = True
+        return result
+
+    def update(self, snapshot: Snapshot) -> Tuple[Optional[List[str]], Dict[str, List[str]]]:
+        """Send the current triples of the changed individuals and reclassify them."""
+        return self._call(("update", snapshot))
+
+    def close(self):
+        """Stop the worker process."""
+
+        if self._process.is_alive():
+            try:
+                self._connection.send(("close",))
+            except OSError:
+                pass
+            self._process.join(self.timeout)
+        self._stop()
+
+    def _stop(self):
+        """Kill the worker process if it is still running and release its resources."""
+
+        if self._process.is_alive():
+            self._process.kill()
+        self._process.join()
+        self._connection.close()
+
+    @property
+    def alive(self) -> bool:
+        return self._process.is_alive()
+
+    def _call(self, message: tuple):
+        try:
+            with phase("reasoner_io"):
+                self._connection.send(message)
+                if not self._connection.poll(self.timeout):
+                    # Still busy with the call: closing it would wait for another timeout
+                    self._stop()
+                    raise WorkerError("The reasoner worker timed out.")
+                status, *result = self._connection.recv()
+        except (EOFError, OSError) as error:
+            raise WorkerError("The reasoner worker died.") from error
+        if status != "ok":
+            raise WorkerError(result[0])
+        return result
+
+
+class ReasonerSession:
+    """Reasons over an ontology with a pool of warm reasoner workers.
+
+    Changes to the ontology are tracked, and each `reason()` call hands the
+    individuals changed since a worker's previous call to an idle worker
+    only. Concurrent callers are served by up to `workers` processes. If a
+    worker fails, or if `workers` is 0, the session falls back to the one-shot
+    `fallback` reasoner in the calling process and replaces the worker.
+    Inferences are applied in the order of the snapshots they were made from:
+    the individuals of a worker finishing after one with a newer snapshot are
+    reclassified in the calling process instead.
+    """
+
+    def __init__(self, onto: owl.Ontology, workers: int = 1, timeout: float = 60,
+                 fallback: Callable[[owl.Ontology], None] = classify):
+        self.onto = onto
+        self.timeout = timeout
+        self.fallback = fallback
+        self.tracker = ChangeTracker(onto).start()
+        self._classifier = ClosedWorldClassifier(onto)
+        self._lock = threading.RLock()
+        self._idle: "queue.Queue[Optional[ReasonerWorker]]" = queue.Queue()
+        self._pending: Dict[ReasonerWorker, Set[int]] = {}
+        self._taken = self._applied = 0  # The sequence numbers of the snapshots
+        for _ in range(workers):
+            self._idle.put(None)  # Started on first use
+        self._size = workers
+
+    def reason(self):
+        """Bring the inferences of the ontology up to date."""
+
+        if not self._size:
+            with self._lock:
+                self.tracker.clear()
+                self.fallback(self.onto)
+            return
+
+        worker = self._idle.get()
+        try:
+            worker = self._reason_with(worker)
+        finally:
+            self._idle.put(worker)
+
+    def close(self):
+        """Stop the workers and the change tracking."""
+
+        self.tracker.stop()
+        for _ in range(self._size):
+            worker = self._idle.get()
+            if worker is not None:
+                worker.close()
+        self._pending.clear()
+        self._size = 0
+
+    def __enter__(self) -> "ReasonerSession":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _reason_with(self, worker: Optional[ReasonerWorker]) -> Optional[ReasonerWorker]:
+        with self._lock:
+            dirty = self.tracker.clear()
+            for pending in self._pending.values():
+                pending.update(dirty)
+
+        try:
+            if worker is None or not worker.alive:
+                worker = ReasonerWorker(self.timeout)
+            if not worker.loaded:
+                with self._lock:
+                    self._pending[worker] = set()
+                    sequence = self._take()
+                    result = worker.load(self.onto)
+            else:
+                with self._lock:
+                    snapshot = self._snapshot(self._pending[worker])
+                    self._pending[worker] = set()
+                    sequence = self._take()
+                result = worker.update(snapshot)
+        except WorkerError:
+            with self._lock:
+                if worker is not None:
+                    self._pending.pop(worker, None)
+                    worker.close()
+                self.fallback(self.onto)
+                self._applied = self._take()
+            return None
+
+        with self._lock:
+            if sequence < self._applied:
+                # A worker with a newer snapshot finished first: these inferences may be stale
+                scope = result[0]
+                abbreviate = self.onto.world._abbreviate
+                self._classifier.classify(None if scope is None else {abbreviate(s) for s in scope})
+            else:
+                self._apply(*result)
+                self._applied = sequence
+        return worker
+
+    def _take(self) -> int:
+        """Return the sequence number of a new snapshot."""
+
+        self._taken += 1
+        return self._taken
+
+    def _snapshot(self, dirty: Set[int]) -> Snapshot:
+        world = self.onto.world
+        db = world.graph.db
+        c = self.onto.graph.c
+        subjects = sorted(dirty)
+        ids = ",".join(map(str, subjects))
+        objs = db.execute(
+            f"""SELECT rs.iri, rp.iri, ro.iri FROM objs q
+                JOIN resources rs ON rs.storid=q.s
+                JOIN resources rp ON rp.storid=q.p
+                JOIN resources ro ON ro.storid=q.o
+                WHERE q.c=? AND q.s IN ({ids})""", (c,)).fetchall()
+        datas = db.execute(
+            f"""SELECT rs.iri, rp.iri, q.o, COALESCE(rd.iri, q.d) FROM datas q
+                JOIN resources rs ON rs.storid=q.s
+                JOIN resources rp ON rp.storid=q.p
+                LEFT JOIN resources rd ON rd.storid=q.d
+                WHERE q.c=? AND q.s IN ({ids})""", (c,)).fetchall()
+        return [world._unabbreviate(s) for s in subjects], objs, datas
+
+    def _apply(self, scope: Optional[List[str]], inferred: Dict[str, List[str]]):
+        abbreviate = self.onto.world._abbreviate
+        self._classifier.apply(
+            {abbreviate(s): {abbreviate(o) for o in types} for s, types in inferred.items()},
+            None if scope is None else {abbreviate(s) for s in scope},
+        )
+
+
+def _serve(connection):
+    """The main loop of a worker process."""
+
+    world = owl.World()
+    onto = classifier = None
+
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            return
+        if message[0] == "close":
+            return
+
+        try:
+            if message[0] == "load":
+                _, base_iri, rdfxml = message
+                onto = world.get_ontology(base_iri).load(fileobj=io.BytesIO(rdfxml))
+                classifier = ClosedWorldClassifier(onto)
+                scope, inferred = None, classifier.classify()
+            else:
+                dirty = _patch(onto, *message[1])
+                scope = classifier.dirty_closure(dirty)
+                inferred = classifier.classify(scope)
+                scope = [world._unabbreviate(s) for s in scope]
+
+            connection.send(("ok", scope, {
+                world._unabbreviate(s): [world._unabbreviate(o) for o in types]
+                for s, types in inferred.items()
+            }))
+        except Exception as error:
+            connection.send(("error", f"{type(error).__name__}: {error}"))
+
+
+def _patch(onto: owl.Ontology, subjects: List[str], objs: list, datas: list) -> Set[int]:
+    """Replace the asserted triples of the given subjects in the mirror."""
+
+    world = onto.world
+    db = world.graph.db
+    c = onto.graph.c
+    abbreviate = world._abbreviate
+
+    def datatype(d):
+        if isinstance(d, str) and not d.startswith("@"):
+            return abbreviate(d)
+        return d
+
+    subjects = [abbreviate(s) for s in subjects]
+    dirty = set(subjects)
+    with onto:
+        # The objects of the replaced triples may lose a neighbour
+        for s in subjects:
+            dirty.update(o for (o,) in db.execute(
+                "SELECT o FROM objs WHERE c=? AND s=? AND o>0", (c, s)))
+        db.executemany("DELETE FROM objs WHERE c=? AND s=?", ((c, s) for s in subjects))
+        db.executemany("DELETE FROM datas WHERE c=? AND s=?", ((c, s) for s in subjects))
+
+        triples = [(abbreviate(s), abbreviate(p), abbreviate(o)) for s, p, o in objs]
+        db.executemany("INSERT INTO objs VALUES (?,?,?,?)", ((c, *triple) for triple in triples))
+        db.executemany(
+            "INSERT INTO datas VALUES (?,?,?,?,?)",
+            ((c, abbreviate(s), abbreviate(p), o, datatype(d)) for s, p, o, d in datas))
+
+    dirty.update(o for _, _, o in triples)
+    return dirty
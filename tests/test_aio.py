@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import time
+import unittest
+
+import owlready2 as owl
+
+from music_ontology.aio import AsyncCatalog, ReadWriteLock
+from music_ontology.ontology import MusicOntologyProvider
+
+
+class AsyncCatalogTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.onto = MusicOntologyProvider("http://test.org/aio.owl", world=owl.World()).create()
+        self.catalog = AsyncCatalog(self.onto, max_workers=4)
+
+    async def asyncTearDown(self):
+        await self.catalog.close()
+
+    async def test_concurrent_lookups_are_batched(self):
+        """Test that the lookups made at the same time are resolved in one batch, each name once."""
+
+        onto = self.onto
+        names = ["Rush", "Tom Sawyer", "Rush", "Red Barchetta", "Rush", "Nothing"]
+        entities = await self.catalog.entities(names)
+
+        self.assertEqual([onto[name] for name in names], entities)
+        self.assertEqual(1, self.catalog.batches)
+        self.assertEqual(2, self.catalog.coalesced)
+
+    async def test_reads(self):
+        """Test that the reads agree with the synchronous services."""
+
+        onto = self.onto
+        catalog = self.catalog
+        rush = onto.Rush
+
+        self.assertEqual([rush], await catalog.find("rush"))
+        self.assertEqual(catalog.index.tracks_by_artist(rush), await catalog.tracks_by_artist(rush))
+        self.assertEqual(catalog.index.discography(rush), await catalog.discography(rush))
+        self.assertEqual(list(catalog.queries.run("tracks_by_artist", rush)),
+                         await catalog.query("tracks_by_artist", rush))
+        self.assertIsNone(catalog.lyrics)
+        self.assertEqual(onto["Tom Sawyer"], (await catalog.search("warrior"))[0].track)
+        self.assertIsNotNone(catalog.lyrics)
+        self.assertEqual(onto["Tom Sawyer"].length_in_milliseconds,
+                         await catalog.read(lambda: onto["Tom Sawyer"].length_in_milliseconds))
+
+    async def test_identical_reads_in_flight_are_coalesced(self):
+        """Test that identical reads in flight at the same time run once."""
+
+        rush = self.onto.Rush
+        results = await asyncio.gather(*(self.catalog.tracks_by_artist(rush) for _ in range(5)))
+
+        self.assertEqual(4, self.catalog.coalesced)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    async def test_writes_are_serialized(self):
+        """Test that writes run one at a time, in order, and are seen by the following reads."""
+
+        onto = self.onto
+        order = []
+
+        def add(name: str):
+            order.append(name)
+            with onto:
+                return onto.Track(name, artists=[onto.Rush])
+
+        names = [f"Track {i}" for i in range(20)]
+        tracks = await asyncio.gather(*(self.catalog.write(add, name) for name in names))
+
+        self.assertEqual(names, order)
+        self.assertTrue(set(tracks) <= set(await self.catalog.tracks_by_artist(onto.Rush)))
+        self.assertEqual(tracks[0], await self.catalog.entity("Track 0"))
+
+    async def test_failed_write(self):
+        """Test that a failed write raises to its caller only."""
+
+        def fail():
+            raise ValueError("failed")
+
+        with self.assertRaises(ValueError):
+            await self.catalog.write(fail)
+        self.assertEqual(1, await self.catalog.ingest([{"name": "After", "artists": ["Rush"]}]))
+        self.assertIn(self.onto.After, await self.catalog.tracks_by_artist(self.onto.Rush))
+
+    async def test_close_restores_the_world(self):
+        """Test that closing the catalog runs the queued writes and unwraps the world."""
+
+        write = asyncio.ensure_future(self.catalog.ingest([{"name": "Queued", "artists": ["Rush"]}]))
+        await asyncio.sleep(0)
+        await self.catalog.close()
+
+        self.assertEqual(1, await write)
+        self.assertNotIn("_get_by_storid", self.onto.world.__dict__)
+
+    async def test_index_is_built_on_the_reader_pool(self):
+        """Test that the index is not built by the constructor but by the first read needing it."""
+
+        self.assertIsNone(self.catalog._index)
+        self.assertEqual([self.onto.Rush], await self.catalog.find("rush"))
+        self.assertIsNotNone(self.catalog._index)
+
+    async def test_close_does_not_block_the_loop(self):
+        """Test that the event loop keeps running while closing waits for the running reads."""
+
+        release = threading.Event()
+        read = asyncio.ensure_future(self.catalog.read(release.wait))
+        await asyncio.sleep(0.01)
+        timer = threading.Timer(1, release.set)  # Ends the test should closing block the loop
+        timer.start()
+        close = asyncio.ensure_future(self.catalog.close())
+        await asyncio.sleep(0.05)
+
+        self.assertFalse(close.done())
+        release.set()
+        await close
+        timer.cancel()
+        self.assertTrue(await read)
+
+
+class ReadWriteLockTests(unittest.TestCase):
+    def test_writer_is_exclusive(self):
+        """Test that readers share the lock and that a writer holds it alone."""
+
+        lock = ReadWriteLock()
+        active = []
+        overlaps = []
+
+        def use(kind: str):
+            with lock.writing() if kind == "writer" else lock.reading():
+                active.append(kind)
+                overlaps.append(list(active))
+                time.sleep(0.01)
+                active.remove(kind)
+
+        threads = [threading.Thread(target=use, args=(kind,)) for kind in ["reader"] * 4 + ["writer"] * 2]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(any(overlap.count("reader") > 1 for overlap in overlaps))
+        self.assertTrue(all(overlap == ["writer"] for overlap in overlaps if "writer" in overlap))
@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+
+import owlready2 as owl
+
+from music_ontology.cache import ReasoningCache
+from music_ontology.classifier import ClosedWorldClassifier
+from music_ontology.ontology import MusicOntologyProvider
+
+
+def classify(onto):
+    ClosedWorldClassifier(onto).classify()
+
+
+def fail(onto):
+    raise AssertionError("The reasoner should not run on a cache hit.")
+
+
+class ReasoningCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ReasoningCache(self.directory.name)
+        self.world = owl.World()
+        self.onto = MusicOntologyProvider("http://test.org/cache.owl", world=self.world).create()
+
+    def tearDown(self):
+        self.world.close()
+        self.directory.cleanup()
+
+    def test_identical_state_reuses_inferences(self):
+        """Test that a second run on the same asserted state skips the reasoner."""
+
+        onto = self.onto
+        self.assertFalse(self.cache.reason(onto, classify, "native"))
+        ClosedWorldClassifier(onto).apply({})
+        self.assertNotIn(onto.Trio, onto.Rush.is_a)
+
+        self.assertTrue(self.cache.reason(onto, fail, "native"))
+        self.assertIn(onto.Trio, onto.Rush.is_a)
+        self.assertIn(onto.InstrumentalAlbum, onto["Liquid Tension Experiment I"].is_a)
+
+    def test_changed_state_misses(self):
+        """Test that changing the asserted triples changes the key."""
+
+        onto = self.onto
+        key = self.cache.key(onto, "native")
+        self.assertEqual(key, self.cache.key(onto, "native"))
+        self.assertNotEqual(key, self.cache.key(onto, "hermit"))
+
+        with onto:
+            onto.Rush.members.append(onto.Artist("John Rutsey"))
+        self.assertNotEqual(key, self.cache.key(onto, "native"))
+        self.assertFalse(self.cache.reason(onto, classify, "native"))
+        self.assertIn(onto.Quartet, onto.Rush.is_a)
+
+    def test_loaded_ontology_has_the_same_key(self):
+        """Test that the key does not depend on the storids of the blank nodes."""
+
+        provider = MusicOntologyProvider("http://test.org/cache.owl", world=self.world)
+        provider.declare_unique_names(self.onto, "ensembles")
+        key = self.cache.key(self.onto, "native")
+        filename = os.path.join(self.directory.name, "ontology.owl")
+        provider.save(self.onto, filename)
+
+        world = owl.World()
+        other = world.get_ontology("http://test.org/other.owl")
+        with other:  # Shifts the storids of the loaded blank nodes
+            class Other(owl.Thing):
+                pass
+            class relation(owl.ObjectProperty):
+                pass
+            Other.is_a.append(relation.some(Other))
+        other.destroy()
+        onto = MusicOntologyProvider("http://test.org/cache.owl", world=world).load(filename)
+        self.assertEqual(key, self.cache.key(onto, "native"))
+        world.close()
+
+    def test_other_ontologies_of_the_world_change_the_key(self):
+        """Test that the key covers every ontology the reasoner sees, but not the inferences."""
+
+        onto = self.onto
+        key = self.cache.key(onto, "native")
+        self.cache.reason(onto, classify, "native")
+        self.assertEqual(key, self.cache.key(onto, "native"))
+
+        extra = self.world.get_ontology("http://test.org/extra.owl")
+        with extra:
+            onto.Rush.members.append(onto.SoloArtist("John Rutsey"))
+        self.assertNotEqual(key, self.cache.key(onto, "native"))
+        self.assertFalse(self.cache.reason(onto, classify, "native"))
+        self.assertIn(onto.Quartet, onto.Rush.is_a)
+
+    def test_literals_of_several_types(self):
+        """Test that the values of a property may mix literal types."""
+
+        onto = self.onto
+        with onto:
+            onto.Limelight.comment = ["Live", 1981]
+        key = self.cache.key(onto, "native")
+        with onto:
+            onto.Limelight.comment = [1981, "Live"]
+        self.assertEqual(key, self.cache.key(onto, "native"))
+
+    def test_invalidation_and_eviction(self):
+        """Test explicit invalidation and size-based eviction."""
+
+        onto = self.onto
+        self.cache.reason(onto, classify, "native")
+        self.assertTrue(self.cache.size() > 0)
+
+        self.cache.invalidate(self.cache.key(onto, "native"))
+        self.assertEqual(0, self.cache.size())
+
+        self.cache.max_size = 1
+        self.cache.reason(onto, classify, "native")
+        self.cache.reason(onto, classify, "other")
+        self.assertFalse(self.cache.reason(onto, classify, "native"))
+        self.assertTrue(self.cache.reason(onto, fail, "native"))
+
+        self.cache.clear()
+        self.assertEqual(0, self.cache.size())
+
+
+if __name__ == "__main__":
+    unittest.main()
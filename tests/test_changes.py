@@ -0,0 +1,50 @@
+import unittest
+
+from music_ontology.changes import ChangeTracker
+from music_ontology.ontology import MusicOntologyProvider
+
+
+class ChangeTrackerTests(unittest.TestCase):
+    def setUp(self):
+        self.onto = MusicOntologyProvider("http://test.org/changes.owl").create()
+
+    def tearDown(self):
+        self.onto.destroy()
+
+    def test_changed_individuals_are_dirty(self):
+        """Test that both ends of a changed object property become dirty."""
+
+        onto = self.onto
+        with ChangeTracker(onto) as tracker:
+            with onto:
+                onto.Rush.members.append(onto["Tony Levin"])
+                onto.Limelight.length_in_milliseconds = 260000
+
+            self.assertLessEqual(
+                {onto.Rush.storid, onto["Tony Levin"].storid, onto.Limelight.storid},
+                tracker.dirty)
+            self.assertNotIn(onto.Osmosis.storid, tracker.dirty)
+
+            tracker.clear()
+            self.assertEqual(set(), tracker.dirty)
+
+        with onto:
+            onto.Osmosis.length_in_milliseconds = 1
+        self.assertEqual(set(), tracker.dirty)
+
+    def test_listeners_receive_changes(self):
+        """Test that listeners are called with the changed triples."""
+
+        onto = self.onto
+        changes = []
+        with ChangeTracker(onto) as tracker:
+            tracker.listeners.append(changes.extend)
+            with onto:
+                onto.Limelight.genres.append(onto.Metal)
+
+        self.assertIn(
+            (onto.Limelight.storid, onto.has_genre.storid, onto.Metal.storid), changes)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import shutil
+import unittest
+
+import owlready2 as owl
+
+from music_ontology.classifier import ClosedWorldClassifier, IncrementalClassifier
+from music_ontology.ingest import CatalogIngestor
+from music_ontology.ontology import MusicOntologyProvider
+
+
+class ClassifierTests(unittest.TestCase):
+    def setUp(self):
+        self.onto = MusicOntologyProvider("http://test.org/classifier.owl").create()
+        self.classifier = ClosedWorldClassifier(self.onto)
+
+    def tearDown(self):
+        self.onto.destroy()
+
+    def test_classify_defined_classes(self):
+        """Test that the defined classes are populated by counting."""
+
+        onto = self.onto
+        self.classifier.classify()
+
+        self.assertEqual([onto.Rush], list(onto.Trio.instances()))
+        self.assertEqual([onto["Dream Theater"]], list(onto.Quintet.instances()))
+        self.assertEqual([onto["Liquid Tension Experiment"]], list(onto.Quartet.instances()))
+        self.assertEqual([], list(onto.Duet.instances()))
+        self.assertIn(onto.InstrumentalTrack, onto.YYZ.is_a)
+        self.assertNotIn(onto.InstrumentalTrack, onto.Limelight.is_a)
+        self.assertEqual(
+            [onto["Liquid Tension Experiment I"]], list(onto.InstrumentalAlbum.instances()))
+
+    def test_reclassify_retracts_stale_inferences(self):
+        """Test that inferences which no longer hold are retracted."""
+
+        onto = self.onto
+        self.classifier.classify()
+
+        with onto:
+            onto.Rush.members.append(onto.Artist("John Rutsey"))
+            va_album = onto.Album("Hits", artist=onto["Various Artists"], tracks=[onto.Limelight])
+        self.classifier.classify()
+
+        self.assertNotIn(onto.Trio, onto.Rush.is_a)
+        self.assertIn(onto.Quartet, onto.Rush.is_a)
+        self.assertIn(onto.VA_Album, va_album.is_a)
+        self.assertNotIn(onto.InstrumentalAlbum, va_album.is_a)
+
+    def test_album_without_tracks_is_instrumental(self):
+        """Test that an album without tracks follows the closed-world reading of `has_track.only()`."""
+
+        onto = self.onto
+        with onto:
+            empty = onto.Album("Unreleased")
+        self.classifier.classify()
+
+        self.assertIn(onto.InstrumentalAlbum, empty.is_a)
+        self.assertEqual(
+            {onto["Liquid Tension Experiment I"], empty}, set(onto.InstrumentalAlbum.instances()))
+
+    @unittest.skipUnless(shutil.which("java"), "HermiT requires java")
+    def test_cross_check_against_hermit(self):
+        """Test that the native classification agrees with HermiT."""
+
+        self.assertEqual([], self.classifier.cross_check())
+
+
+class IncrementalClassifierTests(unittest.TestCase):
+    def setUp(self):
+        self.world = owl.World()
+        self.onto = MusicOntologyProvider("http://test.org/incremental.owl", world=self.world).create()
+        self.classifier = IncrementalClassifier(self.onto)
+        self.classifier.classify()
+
+    def tearDown(self):
+        self.classifier.tracker.stop()
+        self.world.close()
+
+    def test_only_changed_neighbourhood_is_reclassified(self):
+        """Test that a changed track reclassifies only itself and its album."""
+
+        onto = self.onto
+        osmosis = onto.Osmosis
+        album = onto["Liquid Tension Experiment I"]
+        with onto:
+            osmosis.lyrics = onto.Lyrics("'Osmosis' Lyrics", text="...")
+
+        closure = self.classifier.dirty_closure(self.classifier.tracker.dirty)
+        self.assertIn(osmosis.storid, closure)
+        self.assertIn(album.storid, closure)
+        self.assertNotIn(onto.Rush.storid, closure)
+
+        self.classifier.classify()
+
+        self.assertNotIn(onto.InstrumentalTrack, osmosis.is_a)
+        self.assertNotIn(onto.InstrumentalAlbum, album.is_a)
+        self.assertIn(onto.Trio, onto.Rush.is_a)
+        self.assertIn(onto.InstrumentalTrack, onto.YYZ.is_a)
+
+    def test_ingested_changes_are_reclassified(self):
+        """Test that changes written by the bulk ingestion are tracked too."""
+
+        onto = self.onto
+        CatalogIngestor(onto).ingest([
+            {"type": "ensemble", "name": "Rush", "members": ["John Rutsey"]},
+        ])
+
+        self.assertIn(onto.Rush.storid, self.classifier.tracker.dirty)
+        self.classifier.classify()
+        self.assertIn(onto.Quartet, onto.Rush.is_a)
+        self.assertNotIn(onto.Trio, onto.Rush.is_a)
+
+    def test_destroyed_individuals_are_reclassified(self):
+        """Test that destroying an individual reclassifies the individuals related to it."""
+
+        onto = self.onto
+        owl.destroy_entity(onto["Geddy Lee"])
+
+        self.assertIn(onto.Rush.storid, self.classifier.tracker.dirty)
+        self.classifier.classify()
+        self.assertIn(onto.Duet, onto.Rush.is_a)
+        self.assertNotIn(onto.Trio, onto.Rush.is_a)
+
+
+if __name__ == "__main__":
+    unittest.main()
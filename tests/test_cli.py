@@ -0,0 +1,108 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+from music_ontology.__main__ import main
+
+BASE_IRI = "http://test.org/cli.owl"
+
+
+class CommandLineTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory.name, name)
+
+    def run_main(self, *arguments: str) -> str:
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main(list(arguments) + ["--base-iri", BASE_IRI])
+        return output.getvalue()
+
+    def stats(self, *arguments: str) -> dict:
+        return json.loads(self.run_main("stats", "--json", *arguments))
+
+    def test_sample_from_prebuilt_schema(self):
+        """The sample data built over a prebuilt schema file is that built from scratch."""
+
+        self.run_main("schema", "-o", self.path("schema.nt.gz"))
+        self.run_main("sample", "--schema", self.path("schema.nt.gz"), "-o", self.path("reused.nt"))
+        self.run_main("sample", "-o", self.path("scratch.nt"))
+
+        self.assertNotIn("Track", self.stats("-i", self.path("schema.nt.gz"))["individuals"])
+        self.assertEqual(self.stats("-i", self.path("reused.nt")), self.stats("-i", self.path("scratch.nt")))
+
+    def test_ingest_reason_and_export_through_a_quadstore(self):
+        """Every command reads and writes the quadstore when given one."""
+
+        quadstore = self.path("ontology.sqlite3")
+        with open(self.path("dump.jsonl"), "w", encoding="utf8") as file:
+            file.write(json.dumps({"name": "Solo Song", "artists": ["Solo Artist"],
+                                   "length_in_milliseconds": 200000}) + "\n")
+
+        self.run_main("schema", "--quadstore", quadstore)
+        output = self.run_main("ingest", self.path("dump.jsonl"), "--quadstore", quadstore)
+        self.assertIn("Ingested 1 records", output)
+        self.run_main("reason", "--quadstore", quadstore)
+
+        individuals = self.stats("--quadstore", quadstore)["individuals"]
+        self.assertEqual(individuals["Track"], 1)
+        self.assertEqual(individuals["Artist"], 2)
+
+        self.run_main("export", "--quadstore", quadstore, "-o", self.path("columns.npz"))
+        with np.load(self.path("columns.npz")) as columns:
+            self.assertIn("track_length", columns.files)
+
+    def test_stats_as_a_table(self):
+        """Without --json, stats prints a line per class."""
+
+        self.run_main("sample", "-o", self.path("ontology.owl"))
+        lines = self.run_main("stats", "-i", self.path("ontology.owl")).splitlines()
+        self.assertEqual(lines[0].split()[0], "triples")
+        self.assertIn("Track", [line.split()[0] for line in lines])
+
+    def test_validate(self):
+        """validate prints nothing for a valid ontology, and every violation with a failure status otherwise."""
+
+        self.run_main("sample", "-o", self.path("ontology.owl"))
+        self.assertEqual("", self.run_main("validate", "-i", self.path("ontology.owl")))
+
+        with open(self.path("dump.jsonl"), "w", encoding="utf8") as file:
+            file.write(json.dumps({"name": "Rock Song", "artists": ["Rock"], "genres": ["Rock"]}) + "\n")
+        self.run_main("ingest", self.path("dump.jsonl"), "-i", self.path("ontology.owl"),
+                      "-o", self.path("invalid.owl"))
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), self.assertRaises(SystemExit) as exit:
+            main(["validate", "--json", "-i", self.path("invalid.owl"), "--base-iri", BASE_IRI])
+        self.assertEqual(1, exit.exception.code)
+        violation = json.loads(output.getvalue())
+        self.assertEqual(("range", BASE_IRI + "#Rock"), (violation["constraint"], violation["individual"]))
+
+    def test_reason_requires_an_output(self):
+        """reason refuses to run when its inferences would be thrown away."""
+
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr), self.assertRaises(SystemExit) as exit:
+            main(["reason", "-i", self.path("ontology.owl")])
+        self.assertEqual(2, exit.exception.code)
+        self.assertIn("--quadstore", stderr.getvalue())
+
+    def test_provider_imports_features_lazily(self):
+        """Importing the provider imports none of the modules of its features."""
+
+        code = "import sys, music_ontology.ontology; print(*sorted(sys.modules))"
+        modules = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                 cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.split()
+        self.assertEqual(["music_ontology.ontology"],
+                         [module for module in modules if module.startswith("music_ontology.")])
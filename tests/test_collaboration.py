@@ -0,0 +1,72 @@
+import unittest
+
+import owlready2 as owl
+
+from music_ontology.collaboration import UNREACHABLE, build
+from music_ontology.ingest import CatalogIngestor
+from music_ontology.ontology import MusicOntologyProvider
+
+
+class CollaborationGraphTests(unittest.TestCase):
+    def setUp(self):
+        self.onto = MusicOntologyProvider("http://test.org/collaboration.owl", world=owl.World()).create()
+        self.graph = build(self.onto)
+
+    def names(self, ids) -> set:
+        return {self.graph.iri_of(i)[len(self.onto.base_iri):] for i in ids}
+
+    def test_collaborations(self):
+        """Test that members, track artists and lyrics writers collaborate."""
+
+        onto = self.onto
+        graph = self.graph
+        rush = graph.id_of(onto.Rush)
+
+        self.assertEqual({"Geddy Lee", "Alex Lifeson", "Neil Peart", "Hugh Syme", "Pye Dubois"},
+                         self.names(graph.neighbourhood(onto.Rush)))
+        # Hugh Syme played on "Witch Hunt", whose lyrics are by Neil Peart
+        self.assertEqual({"Rush", "Neil Peart"}, self.names(graph.neighbourhood(onto["Hugh Syme"])))
+        self.assertEqual(5, graph.degree()[rush])
+        self.assertEqual(0, graph.degree()[graph.id_of(onto["Various Artists"])])
+        self.assertTrue((graph.adjacency != graph.adjacency.T).nnz == 0)
+
+    def test_shared_members(self):
+        """Test that Dream Theater and LTE share Portnoy, Petrucci and Rudess."""
+
+        self.assertEqual([(self.onto["Liquid Tension Experiment"].iri, 3)],
+                         self.graph.ensembles_sharing_members(self.onto["Dream Theater"]))
+        self.assertEqual([], self.graph.ensembles_sharing_members(self.onto.Rush))
+
+    def test_paths(self):
+        """Test the k-hop neighbourhoods, distances and shortest paths."""
+
+        onto = self.onto
+        graph = self.graph
+        labrie, levin = onto["James LaBrie"], onto["Tony Levin"]
+
+        self.assertEqual({"Dream Theater"}, self.names(graph.neighbourhood(labrie, 1)))
+        self.assertIn("Liquid Tension Experiment", self.names(graph.neighbourhood(labrie, 3)))
+        self.assertNotIn("Tony Levin", self.names(graph.neighbourhood(labrie, 3)))
+        self.assertIn("Tony Levin", self.names(graph.neighbourhood(labrie, 4)))
+
+        path = graph.shortest_path(labrie, levin)
+        self.assertEqual(5, len(path))
+        self.assertEqual((labrie.iri, levin.iri), (path[0], path[-1]))
+        self.assertEqual(4, graph.distances(labrie)[graph.id_of(levin)])
+
+        self.assertIsNone(graph.shortest_path(labrie, onto.Rush))
+        self.assertEqual(UNREACHABLE, graph.distances(labrie)[graph.id_of(onto.Rush)])
+        components = graph.components()
+        self.assertNotEqual(components[graph.id_of(labrie)], components[graph.id_of(onto.Rush)])
+
+    def test_ingested_collaborations(self):
+        """Test that ingested tracks and lyrics are collaborations too."""
+
+        CatalogIngestor(self.onto).ingest([{
+            "name": "Crossover", "artists": ["Rush", "Dream Theater"],
+            "lyrics": "...", "lyrics_written_by": ["New Writer"],
+        }])
+        graph = self.graph = build(self.onto)
+
+        self.assertEqual(2, len(graph.shortest_path(self.onto.Rush, self.onto["Dream Theater"])))
+        self.assertEqual({"Rush", "Dream Theater"}, self.names(graph.neighbourhood(self.onto["New Writer"])))
@@ -0,0 +1,75 @@
+import io
+import math
+import unittest
+
+import numpy as np
+
+from music_ontology.columnar import CatalogColumns, export
+from music_ontology.ontology import MusicOntologyProvider
+
+
+class ColumnarTests(unittest.TestCase):
+    def setUp(self):
+        self.onto = MusicOntologyProvider("http://test.org/columnar.owl").create()
+        self.columns = export(self.onto)
+
+    def tearDown(self):
+        self.onto.destroy()
+
+    def test_export(self):
+        """Test that the arrays hold the values of the individuals."""
+
+        onto = self.onto
+        columns = self.columns
+
+        yyz = columns.id_of("track", onto.YYZ.iri)
+        self.assertEqual(onto.YYZ.iri, columns.iri_of("track", yyz))
+        self.assertEqual(onto.YYZ.length_in_milliseconds, columns.track_length[yyz])
+
+        album = onto["Moving Pictures"]
+        a = columns.id_of("album", album.iri)
+        self.assertEqual(album.year, columns.album_year[a])
+        tracks = columns.album_track_ids[columns.album_track_offsets[a]:columns.album_track_offsets[a + 1]]
+        self.assertEqual(sorted(track.iri for track in album.tracks),
+                         sorted(columns.iri_of("track", t) for t in tracks))
+
+        genres = columns.track_genre_ids[columns.track_genre_offsets[yyz]:columns.track_genre_offsets[yyz + 1]]
+        self.assertEqual(sorted(genre.iri for genre in onto.YYZ.genres),
+                         sorted(columns.iri_of("genre", g) for g in genres))
+
+    def test_aggregates(self):
+        """Test that the vectorized aggregates agree with the entities."""
+
+        onto = self.onto
+        columns = self.columns
+
+        album = onto["Moving Pictures"]
+        self.assertEqual(
+            sum(track.length_in_milliseconds or 0 for track in album.tracks),
+            columns.album_durations()[columns.id_of("album", album.iri)])
+
+        rock = onto["Progressive Rock"]
+        lengths = [track.length_in_milliseconds for track in onto.Track.instances()
+                   if rock in track.genres and track.length_in_milliseconds is not None]
+        self.assertTrue(math.isclose(
+            sum(lengths) / len(lengths),
+            columns.mean_length_by_genre()[columns.id_of("genre", rock.iri)]))
+
+        years, counts = columns.albums_per_year()
+        expected = {}
+        for album in onto.Album.instances():
+            if album.year is not None:
+                expected[album.year] = expected.get(album.year, 0) + 1
+        self.assertEqual(expected, dict(zip(years.tolist(), counts.tolist())))
+
+    def test_save_and_load(self):
+        """Test that saved arrays load back identically."""
+
+        file = io.BytesIO()
+        self.columns.save(file)
+        file.seek(0)
+        loaded = CatalogColumns.load(file)
+
+        self.assertEqual(self.columns.iris, loaded.iris)
+        np.testing.assert_array_equal(self.columns.track_artist_ids, loaded.track_artist_ids)
+        np.testing.assert_array_equal(self.columns.album_year, loaded.album_year)
@@ -0,0 +1,90 @@
+import unittest
+
+import owlready2 as owl
+
+from music_ontology.index import CatalogIndex, normalize_name
+from music_ontology.ingest import CatalogIngestor
+from music_ontology.ontology import MusicOntologyProvider
+
+
+class CatalogIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.world = owl.World()
+        self.onto = MusicOntologyProvider("http://test.org/index.owl", world=self.world).create()
+        self.index = CatalogIndex(self.onto)
+
+    def tearDown(self):
+        self.index.close()
+        self.world.close()
+
+    def test_normalize_name(self):
+        """Test that names are normalized for case, accents and punctuation."""
+
+        self.assertEqual("motorhead ace of spades", normalize_name("  Motörhead - Ace of SPADES! "))
+
+    def test_lookups(self):
+        """Test that the lookups agree with the ontology."""
+
+        onto = self.onto
+        index = self.index
+
+        self.assertEqual([onto["Tom Sawyer"]], index.find("tom sawyer"))
+        prog_tracks = [track for track in onto.Track.instances()
+                       if onto["Progressive Rock"] in track.genres]
+        self.assertEqual(sorted(prog_tracks, key=lambda t: t.name),
+                         index.tracks_by_genre(onto["Progressive Rock"]))
+        self.assertIn(onto.YYZ, index.tracks_by_artist(onto.Rush))
+        self.assertIn(onto["Moving Pictures"], index.discography(onto.Rush))
+
+        long_tracks = index.tracks_longer_than(400000)
+        self.assertEqual(
+            sorted((t for t in onto.Track.instances() if (t.length_in_milliseconds or 0) > 400000),
+                   key=lambda t: t.length_in_milliseconds),
+            long_tracks)
+
+        albums = index.albums_in_years(1980, 1990)
+        self.assertIn(onto["Moving Pictures"], albums)
+        self.assertTrue(all(1980 <= album.year <= 1990 for album in albums))
+
+    def test_indexes_follow_changes(self):
+        """Test that the indexes are updated by property changes and ingestion."""
+
+        onto = self.onto
+        index = self.index
+        with onto:
+            onto.YYZ.genres = [onto.Rock]
+            onto.YYZ.length_in_milliseconds = 9999999
+            demo = onto.Album("Demo", artist=onto.Rush, year=1973)
+
+        self.assertNotIn(onto.YYZ, index.tracks_by_genre(onto["Progressive Rock"]))
+        self.assertIn(onto.YYZ, index.tracks_by_genre(onto.Rock))
+        self.assertEqual([onto.YYZ], index.tracks_longer_than(9000000))
+        self.assertEqual([demo], index.albums_in_years(1973, 1973))
+        self.assertEqual(demo, index.discography(onto.Rush)[0])
+        self.assertEqual([demo], index.find("DEMO"))
+
+        CatalogIngestor(onto).ingest([
+            {"name": "Finding My Way", "artists": ["Rush"], "genres": ["Hard Rock"],
+             "length_in_milliseconds": 306000, "album": "Fly by Night", "year": 1975},
+        ])
+
+        track = onto["Finding My Way"]
+        self.assertEqual([track], index.find("finding my way"))
+        self.assertIn(track, index.tracks_by_artist(onto.Rush))
+        self.assertIn(track, index.tracks_by_genre(onto["Hard Rock"]))
+        self.assertEqual([onto["Fly by Night"]], index.albums_in_years(1975, 1975))
+
+    def test_destroyed_individuals_are_forgotten(self):
+        """Test that destroyed individuals are removed from every index."""
+
+        onto = self.onto
+        index = self.index
+        yyz, length = onto.YYZ, onto.YYZ.length_in_milliseconds
+        self.assertIn(yyz, index.tracks_by_artist(onto.Rush))
+        owl.destroy_entity(yyz)
+
+        self.assertEqual([], index.find("yyz"))
+        self.assertNotIn(yyz, index.tracks_by_artist(onto.Rush))
+        self.assertNotIn(yyz, index.tracks_in_length_range(length, length))
+        for genre in onto.Genre.instances():
+            self.assertNotIn(yyz, index.tracks_by_genre(genre))
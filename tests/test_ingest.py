@@ -0,0 +1,77 @@
+import io
+import json
+import unittest
+
+from music_ontology.ingest import CatalogIngestor
+from music_ontology.ontology import MusicOntologyProvider
+
+CSV_DUMP = """name,artists,genres,length_in_milliseconds,album,album_artist,year,lyrics,lyrics_written_by
+Tom Sawyer,Rush,Progressive Rock|Rock,276000,Moving Pictures,Rush,1981,A modern day warrior,Neil Peart|Pye Dubois
+YYZ,Rush,Progressive Rock|Rock,265000,Moving Pictures,Rush,1981,,
+"""
+
+JSONL_DUMP = [
+    {"type": "ensemble", "name": "Rush", "members": ["Geddy Lee", "Alex Lifeson", "Neil Peart"]},
+    {"name": "Limelight", "artists": ["Rush"], "length_in_milliseconds": 259000,
+     "album": "Moving Pictures", "year": 1981},
+]
+
+
+class IngestTests(unittest.TestCase):
+    def setUp(self):
+        self.onto = MusicOntologyProvider("http://test.org/ingest.owl").create(
+            include_examples=False)
+
+    def tearDown(self):
+        self.onto.destroy()
+
+    def test_ingest_csv(self):
+        """Test that a CSV dump populates the same classes and properties."""
+
+        count = CatalogIngestor(self.onto, batch_size=1).ingest_csv(io.StringIO(CSV_DUMP))
+
+        self.assertEqual(count, 2)
+        tom_sawyer = self.onto["Tom Sawyer"]
+        moving_pictures = self.onto["Moving Pictures"]
+        rush = self.onto.Rush
+
+        self.assertIsInstance(tom_sawyer, self.onto.Track)
+        self.assertEqual([rush], tom_sawyer.artists)
+        self.assertEqual(276000, tom_sawyer.length_in_milliseconds)
+        self.assertEqual({"Progressive Rock", "Rock"}, {g.name for g in tom_sawyer.genres})
+        self.assertEqual(1981, moving_pictures.year)
+        self.assertEqual(rush, moving_pictures.artist)
+        self.assertEqual({tom_sawyer, self.onto.YYZ}, set(moving_pictures.tracks))
+        self.assertIn(moving_pictures, tom_sawyer.albums)
+        self.assertEqual("A modern day warrior", tom_sawyer.lyrics.text)
+        self.assertEqual(tom_sawyer, tom_sawyer.lyrics.track)
+        self.assertIn(tom_sawyer.lyrics, self.onto["Neil Peart"].lyrics_written)
+        self.assertIsNone(self.onto.YYZ.lyrics)
+
+    def test_ingest_jsonl_updates_existing_individuals(self):
+        """Test that re-ingesting a record updates instead of duplicating it."""
+
+        ingestor = CatalogIngestor(self.onto)
+        dump = "\n".join(json.dumps(record) for record in JSONL_DUMP)
+        ingestor.ingest_jsonl(io.StringIO(dump))
+        limelight = self.onto.Limelight
+        self.assertEqual(259000, limelight.length_in_milliseconds)
+
+        ingestor.ingest([{"name": "Limelight", "artists": ["Rush"],
+                          "length_in_milliseconds": 260000}])
+
+        self.assertEqual(260000, limelight.length_in_milliseconds)
+        self.assertEqual([self.onto.Rush], limelight.artists)
+        self.assertIsInstance(self.onto.Rush, self.onto.MusicalEnsemble)
+        self.assertEqual(3, len(self.onto.Rush.members))
+
+    def test_unknown_fields_are_reported(self):
+        """Test that misspelled fields are not dropped silently."""
+
+        with self.assertWarnsRegex(UserWarning, "length$"):
+            CatalogIngestor(self.onto).ingest([{"name": "Limelight", "length": 259000}])
+        self.assertIsNone(self.onto.Limelight.length_in_milliseconds)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import owlready2 as owl
+
+from music_ontology.cache import ReasoningCache
+from music_ontology.classifier import ClosedWorldClassifier
+from music_ontology.instrumentation import (
+    Instrumentation, JsonLogSink, MetricsRegistry, PrometheusSink, count_individuals,
+)
+from music_ontology.ontology import MusicOntologyProvider
+
+BASE_IRI = "http://test.org/instrumentation.owl"
+
+
+class InstrumentationTests(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.log = io.StringIO()
+        self.directory = tempfile.TemporaryDirectory()
+        self.prometheus = os.path.join(self.directory.name, "music_ontology.prom")
+        self.provider = MusicOntologyProvider(BASE_IRI, world=owl.World(), instrumentation=Instrumentation([
+            self.registry, JsonLogSink(self.log), PrometheusSink(self.prometheus, self.registry),
+        ]))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_operations_and_phases(self):
+        """Test that operations and their phases are measured."""
+
+        onto = self.provider.create()
+        self.provider.reason(onto)
+        filename = os.path.join(self.directory.name, "ontology.nt")
+        self.provider.save(onto, filename)
+
+        registry = self.registry
+        for operation, phase in [("create", None), ("create", "schema"), ("create", "examples"),
+                                 ("create", "all_different"), ("reason", "infer"),
+                                 ("reason", "apply"), ("save", "serialize")]:
+            self.assertEqual(1, registry.count(operation, phase), (operation, phase))
+        self.assertGreater(registry.total_seconds("create"), registry.total_seconds("create", "schema"))
+        self.assertEqual(len(onto.Track.instances()), registry.individuals["Track"])
+        self.assertEqual(1, registry.individuals["Trio"])
+        self.assertGreater(registry.triples["create"], 0)
+        self.assertGreater(registry.peak_rss_kb, 0)
+
+    def test_json_log(self):
+        """Test that every event is logged as a JSON line."""
+
+        onto = self.provider.create(include_examples=False)
+        ReasoningCache(self.directory.name).reason(
+            onto, lambda onto: ClosedWorldClassifier(onto).classify(), "native")
+
+        events = [json.loads(line) for line in self.log.getvalue().splitlines()]
+        self.assertEqual(["schema", None], [event["phase"] for event in events])
+        self.assertEqual("create", events[-1]["operation"])
+        self.assertIn("individuals", events[-1])
+
+        # Phases outside of an instrumented operation are not measured
+        self.assertEqual(2, len(events))
+
+    def test_prometheus_dump(self):
+        """Test that the registry is dumped in the Prometheus text format."""
+
+        self.provider.create()
+
+        with open(self.prometheus, encoding="utf8") as file:
+            text = file.read()
+        self.assertIn("# TYPE music_ontology_seconds summary", text)
+        self.assertIn('music_ontology_seconds_count{operation="create",phase="all_different"} 1', text)
+        self.assertIn('music_ontology_individuals{class="Track"} ', text)
+        self.assertIn("music_ontology_peak_rss_bytes ", text)
+
+    def test_count_individuals_matches_the_base_iri_literally(self):
+        """Test that "_" in the base IRI is not a wildcard."""
+
+        world = owl.World()
+        onto = world.get_ontology("http://test.org/my_music.owl#")
+        other = world.get_ontology("http://test.org/myXmusic.owl#")
+        with other:
+            class Song(owl.Thing):
+                pass
+        with onto:
+            class Track(owl.Thing):
+                pass
+            Track("Limelight")
+            Song("YYZ")
+        self.assertEqual({"Track": 1}, count_individuals(onto))
+        world.close()
@@ -0,0 +1,81 @@
+import gc
+import os
+import tempfile
+import unittest
+import weakref
+
+import owlready2 as owl
+import owlready2.namespace as owl_namespace
+
+from music_ontology.lazy import LiveEntityCache
+from music_ontology.ontology import MusicOntologyProvider
+
+BASE_IRI = "http://test.org/lazy.owl"
+
+
+class LazyLoadingTests(unittest.TestCase):
+    def setUp(self):
+        self.buffer_size = len(owl_namespace._cache)
+        self.directory = tempfile.TemporaryDirectory()
+        self.quadstore = os.path.join(self.directory.name, "ontology.sqlite3")
+        provider = MusicOntologyProvider(BASE_IRI, quadstore=self.quadstore)
+        provider.create()
+        provider.world.close()
+
+        self.provider = MusicOntologyProvider(BASE_IRI, quadstore=self.quadstore, max_live_individuals=3)
+        self.onto = self.provider.load()
+
+    def tearDown(self):
+        self.provider.live.close()
+        self.provider.world.close()
+        self.directory.cleanup()
+
+    def test_schema_is_loaded(self):
+        """Test that the schema is materialized without any individual."""
+
+        onto = self.onto
+        self.assertIsInstance(onto.Track, owl.ThingClass)
+        self.assertIn(onto.Track, onto.InstrumentalTrack.is_a)
+        self.assertEqual(0, len(self.provider.live))
+
+    def test_live_individuals_are_bounded(self):
+        """Test that only the most recently used individuals are kept alive."""
+
+        onto = self.onto
+        live = self.provider.live
+        yyz = weakref.ref(onto.YYZ)
+        for name in ("Limelight", "Tom Sawyer", "Red Barchetta"):
+            onto[name]
+        gc.collect()
+
+        self.assertEqual(3, len(live))
+        self.assertIsNone(yyz())
+        self.assertEqual(265000, onto.YYZ.length_in_milliseconds)
+        self.assertIn(onto.YYZ.storid, live)
+
+    def test_accesses_refresh_recency(self):
+        """Test that accessing a live individual keeps it alive longer."""
+
+        onto = self.onto
+        live = self.provider.live
+        limelight = onto.Limelight.storid
+        tom_sawyer = onto["Tom Sawyer"].storid
+        onto.Limelight
+        onto["Red Barchetta"]
+        onto.YYZ
+
+        self.assertIn(limelight, live)
+        self.assertNotIn(tom_sawyer, live)
+        self.assertEqual(1, live.hits)
+
+    def test_creation_buffer_is_restored_in_any_order(self):
+        """Test that closing caches out of order restores owlready2's global buffer."""
+
+        world = owl.World()
+        other = LiveEntityCache(world, 2)
+        self.assertEqual(2, len(owl_namespace._cache))
+        self.provider.live.close()
+        self.assertEqual(2, len(owl_namespace._cache))
+        other.close()
+        self.assertEqual(self.buffer_size, len(owl_namespace._cache))
+        world.close()
@@ -0,0 +1,60 @@
+import unittest
+
+import owlready2 as owl
+
+from music_ontology.ingest import CatalogIngestor
+from music_ontology.lyrics import LyricsSearch, fts_expression
+from music_ontology.ontology import MusicOntologyProvider
+
+
+class LyricsSearchTests(unittest.TestCase):
+    def setUp(self):
+        self.onto = MusicOntologyProvider("http://test.org/lyrics.owl", world=owl.World()).create()
+        self.search = LyricsSearch(self.onto)
+
+    def test_fts_expression(self):
+        """Test that queries are translated to escaped FTS5 expressions."""
+
+        self.assertEqual('"modern" "Mean stride" "warr" *', fts_expression('modern "Mean, stride" warr*'))
+        self.assertEqual('"don t"', fts_expression("don't"))
+        self.assertEqual("", fts_expression('"" * ,'))
+
+    def test_ranked_search(self):
+        """Test that matching lyrics are returned with their track, best first."""
+
+        onto = self.onto
+        matches = self.search.search("mean")
+
+        self.assertEqual(onto["'Tom Sawyer' Lyrics"], matches[0].lyrics)
+        self.assertEqual(onto["Tom Sawyer"], matches[0].track)
+        self.assertIn("[Mean]", matches[0].snippet)
+        self.assertEqual(sorted((match.score for match in matches), reverse=True),
+                         [match.score for match in matches])
+
+    def test_phrase_and_prefix(self):
+        """Test that phrases must match in order and prefixes match word starts."""
+
+        onto = self.onto
+        self.assertEqual([onto["'Tom Sawyer' Lyrics"]],
+                         [match.lyrics for match in self.search.phrase("mean mean stride")])
+        self.assertEqual([], self.search.phrase("stride mean mean"))
+        self.assertIn(onto["'Tom Sawyer' Lyrics"],
+                      [match.lyrics for match in self.search.prefix("warri")])
+
+    def test_incremental_updates(self):
+        """Test that added, changed and ingested lyrics are searchable at once."""
+
+        onto = self.onto
+        self.assertEqual(0, self.search.count("xanadu"))
+
+        with onto:
+            onto["'Tom Sawyer' Lyrics"].text = "To seek the sacred river Alph"
+        self.assertEqual(0, self.search.count("warrior"))
+        self.assertEqual(1, self.search.count("alph"))
+
+        CatalogIngestor(onto).ingest([
+            {"name": "Xanadu", "artists": ["Rush"], "lyrics": "To seek the sacred river Alph\nTo walk the caves of ice"},
+        ])
+        matches = self.search.search("caves ice")
+        self.assertEqual([onto.Xanadu], [match.track for match in matches])
+        self.assertEqual(2, self.search.count('"sacred river"'))
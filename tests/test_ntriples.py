@@ -0,0 +1,111 @@
+import io
+import os
+import tempfile
+import unittest
+
+import owlready2 as owl
+
+from music_ontology import ntriples
+from music_ontology.classifier import INFERENCES_IRI, ClosedWorldClassifier
+from music_ontology.ontology import MusicOntologyProvider
+
+BASE_IRI = "http://test.org/ntriples.owl"
+
+
+def triples(onto: owl.Ontology) -> set:
+    """The object and data triples of an ontology by IRI, with blank nodes as None."""
+
+    db = onto.world.graph.db
+    return set(db.execute(
+        """SELECT rs.iri, rp.iri, ro.iri FROM objs q
+           LEFT JOIN resources rs ON rs.storid=q.s
+           JOIN resources rp ON rp.storid=q.p
+           LEFT JOIN resources ro ON ro.storid=q.o
+           WHERE q.c=?
+           UNION SELECT rs.iri, rp.iri, q.o || typeof(q.o) || q.d FROM datas q
+           LEFT JOIN resources rs ON rs.storid=q.s
+           JOIN resources rp ON rp.storid=q.p
+           WHERE q.c=?""", (onto.graph.c, onto.graph.c)))
+
+
+class NTriplesTests(unittest.TestCase):
+    def setUp(self):
+        self.provider = MusicOntologyProvider(BASE_IRI, world=owl.World())
+        self.onto = self.provider.create()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        """Test that a gzipped N-Triples file loads back the same triples."""
+
+        filename = os.path.join(self.directory.name, "ontology.nt.gz")
+        self.provider.save(self.onto, filename, chunk_size=7)
+
+        provider = MusicOntologyProvider(BASE_IRI, world=owl.World())
+        onto = provider.load(filename, batch_size=5)
+
+        self.assertEqual(triples(self.onto), triples(onto))
+        self.assertEqual(len(self.onto.graph), len(onto.graph))
+        self.assertEqual(
+            self.onto["Moving Pictures"].year, onto["Moving Pictures"].year)
+        self.assertIn(
+            "A modern day warrior\nMean mean stride",
+            onto["'Tom Sawyer' Lyrics"].text)
+
+    def test_escaping(self):
+        """Test that IRIs with spaces and literals with quotes are escaped."""
+
+        file = io.StringIO()
+        ntriples.write(self.onto.world, file, [self.onto])
+        text = file.getvalue()
+
+        self.assertIn("<http://test.org/ntriples.owl#Tom\\u0020Sawyer>", text)
+        self.assertNotIn("Tom Sawyer>", text)
+        self.assertIn('"A modern day warrior\\nMean mean stride', text)
+
+    def test_quads(self):
+        """Test that N-Quads keep the inferences in their own ontology."""
+
+        ClosedWorldClassifier(self.onto).classify()
+        filename = os.path.join(self.directory.name, "ontology.nq")
+        self.provider.save(self.onto, filename)
+
+        world = owl.World()
+        onto = MusicOntologyProvider(BASE_IRI, world=world).load(filename)
+
+        self.assertEqual(triples(self.onto), triples(onto))
+        self.assertEqual(
+            triples(self.onto.world.get_ontology(INFERENCES_IRI)),
+            triples(world.get_ontology(INFERENCES_IRI)))
+        self.assertIn(onto.Trio, onto.Rush.is_a)
+
+    def test_blank_node_labels(self):
+        """Test that numbered and other blank node labels get distinct storids in any order."""
+
+        onto = self.onto
+        before = len(onto.graph)
+        ntriples.read(onto, io.StringIO(
+            "_:b1 <http://test.org/p> _:x .\n"
+            "<http://test.org/a> <http://test.org/p> _:b1 .\n"
+            "_:x <http://test.org/p> _:b0 .\n"
+            "_:b0 <http://test.org/p> _:y .\n"
+        ), batch_size=1)
+        db = onto.world.graph.db
+        p = onto.world._abbreviate("http://test.org/p")
+        edges = dict(db.execute("SELECT s, o FROM objs WHERE p=?", (p,)))
+        self.assertEqual(4, len(edges))
+        self.assertEqual(4, len(set(edges.values())))
+        x = edges[edges[onto.world._abbreviate("http://test.org/a")]]
+        self.assertLess(x, 0)
+        self.assertIn(edges[x], edges)
+        self.assertNotIn(onto.world.graph.new_blank_node(), set(edges) | set(edges.values()))
+        self.assertEqual(before + 4, len(onto.graph))
+
+    def test_parse_error(self):
+        """Test that malformed lines are reported with their line number."""
+
+        with self.assertRaises(ntriples.ParseError) as context:
+            ntriples.read(self.onto, io.StringIO("<a> <b> <c> .\n<a> <b> .\n"))
+        self.assertEqual(2, context.exception.line_number)
@@ -0,0 +1,53 @@
+import unittest
+
+import owlready2 as owl
+
+from music_ontology.ontology import MusicOntologyProvider
+from music_ontology.partition import ShardedReasoner, components, shards
+
+
+class PartitionTests(unittest.TestCase):
+    def setUp(self):
+        self.world = owl.World()
+        self.onto = MusicOntologyProvider("http://test.org/partition.owl", world=self.world).create()
+
+    def tearDown(self):
+        self.world.close()
+
+    def test_components_follow_shared_members(self):
+        """Test that ensembles sharing members end up in the same component."""
+
+        onto = self.onto
+        groups = components(onto)
+        group_of = {s: group for group in groups for s in group}
+
+        self.assertIs(group_of[onto["Dream Theater"].storid], group_of[onto["Liquid Tension Experiment"].storid])
+        self.assertIs(group_of[onto.Osmosis.storid], group_of[onto["Mike Portnoy"].storid])
+        self.assertIsNot(group_of[onto.Rush.storid], group_of[onto["Dream Theater"].storid])
+        self.assertIs(group_of[onto.Rush.storid], group_of[onto["'Limelight' Lyrics"].storid])
+        self.assertNotIn(onto.Rock.storid, group_of)
+
+    def test_shards_are_bounded(self):
+        """Test that components are packed into bounded shards."""
+
+        groups = components(self.onto)
+        bound = max(len(group) for group in groups)
+
+        packed = shards(self.onto, bound)
+        self.assertTrue(all(len(shard) <= bound for shard in packed))
+        self.assertEqual(set().union(*groups), set().union(*packed))
+        self.assertLessEqual(len(packed), len(groups))
+
+    def test_sharded_reasoning_matches_single_process(self):
+        """Test that the merged sharded inferences match a single-process run."""
+
+        onto = self.onto
+        ShardedReasoner(onto, processes=2).reason(verify=True)
+
+        self.assertIn(onto.Trio, onto.Rush.is_a)
+        self.assertIn(onto.Quintet, onto["Dream Theater"].is_a)
+        self.assertIn(onto.InstrumentalAlbum, onto["Liquid Tension Experiment I"].is_a)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import io
+import os
+import tempfile
+import unittest
+
+import owlready2 as owl
+
+from music_ontology import patch
+from music_ontology.changes import ChangeTracker
+from music_ontology.ntriples import ParseError
+from music_ontology.ontology import MusicOntologyProvider
+
+BASE_IRI = "http://test.org/patch.owl"
+
+
+def create() -> owl.Ontology:
+    return MusicOntologyProvider(BASE_IRI, world=owl.World()).create()
+
+
+def update(onto: owl.Ontology):
+    """Make the changes of a catalog update."""
+
+    with onto:
+        onto.Track("Closer to the Heart", artists=[onto.Rush], genres=[onto["Hard Rock"]],
+                   length_in_milliseconds=173000)
+        onto["Tom Sawyer"].length_in_milliseconds = 277000
+        onto["Tom Sawyer"].genres.remove(onto.Rock)
+        owl.destroy_entity(onto["Red Barchetta"])
+
+
+class PatchTests(unittest.TestCase):
+    def setUp(self):
+        self.old = create()
+        self.new = create()
+        update(self.new)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_diff(self):
+        """Test that the changeset has the changed individuals, values and types only."""
+
+        changeset = patch.diff(self.old, self.new)
+        removed, added = changeset.individuals()
+
+        self.assertEqual({BASE_IRI + "#Red Barchetta"}, removed)
+        self.assertEqual({BASE_IRI + "#Closer to the Heart"}, added)
+        self.assertIn((BASE_IRI + "#Tom Sawyer", BASE_IRI + "#has_length_in_milliseconds", 277000,
+                       "http://www.w3.org/2001/XMLSchema#integer"), changeset.added)
+        self.assertIn((BASE_IRI + "#Tom Sawyer", BASE_IRI + "#has_genre", BASE_IRI + "#Rock", None),
+                      changeset.removed)
+        self.assertEqual(0, len(patch.diff(self.old, create())))
+
+    def test_apply_patch_file(self):
+        """Test that applying the saved patch to the old version gives the new one."""
+
+        filename = os.path.join(self.directory.name, "ontology.patch.gz")
+        patch.diff(self.old, self.new).save(filename)
+
+        # Entities loaded before the patch see its changes
+        tom_sawyer = self.old["Tom Sawyer"]
+        self.assertIn(self.old.Rock, tom_sawyer.genres)
+        self.assertIsNotNone(self.old["Red Barchetta"])
+        with ChangeTracker(self.old) as tracker:
+            patch.apply(self.old, patch.Changeset.load(filename))
+
+        self.assertEqual(0, len(patch.diff(self.old, self.new)))
+        self.assertEqual(277000, tom_sawyer.length_in_milliseconds)
+        self.assertNotIn(self.old.Rock, tom_sawyer.genres)
+        self.assertIsNone(self.old["Red Barchetta"])
+        self.assertEqual([self.old.Rush], self.old["Closer to the Heart"].artists)
+        self.assertIn(self.old["Closer to the Heart"], self.old.Track.instances())
+        self.assertIn(tom_sawyer.storid, tracker.dirty)
+
+    def test_apply_patch_declares_unique_names_again(self):
+        """Test that the AllDifferent axioms follow the added and removed individuals."""
+
+        filename = os.path.join(self.directory.name, "ontology.patch")
+        patch.diff(self.old, self.new).save(filename)
+        onto = self.old
+        MusicOntologyProvider(BASE_IRI, world=onto.world).apply_patch(onto, filename)
+
+        members = [set(axiom.entities) for axiom in onto.different_individuals()]
+        self.assertIn(set(onto.Track.instances()), members)
+        self.assertTrue(all(isinstance(entity, owl.Thing) for entities in members for entity in entities))
+
+    def test_patch_format(self):
+        """Test that patches are RDF Patch transactions which read back identically."""
+
+        changeset = patch.diff(self.old, self.new)
+        file = io.StringIO()
+        changeset.write(file)
+        lines = file.getvalue().splitlines()
+
+        self.assertEqual(("TX .", "TC ."), (lines[0], lines[-1]))
+        self.assertEqual(len(changeset), len(lines) - 2)
+        self.assertIn(f'A <{BASE_IRI}#Closer\\u0020to\\u0020the\\u0020Heart> '
+                      f'<{BASE_IRI}#has_track_artist> <{BASE_IRI}#Rush> .', lines)
+
+        read = patch.Changeset.read(io.StringIO(file.getvalue()))
+        self.assertEqual((changeset.removed, changeset.added), (read.removed, read.added))
+        with self.assertRaises(ParseError):
+            patch.Changeset.read(io.StringIO("TX .\nX <a> <b> <c> .\n"))
+
+    def test_apply_patch_to_quadstore(self):
+        """Test that a patched quadstore is published with the changes."""
+
+        quadstore = os.path.join(self.directory.name, "ontology.sqlite3")
+        filename = os.path.join(self.directory.name, "ontology.patch")
+        patch.diff(self.old, self.new).save(filename)
+        provider = MusicOntologyProvider(BASE_IRI, quadstore=quadstore)
+        provider.create()
+
+        self.assertGreater(provider.apply_patch(provider.load(), filename), 0)
+        provider.world.close()
+
+        onto = MusicOntologyProvider(BASE_IRI, quadstore=quadstore).load()
+        self.assertEqual(277000, onto["Tom Sawyer"].length_in_milliseconds)
+        self.assertEqual(0, len(patch.diff(onto, self.new)))
+        onto.world.close()
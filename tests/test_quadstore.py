@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+from music_ontology.ontology import MusicOntologyProvider
+
+
+class QuadstoreTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.quadstore = os.path.join(self.directory.name, "ontology.sqlite3")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_create_then_load_without_parsing(self):
+        """Test that a created quadstore is reopened without the OWL file."""
+
+        provider = MusicOntologyProvider("file://missing.owl", quadstore=self.quadstore)
+        provider.create()
+        provider.world.close()
+
+        provider = MusicOntologyProvider("file://missing.owl", quadstore=self.quadstore)
+        onto = provider.load()
+
+        limelight = onto.Limelight
+        self.assertIn(limelight, onto["Moving Pictures"].tracks)
+        self.assertEqual(259000, limelight.length_in_milliseconds)
+        self.assertIn(onto.Artist, onto.Rush.INDIRECT_is_a)
+        provider.world.close()
+
+    def test_convert_existing_ontology_file(self):
+        """Test that an existing ontology file is converted into the quadstore."""
+
+        source = os.path.join(self.directory.name, "source.owl")
+        MusicOntologyProvider("file://source.owl").create().save(source)
+
+        provider = MusicOntologyProvider("file://source.owl", quadstore=self.quadstore)
+        provider.convert(source)
+        provider.world.close()
+
+        provider = MusicOntologyProvider("file://source.owl", quadstore=self.quadstore)
+        onto = provider.load()
+        self.assertEqual(onto.Rush, onto["Moving Pictures"].artist)
+        self.assertEqual(3, len(onto.Rush.members))
+        provider.world.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
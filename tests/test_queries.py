@@ -0,0 +1,95 @@
+import types
+import unittest
+
+import owlready2 as owl
+
+from music_ontology.ingest import CatalogIngestor
+from music_ontology.ontology import MusicOntologyProvider
+from music_ontology.queries import QueryService
+
+
+class QueryServiceTests(unittest.TestCase):
+    def setUp(self):
+        self.onto = MusicOntologyProvider("http://test.org/queries.owl", world=owl.World()).create()
+        self.queries = QueryService(self.onto)
+
+    def tearDown(self):
+        self.queries.close()
+
+    def test_named_queries(self):
+        """Test that the named queries agree with the ontology."""
+
+        onto = self.onto
+        run = self.queries.run
+
+        self.assertIsInstance(run("tracks_by_artist", onto.Rush), types.GeneratorType)
+        self.assertEqual(
+            sorted(track.name for track in onto.Track.instances() if onto.Rush in track.artists),
+            sorted(track.name for track in run("tracks_by_artist", onto.Rush)))
+        album = onto["Moving Pictures"]
+        self.assertEqual(album.tracks, list(run("album_tracklist", album)))
+        self.assertEqual([(album, 1981)], [row for row in run("albums_by_artist", onto.Rush)
+                                           if row[0] == album])
+        self.assertEqual({onto["Pye Dubois"]}, set(run("lyrics_co_writers", onto["Neil Peart"])))
+
+        shared = set(run("ensembles_sharing_member", onto["Dream Theater"]))
+        self.assertIn((onto["Liquid Tension Experiment"], onto["John Petrucci"]), shared)
+        self.assertNotIn(onto["Dream Theater"], {ensemble for ensemble, _ in shared})
+
+        lengths = [length for _, length in run("tracks_longer_than", 400000)]
+        self.assertEqual(sorted(lengths), lengths)
+        self.assertTrue(all(length > 400000 for length in lengths))
+
+    def test_inverse_relations(self):
+        """Test that relations asserted through their inverse property are found."""
+
+        onto = self.onto
+        run = self.queries.run
+        with onto:
+            geddy = onto["Geddy Lee"]
+            lte = onto["Liquid Tension Experiment"]
+            geddy.groups.append(lte)
+            album = onto.EP("My Favourite Headache", year=2000)
+            geddy.discography.append(album)
+            track = onto.Track("The Angels' Share")
+            track.albums.append(album)
+            lyrics = onto.Lyrics("'The Angels' Share' Lyrics")
+            geddy.lyrics_written.append(lyrics)
+            lyrics.written_by.append(onto.Artist("Ben Mink"))
+
+        self.assertIn((lte, geddy), set(run("ensembles_sharing_member", onto.Rush)))
+        self.assertIn((album, 2000), list(run("albums_by_artist", geddy)))
+        self.assertEqual([track], list(run("album_tracklist", album)))
+        self.assertEqual({onto["Ben Mink"]}, set(run("lyrics_co_writers", geddy)))
+
+    def test_queries_are_prepared_once(self):
+        """Test that a named query is compiled only once."""
+
+        self.assertIs(self.queries.prepare("tracks_by_genre"), self.queries.prepare("tracks_by_genre"))
+
+    def test_result_cache(self):
+        """Test that consumed results are cached until the next write."""
+
+        onto = self.onto
+        queries = self.queries
+
+        first = list(queries.run("tracks_by_artist", onto.Rush))
+        cached = queries.run("tracks_by_artist", onto.Rush)
+        self.assertIsInstance(cached, types.GeneratorType)
+        self.assertEqual(first, list(cached))
+        self.assertEqual((1, 1), (queries.hits, queries.misses))
+
+        with onto:
+            track = onto.Track("Closer to the Heart", artists=[onto.Rush])
+        self.assertIn(track, list(queries.run("tracks_by_artist", onto.Rush)))
+        self.assertEqual(2, queries.misses)
+
+        CatalogIngestor(onto).ingest([{"name": "Fly by Night", "artists": ["Rush"]}])
+        self.assertIn(onto["Fly by Night"], list(queries.run("tracks_by_artist", onto.Rush)))
+
+    def test_partially_consumed_results_are_not_cached(self):
+        """Test that only fully consumed results are cached."""
+
+        next(self.queries.run("tracks_by_artist", self.onto.Rush))
+        list(self.queries.run("tracks_by_artist", self.onto.Rush))
+        self.assertEqual(0, self.queries.hits)
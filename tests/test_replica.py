@@ -0,0 +1,92 @@
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from music_ontology.ontology import MusicOntologyProvider
+from music_ontology.replica import ReadReplica
+
+BASE_IRI = "http://test.org/replica.owl"
+
+
+def write(quadstore: str, records: list):
+    """Create or extend the quadstore and publish it, as a writer process would."""
+
+    from music_ontology.ingest import CatalogIngestor
+
+    provider = MusicOntologyProvider(BASE_IRI, quadstore=quadstore, shared=True)
+    if records:
+        onto = provider.load()
+        CatalogIngestor(onto).ingest(records)
+    else:
+        onto = provider.create()
+    provider.publish(onto)
+    provider.world.close()
+
+
+def count_tracks(quadstore: str) -> int:
+    replica = ReadReplica(quadstore, BASE_IRI)
+    try:
+        return len(replica.onto.Track.instances())
+    finally:
+        replica.close()
+
+
+class ReadReplicaTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.quadstore = os.path.join(self.directory.name, "ontology.sqlite3")
+        # The writer runs in a process of its own, like the readers
+        self.context = multiprocessing.get_context("spawn")
+        self.run_process(write, self.quadstore, [])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_process(self, function, *args):
+        with self.context.Pool(1) as pool:
+            return pool.apply(function, args)
+
+    def test_replicas_pick_up_published_data(self):
+        """Test that replicas read the quadstore and see what the writer publishes."""
+
+        replica = ReadReplica(self.quadstore, BASE_IRI, refresh_interval=0)
+        self.addCleanup(replica.close)
+        versions = []
+        replica.listeners.append(versions.append)
+        tracks = len(replica.onto.Track.instances())
+
+        self.assertEqual(tracks, self.run_process(count_tracks, self.quadstore))
+        self.assertFalse(replica.refresh())
+
+        self.run_process(write, self.quadstore, [{"name": "Published", "artists": ["Rush"]}])
+        onto = replica.onto
+        self.assertEqual([onto], versions)
+        self.assertEqual(tracks + 1, len(onto.Track.instances()))
+        self.assertEqual([onto.Rush], onto.Published.artists)
+        self.assertEqual(tracks + 1, self.run_process(count_tracks, self.quadstore))
+
+    def test_refresh_interval(self):
+        """Test that the quadstore is not checked again within the refresh interval."""
+
+        replica = ReadReplica(self.quadstore, BASE_IRI, refresh_interval=3600)
+        self.addCleanup(replica.close)
+        onto = replica.onto
+
+        self.run_process(write, self.quadstore, [{"name": "Published", "artists": ["Rush"]}])
+        self.assertIs(onto, replica.onto)
+        self.assertTrue(replica.refresh())
+        self.assertIsNotNone(replica.onto.Published)
+
+    def test_replicas_are_read_only(self):
+        """Test that replicas cannot write into the quadstore, but can run SPARQL queries."""
+
+        replica = ReadReplica(self.quadstore, BASE_IRI)
+        self.addCleanup(replica.close)
+        onto = replica.onto
+
+        self.assertIn(onto["Tom Sawyer"], onto.Track.instances())
+        with self.assertRaises(sqlite3.OperationalError):
+            with onto:
+                onto.Track("Unpublished")
@@ -0,0 +1,155 @@
+import unittest
+
+import owlready2 as owl
+
+from music_ontology.classifier import ClosedWorldClassifier
+from music_ontology.ingest import CatalogIngestor
+from music_ontology.ontology import MusicOntologyProvider
+from music_ontology.resolution import EntityResolver, phonetic_key, soundex
+
+
+class SoundexTests(unittest.TestCase):
+    def test_soundex(self):
+        """Test the Soundex codes of words, numbers and roman numerals."""
+
+        self.assertEqual("r163", soundex("robert"))
+        self.assertEqual("r163", soundex("rupert"))
+        self.assertEqual("t522", soundex("tymczak"))
+        self.assertEqual("p236", soundex("pfister"))
+        self.assertEqual("2112", soundex("2112"))
+        self.assertEqual("ii", soundex("ii"))
+
+    def test_phonetic_key_ignores_order_and_stopwords(self):
+        """Test that the phonetic key ignores the order of the words and the stopwords."""
+
+        self.assertEqual(phonetic_key("geddy lee"), phonetic_key("lee geddy"))
+        self.assertEqual(phonetic_key("the police"), phonetic_key("police"))
+
+
+class EntityResolverTests(unittest.TestCase):
+    def setUp(self):
+        self.provider = MusicOntologyProvider("http://test.org/resolution.owl")
+        self.onto = self.provider.create()
+        self.resolver = EntityResolver(self.onto)
+
+    def tearDown(self):
+        self.onto.destroy()
+
+    def test_resolve_variants(self):
+        """Test that misspelled, reordered and differently cased names resolve to the known individual."""
+
+        resolver = EntityResolver(self.onto, auto_merge=True)
+        self.assertEqual("Jordan Rudess", resolver.resolve("Jordan Ruddess", "Artist"))
+        self.assertEqual("Geddy Lee", resolver.resolve("Lee, Geddy", "SoloArtist"))
+        self.assertEqual("Dream Theater", resolver.resolve("dream theatre", "MusicalEnsemble"))
+        self.assertEqual("Progressive Rock", resolver.resolve("Progresive Rock", "Genre"))
+        self.assertEqual(4, resolver.resolved)
+        self.assertEqual(["Jordan Ruddess", "dream theatre", "Progresive Rock"],
+                         [duplicate.duplicate for duplicate in resolver.merged])
+
+    def test_distinct_names_are_registered(self):
+        """Test that names which only sound alike, numbered names and other classes are kept apart."""
+
+        resolver = self.resolver
+        self.assertEqual("Rash", resolver.resolve("Rash", "Artist"))
+        self.assertEqual("Liquid Tension Experiment 2",
+                         resolver.resolve("Liquid Tension Experiment 2", "Album"))
+        self.assertEqual("Rush", resolver.resolve("Rush", "Genre"))
+        self.assertEqual("Rash", resolver.resolve("rash", "Artist"))
+        self.assertIsNone(resolver.match("Dream Theater", "Track"))
+        self.assertEqual([], resolver.duplicates)
+
+    def test_similar_short_names_are_kept_apart(self):
+        """Test that short names which differ by a letter are different individuals."""
+
+        onto = self.onto
+        resolver = EntityResolver(onto, auto_merge=True)
+        CatalogIngestor(onto, resolver=resolver).ingest([
+            {"name": "Roundabout", "artists": ["Jon Anderson"]},
+            {"name": "Seminole Wind", "artists": ["John Anderson"]},
+        ])
+
+        self.assertEqual([onto["Jon Anderson"]], onto.Roundabout.artists)
+        self.assertEqual([onto["John Anderson"]], onto["Seminole Wind"].artists)
+        self.assertEqual([], resolver.merged)
+        self.assertEqual([], resolver.duplicates)
+
+    def test_ingest_with_resolver(self):
+        """Test that ingested variants of known names do not create duplicates."""
+
+        onto = self.onto
+        CatalogIngestor(onto, resolver=EntityResolver(onto, auto_merge=True)).ingest([
+            {"type": "ensemble", "name": "dream theater", "members": ["Jordan Ruddess", "john petrucci"]},
+            {"name": "Vital Signs", "artists": ["Rush"], "genres": ["progressive rock"],
+             "album": "Moving Picture", "lyrics": "Unstable condition", "lyrics_written_by": ["neil peart"]},
+        ])
+
+        self.assertIsNone(onto["Jordan Ruddess"])
+        self.assertIsNone(onto["Moving Picture"])
+        self.assertEqual(5, len(onto["Dream Theater"].members))
+        self.assertIn(onto["Vital Signs"], onto["Moving Pictures"].tracks)
+        self.assertIn(onto["Neil Peart"], onto["'Vital Signs' Lyrics"].written_by)
+
+        ClosedWorldClassifier(onto).classify()
+        self.assertEqual([onto["Dream Theater"]], list(onto.Quintet.instances()))
+
+    def test_ingestion_lists_duplicates_for_review(self):
+        """Test that without auto_merge, ingested variants are kept and listed until they are merged."""
+
+        onto = self.onto
+        resolver = self.resolver
+        CatalogIngestor(onto, resolver=resolver).ingest([
+            {"name": "Vital Signs", "artists": ["Rush"], "album": "Moving Picture"},
+        ])
+
+        self.assertIn(onto["Vital Signs"], onto["Moving Picture"].tracks)
+        self.assertEqual([("Moving Picture", "Moving Pictures")],
+                         [(duplicate.duplicate, duplicate.canonical) for duplicate in resolver.duplicates])
+
+        self.assertEqual(1, resolver.merge_duplicates())
+        self.assertIsNone(onto["Moving Picture"])
+        self.assertIn(onto["Vital Signs"], onto["Moving Pictures"].tracks)
+
+    def test_merge_existing_duplicates(self):
+        """Test that duplicates already in the ontology are found and merged."""
+
+        onto = self.onto
+        CatalogIngestor(onto).ingest([
+            {"type": "ensemble", "name": "Dream Theater", "members": ["Jordan Ruddess"]},
+            {"name": "Vital Signs", "artists": ["Rush"], "lyrics": "Unstable condition",
+             "lyrics_written_by": ["Jordan Ruddess"]},
+        ])
+        dream_theater = onto["Dream Theater"]
+        self.assertEqual(6, len(dream_theater.members))
+
+        resolver = EntityResolver(onto)
+        self.assertEqual([("Jordan Ruddess", "Jordan Rudess")],
+                         [(duplicate.duplicate, duplicate.canonical) for duplicate in resolver.duplicates])
+        self.assertEqual(1, resolver.merge_duplicates())
+
+        self.assertIsNone(onto["Jordan Ruddess"])
+        self.assertEqual(5, len(dream_theater.members))
+        self.assertIn(onto["Jordan Rudess"], onto["'Vital Signs' Lyrics"].written_by)
+        self.assertIn(dream_theater, onto["Jordan Rudess"].groups)
+        self.assertEqual([], EntityResolver(onto).duplicates)
+
+    def test_merge_keeps_unique_names_distinct(self):
+        """Test that the AllDifferent lists of the duplicate list the canonical individual once."""
+
+        onto = self.onto
+        CatalogIngestor(onto).ingest([
+            {"type": "ensemble", "name": "Dream Theater", "members": ["Jordan Ruddess"]},
+            {"type": "ensemble", "name": "Vapor Trails Band", "members": ["Jordan Ruddess", "Ben Mink"]},
+        ])
+        self.provider.declare_unique_names(onto, "ensembles")
+        self.assertEqual(1, EntityResolver(onto).merge_duplicates())
+
+        axioms = [axiom.entities for axiom in onto.different_individuals()]
+        for entities in axioms:
+            self.assertTrue(all(isinstance(entity, owl.Thing) for entity in entities))
+            self.assertEqual(len(entities), len(set(entities)))
+        self.assertIn({onto["Jordan Rudess"], onto["Ben Mink"]}, [set(entities) for entities in axioms])
+        self.assertIn(set(onto["Dream Theater"].members), [set(entities) for entities in axioms])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import types
+import unittest
+
+import owlready2 as owl
+
+from music_ontology.ontology import MusicOntologyProvider
+from music_ontology.snapshot import (
+    AlbumRecord, ArtistRecord, CatalogSnapshot, LyricsRecord, TrackRecord,
+)
+
+
+def _iris(entities) -> tuple:
+    return tuple(sorted(entity.iri for entity in entities))
+
+
+class SnapshotTests(unittest.TestCase):
+    def setUp(self):
+        self.onto = MusicOntologyProvider("http://test.org/snapshot.owl").create()
+        self.snapshot = CatalogSnapshot(self.onto, chunk_size=3)
+
+    def tearDown(self):
+        self.onto.destroy()
+
+    def test_records_hold_the_property_values(self):
+        """Test that every record holds the same values as the entity API."""
+
+        onto = self.onto
+        tracks = {record.iri: record for record in self.snapshot.tracks()}
+        self.assertEqual(_iris(onto.Track.instances()), tuple(sorted(tracks)))
+        for track in onto.Track.instances():
+            lyrics = track.lyrics
+            self.assertEqual(TrackRecord(
+                track.iri, track.length_in_milliseconds, _iris(track.artists), _iris(track.genres),
+                _iris(track.albums), lyrics.iri if lyrics else None,
+            ), tracks[track.iri])
+
+        albums = {record.iri: record for record in self.snapshot.albums()}
+        for album in onto.Album.instances():
+            self.assertEqual(AlbumRecord(
+                album.iri, album.year, album.artist.iri if album.artist else None, _iris(album.tracks),
+            ), albums[album.iri])
+
+        artists = {record.iri: record for record in self.snapshot.artists()}
+        self.assertEqual(_iris(onto.Artist.instances()), tuple(sorted(artists)))
+        rush = onto.Rush
+        self.assertEqual(ArtistRecord(rush.iri, _iris(rush.members), (), _iris(rush.discography)),
+                         artists[rush.iri])
+        self.assertEqual((rush.iri,), artists[onto["Geddy Lee"].iri].groups)
+
+        lyrics = onto["'Limelight' Lyrics"]
+        self.assertIn(LyricsRecord(lyrics.iri, lyrics.track.iri, _iris(lyrics.written_by), lyrics.text),
+                      list(self.snapshot.lyrics()))
+
+    def test_records_are_compact_and_lazy(self):
+        """Test that records have no instance dict, iterators are lazy and IRIs are interned."""
+
+        tracks = self.snapshot.tracks()
+        self.assertIsInstance(tracks, types.GeneratorType)
+        first = next(tracks)
+        self.assertFalse(hasattr(first, "__dict__"))
+
+        genres = [record.genres for record in self.snapshot.tracks() if record.genres]
+        rock = [genre for tuple_ in genres for genre in tuple_ if genre.endswith("#Rock")]
+        self.assertGreater(len(rock), 1)
+        self.assertTrue(all(genre is rock[0] for genre in rock))
+
+    def test_no_entities_are_created(self):
+        """Test that reading a loaded catalog creates no individual entities."""
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "ontology.owl")
+            MusicOntologyProvider("http://test.org/snapshot.owl").save(self.onto, filename)
+            world = owl.World()
+            onto = MusicOntologyProvider("http://test.org/snapshot.owl", world=world).load(filename)
+
+            def individuals() -> int:
+                return sum(isinstance(entity, owl.Thing) for entity in list(world._entities.values()))
+
+            # The schema refers to "Various Artists" (VA_Album)
+            snapshot = CatalogSnapshot(onto)
+            before = individuals()
+            records = [*snapshot.tracks(), *snapshot.albums(), *snapshot.artists(), *snapshot.lyrics()]
+            self.assertGreater(len(records), 40)
+            self.assertEqual(before, individuals())
+            world.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+from collections import Counter
+
+import owlready2 as owl
+
+from music_ontology import benchmark
+from music_ontology.ontology import MusicOntologyProvider
+from music_ontology.synthetic import generate, populate
+
+PARAMETERS = dict(artists=30, ensembles=8, albums=10, tracks=120, genres=6, lyrics_ratio=0.5)
+ALBUM_TYPES = {"album": 1, "ep": 1, "single": 1, "compilation": 1}
+
+
+def _album_types(records) -> Counter:
+    albums = {record["album"]: record["album_type"] for record in records if "album" in record}
+    return Counter(albums.values())
+
+
+class SyntheticCatalogTests(unittest.TestCase):
+    def test_generate(self):
+        """Test that the generated records follow the parameters."""
+
+        records = list(generate(**PARAMETERS))
+        solo_artists = [record for record in records if record.get("type") == "solo_artist"]
+        ensembles = [record for record in records if record.get("type") == "ensemble"]
+        tracks = [record for record in records if "type" not in record]
+
+        self.assertEqual(records, list(generate(**PARAMETERS)))
+        self.assertEqual(30, len(solo_artists))
+        self.assertEqual(8, len(ensembles))
+        self.assertTrue(all(2 <= len(record["members"]) <= 12 for record in ensembles))
+        self.assertEqual(120, len(tracks))
+        self.assertEqual(10, len({record["album"] for record in tracks if "album" in record}))
+        self.assertLessEqual(len({genre for record in tracks for genre in record["genres"]}), 6)
+        self.assertTrue(20 < sum("lyrics" in record for record in tracks) < 100)
+        self.assertTrue(all(30000 <= record["length_in_milliseconds"] <= 1800000 for record in tracks))
+
+    def test_album_types(self):
+        """Test that the albums are of every type in the given proportions."""
+
+        self.assertEqual({"album": 10}, _album_types(generate(**PARAMETERS, album_types={"album": 1})))
+
+        records = list(generate(**{**PARAMETERS, "albums": 40}, album_types=ALBUM_TYPES, va_ratio=1))
+        types = _album_types(records)
+        self.assertEqual(40, sum(types.values()))
+        self.assertTrue(all(5 <= types[kind] <= 15 for kind in ALBUM_TYPES))
+        compilations = {record["album"] for record in records if record.get("album_type") == "compilation"}
+        self.assertEqual(compilations, {
+            record["album"] for record in records if record.get("album_artist") == "Various Artists"})
+
+    def test_populate(self):
+        """Test that a generated catalog populates the ontology's classes."""
+
+        onto = MusicOntologyProvider("http://test.org/synthetic.owl", world=owl.World()).create(
+            include_examples=False)
+        populate(onto, **PARAMETERS, album_types=ALBUM_TYPES)
+        types = _album_types(generate(**PARAMETERS, album_types=ALBUM_TYPES))
+
+        self.assertEqual(120, len(onto.Track.instances()))
+        self.assertEqual(10, len(onto.Album.instances()))
+        self.assertEqual(30, len(onto.SoloArtist.instances()))
+        self.assertEqual(8, len(onto.MusicalEnsemble.instances()))
+        self.assertEqual(types["ep"], len(onto.EP.instances()))
+        self.assertEqual(types["single"], len(onto.Single.instances()))
+        self.assertEqual(types["compilation"], len(onto.Compilation.instances()))
+        self.assertTrue(onto.Lyrics.instances())
+
+
+class BenchmarkTests(unittest.TestCase):
+    def test_run_and_record(self):
+        """Test that every step is measured and recorded for later comparisons."""
+
+        results = benchmark.run_scale("test", PARAMETERS)
+        steps = [result["step"] for result in results]
+        self.assertIn("create", steps)
+        self.assertIn("reason", steps)
+        self.assertIn("load_ntriples", steps)
+        self.assertTrue(all(result["seconds"] >= 0 and result["process_peak_rss_kb"] > 0 for result in results))
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "benchmarks.jsonl")
+            benchmark.record(results, filename)
+            previous = benchmark.previous_results(filename)
+
+        self.assertEqual(results[0]["seconds"], previous["test", "create"]["seconds"])
+        lines = []
+        benchmark.report(results, previous, lines.append)
+        self.assertIn("+0%", lines[1])
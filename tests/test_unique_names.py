@@ -0,0 +1,96 @@
+import shutil
+import unittest
+
+from music_ontology.classifier import ClosedWorldClassifier
+from music_ontology.ingest import CatalogIngestor
+from music_ontology.ontology import MusicOntologyProvider
+
+
+class UniqueNamesTests(unittest.TestCase):
+    def setUp(self):
+        self.provider = MusicOntologyProvider("http://test.org/unique_names.owl")
+        self.onto = self.provider.create(unique_names="ensembles")
+
+    def tearDown(self):
+        self.onto.destroy()
+
+    def axioms(self):
+        return sorted((sorted(member.name for member in axiom.entities)
+                       for axiom in self.onto.different_individuals()), key=len)
+
+    def test_one_axiom_per_ensemble(self):
+        """Test that only the members of each ensemble are declared distinct."""
+
+        onto = self.onto
+        ensembles = [ensemble for ensemble in onto.MusicalEnsemble.instances() if len(ensemble.members) > 1]
+        self.assertEqual(sorted(sorted(member.name for member in ensemble.members) for ensemble in ensembles),
+                         sorted(self.axioms()))
+        self.assertEqual(5, max(len(axiom) for axiom in self.axioms()))
+
+    def test_classes_mode_declares_every_class(self):
+        """Test that the default mode still declares the individuals of each class distinct."""
+
+        onto = self.onto
+        self.provider.declare_unique_names(onto, "classes")
+        axioms = self.axioms()
+        self.assertIn(sorted(track.name for track in onto.Track.instances()), axioms)
+        self.assertEqual(2, sum("Rush" in axiom for axiom in axioms))
+
+    def test_redeclare_after_ingesting(self):
+        """Test that declaring again replaces the axioms and covers the new ensembles."""
+
+        onto = self.onto
+        CatalogIngestor(onto).ingest([
+            {"type": "ensemble", "name": "Bruford Levin Upper Extreme",
+             "members": ["Bill Bruford", "Tony Levin"]},
+        ])
+        self.provider.declare_unique_names(onto, "ensembles")
+
+        axioms = self.axioms()
+        self.assertEqual(["Bill Bruford", "Tony Levin"], axioms[0])
+        self.assertEqual(len(axioms), len({tuple(axiom) for axiom in axioms}))
+
+    def test_other_ontologies_are_ignored(self):
+        """Test that memberships asserted in other ontologies of the world are not declared."""
+
+        onto = self.onto
+        other = onto.world.get_ontology("http://test.org/other_unique_names.owl")
+        with other:
+            onto["Geddy Lee"].groups.append(onto["Dream Theater"])
+        self.provider.declare_unique_names(onto, "ensembles")
+
+        self.assertFalse([axiom for axiom in self.axioms() if "Geddy Lee" in axiom and "John Petrucci" in axiom])
+        other.destroy()
+
+    def test_default_mode(self):
+        """Test that the individuals of each class are declared distinct by default."""
+
+        self.provider.declare_unique_names(self.onto)
+        self.assertIn(sorted(track.name for track in self.onto.Track.instances()), self.axioms())
+
+    def test_unknown_mode(self):
+        """Test that an unknown mode is rejected."""
+
+        with self.assertRaises(ValueError):
+            self.provider.declare_unique_names(self.onto, "everything")
+
+    def test_number_restrictions_still_classify(self):
+        """Test that the ensembles are still classified by their number of members."""
+
+        onto = self.onto
+        ClosedWorldClassifier(onto).classify()
+
+        self.assertEqual([onto.Rush], list(onto.Trio.instances()))
+        self.assertEqual([onto["Dream Theater"]], list(onto.Quintet.instances()))
+        self.assertEqual([onto["Liquid Tension Experiment"]], list(onto.Quartet.instances()))
+        self.assertEqual([], list(onto.Duet.instances()))
+
+    @unittest.skipUnless(shutil.which("java"), "HermiT requires java")
+    def test_cross_check_against_hermit(self):
+        """Test that HermiT classifies the ensembles the same with the partitioned axioms."""
+
+        self.assertEqual([], ClosedWorldClassifier(self.onto).cross_check())
+
+
+if __name__ == "__main__":
+    unittest.main()
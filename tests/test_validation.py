@@ -0,0 +1,98 @@
+import unittest
+
+from owlready2.base import to_literal
+
+from music_ontology.ontology import MusicOntologyProvider
+from music_ontology.validation import ConstraintValidator, Violation, validate
+
+
+class ValidationTests(unittest.TestCase):
+    def setUp(self):
+        self.onto = MusicOntologyProvider("http://test.org/validation.owl").create()
+
+    def tearDown(self):
+        self.onto.destroy()
+
+    def violations(self, constraint: str) -> dict:
+        return {(violation.individual, violation.property): violation
+                for violation in validate(self.onto) if violation.constraint == constraint}
+
+    def test_sample_is_valid(self):
+        """Test that the sample data, with artists typed as plain `Artist`, has no violations."""
+
+        self.assertEqual([], ConstraintValidator(self.onto).validate())
+
+    def test_functional_properties(self):
+        """Test that several values of a functional property are reported with all of them."""
+
+        onto = self.onto
+        album = onto["Moving Pictures"]
+        with onto:
+            onto._add_data_triple_spod(album.storid, onto.has_year.storid, *to_literal(1982))
+            onto._add_obj_triple_spo(album.storid, onto.has_album_artist.storid, onto["Dream Theater"].storid)
+
+        violations = self.violations("functional")
+        self.assertEqual((1981, 1982), violations[album.iri, onto.has_year.iri].values)
+        self.assertEqual((onto["Dream Theater"].iri, onto.Rush.iri),
+                         violations[album.iri, onto.has_album_artist.iri].values)
+
+    def test_inverse_pairs(self):
+        """Test that the two sides of a functional inverse pair must agree."""
+
+        onto = self.onto
+        lyrics = onto["'Limelight' Lyrics"]
+        with onto:
+            onto._add_obj_triple_spo(lyrics.storid, onto.are_of_track.storid, onto["Tom Sawyer"].storid)
+
+        violations = self.violations("inverse")
+        self.assertEqual(tuple(sorted((onto.Limelight.iri, onto["Tom Sawyer"].iri))),
+                         violations[lyrics.iri, onto.are_of_track.iri].values)
+        self.assertIn((onto["Tom Sawyer"].iri, onto.has_lyrics.iri), violations)
+        self.assertEqual({}, self.violations("functional"))
+
+    def test_disjoint_classes(self):
+        """Test that the individuals of disjoint classes are reported."""
+
+        onto = self.onto
+        album = onto["Moving Pictures"]
+        album.is_a.extend([onto.EP, onto.Single])
+        onto["Geddy Lee"].is_a.extend([onto.SoloArtist, onto.Trio])
+
+        violations = self.violations("disjoint")
+        self.assertEqual((onto.EP.iri, onto.Single.iri), violations[album.iri, None].values)
+        self.assertEqual((onto.MusicalEnsemble.iri, onto.SoloArtist.iri), violations[onto["Geddy Lee"].iri, None].values)
+
+    def test_domains_and_ranges(self):
+        """Test that individuals of unrelated types and literals of other datatypes are reported."""
+
+        onto = self.onto
+        rock = onto.Rock
+        onto.YYZ.artists.append(rock)
+        onto.Rush.members.append(onto["Dream Theater"])
+        with onto:
+            onto._add_data_triple_spod(rock.storid, onto.has_year.storid, *to_literal(1970))
+            onto._add_data_triple_spod(onto.YYZ.storid, onto.has_length_in_milliseconds.storid,
+                                       *to_literal("four minutes"))
+
+        domains, ranges = self.violations("domain"), self.violations("range")
+        self.assertEqual((onto.Album.iri,), domains[rock.iri, onto.has_year.iri].values)
+        self.assertEqual((onto.Artist.iri,), ranges[rock.iri, onto.has_track_artist.iri].values)
+        self.assertEqual((onto.SoloArtist.iri,), ranges[onto["Dream Theater"].iri, onto.has_group_member.iri].values)
+        self.assertEqual(("int",), ranges[onto.YYZ.iri, onto.has_length_in_milliseconds.iri].values)
+        self.assertEqual(4, len(domains) + len(ranges))
+
+    def test_all_violations_are_reported(self):
+        """Test that `validate()` reports the violations of all the constraints together."""
+
+        onto = self.onto
+        onto["Moving Pictures"].is_a.extend([onto.EP, onto.Compilation])
+        onto.YYZ.artists.append(onto.Rock)
+
+        violations = validate(onto)
+        self.assertEqual(["disjoint", "range"], sorted(violation.constraint for violation in violations))
+        self.assertIsInstance(violations[0], Violation)
+        self.assertIn("disjoint classes", str(violations[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
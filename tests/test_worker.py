@@ -0,0 +1,130 @@
+import threading
+import unittest
+from unittest import mock
+
+import owlready2 as owl
+
+from music_ontology.ontology import MusicOntologyProvider
+from music_ontology.worker import ReasonerSession, ReasonerWorker, WorkerError
+
+
+def fail(onto):
+    raise AssertionError("The fallback should not be used.")
+
+
+class ReasonerSessionTests(unittest.TestCase):
+    def setUp(self):
+        self.world = owl.World()
+        self.onto = MusicOntologyProvider("http://test.org/worker.owl", world=self.world).create()
+
+    def tearDown(self):
+        self.world.close()
+
+    def test_worker_streams_changes(self):
+        """Test that a warm worker reclassifies the streamed changes."""
+
+        onto = self.onto
+        with ReasonerSession(onto, fallback=fail) as session:
+            session.reason()
+            self.assertIn(onto.Trio, onto.Rush.is_a)
+            self.assertIn(onto.InstrumentalAlbum, onto["Liquid Tension Experiment I"].is_a)
+
+            with onto:
+                onto.Rush.members.append(onto.Artist("John Rutsey"))
+                onto.Osmosis.lyrics = onto.Lyrics("'Osmosis' Lyrics", text="...")
+            session.reason()
+
+            self.assertIn(onto.Quartet, onto.Rush.is_a)
+            self.assertNotIn(onto.Trio, onto.Rush.is_a)
+            self.assertNotIn(onto.InstrumentalTrack, onto.Osmosis.is_a)
+            self.assertNotIn(onto.InstrumentalAlbum, onto["Liquid Tension Experiment I"].is_a)
+            self.assertIn(onto.Quintet, onto["Dream Theater"].is_a)
+
+    def test_worker_pool_serves_concurrent_callers(self):
+        """Test that several workers stay in sync with the changes."""
+
+        onto = self.onto
+        with ReasonerSession(onto, workers=2, fallback=fail) as session:
+            threads = [threading.Thread(target=session.reason) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            with onto:
+                onto.Rush.members.append(onto.Artist("John Rutsey"))
+            session.reason()
+            session.reason()
+            self.assertIn(onto.Quartet, onto.Rush.is_a)
+
+    def test_stale_inferences_are_not_applied(self):
+        """Test that a worker finishing after one with a newer snapshot does not overwrite its inferences."""
+
+        onto = self.onto
+        update = ReasonerWorker.update
+        started, release = threading.Event(), threading.Event()
+
+        def slow_update(worker, snapshot):
+            result = update(worker, snapshot)
+            if not started.is_set():
+                started.set()
+                release.wait(30)
+            return result
+
+        with ReasonerSession(onto, workers=2, fallback=fail) as session:
+            session.reason()
+            session.reason()  # Both workers are loaded
+            with mock.patch.object(ReasonerWorker, "update", slow_update):
+                with onto:
+                    onto.Rush.members.append(onto.Artist("John Rutsey"))
+                thread = threading.Thread(target=session.reason)
+                thread.start()
+                started.wait(30)
+
+                with onto:
+                    onto.Rush.members.append(onto.Artist("Jeff Jones"))
+                session.reason()
+                release.set()
+                thread.join()
+
+            self.assertIn(onto.Quintet, onto.Rush.is_a)
+            self.assertNotIn(onto.Quartet, onto.Rush.is_a)
+
+    def test_fallback_without_workers(self):
+        """Test that the session falls back to the one-shot path."""
+
+        onto = self.onto
+        with ReasonerSession(onto, workers=0) as session:
+            session.reason()
+        self.assertIn(onto.Trio, onto.Rush.is_a)
+
+    def test_timed_out_worker_is_stopped(self):
+        """Test that a worker which timed out is killed right away."""
+
+        worker = ReasonerWorker(timeout=0.001)
+        with self.assertRaises(WorkerError):
+            worker.load(self.onto)
+        self.assertFalse(worker.alive)
+        worker.close()
+
+    def test_provider_reasons_with_workers(self):
+        """Test that the provider keeps a warm session between calls."""
+
+        onto = self.onto
+        provider = MusicOntologyProvider("http://test.org/worker.owl", world=self.world, reasoner_workers=1)
+        provider.reason(onto)
+        session = provider.session
+        self.assertIn(onto.Trio, onto.Rush.is_a)
+
+        with onto:
+            onto.Rush.members.append(onto.Artist("John Rutsey"))
+        provider.reason(onto)
+        self.assertIs(session, provider.session)
+        self.assertIn(onto.Quartet, onto.Rush.is_a)
+
+        provider.close()
+        self.assertIsNone(provider.session)
+
+
+if __name__ == "__main__":
+    unittest.main()